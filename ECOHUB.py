@@ -20,8 +20,18 @@ GUTIERREZ+KATSUYA: Specific numerical data, emission factors, and conversion log
                    and the CO2e to Trees/Cars conversion logic.
 """
 
-import tkinter as tk
-from tkinter import ttk, messagebox
+import sys
+# `python ECOHUB.py calc|serve` run without a display (see run_calc_cli, run_api_server), so Tk is only imported for the app
+HEADLESS_COMMANDS = ("calc", "serve")
+HEADLESS = __name__ == "__main__" and len(sys.argv) > 1 and sys.argv[1] in HEADLESS_COMMANDS
+if not HEADLESS:
+    import tkinter as tk
+    from tkinter import ttk, messagebox, filedialog
+import argparse
+import asyncio
+import concurrent.futures
+import urllib.parse
+from http import HTTPStatus
 from typing import Dict, Any
 import datetime
 import random
@@ -29,13 +39,67 @@ import csv
 import os
 import json
 import logging
+import logging.handlers
+import queue
+import atexit
+import threading
+import traceback
+import weakref
+from collections import OrderedDict, Counter
+from collections.abc import Mapping
+from types import MappingProxyType
+import time
+import heapq
+import bisect
+import itertools
+import re
+import functools
+import hashlib
+import io
+from array import array
+import numpy as np
+from contextlib import contextmanager
 
 # --- Logging Setup ---
-# Basic configuration logs INFO level messages to console/file
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s',
-)
+LOG_FORMAT = '%(asctime)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s'
+_log_listener = None # QueueListener writing records off the calling threads
+
+def configure_logging(level=None):
+    """Routes the root logger through a queue to console and rotating-file handlers.
+
+    Calling threads (above all the Tk thread) only enqueue records; a QueueListener thread
+    formats and writes them. Level defaults to $ECOHUB_LOG_LEVEL or INFO. Safe to call twice.
+    """
+    global _log_listener
+    if _log_listener is not None:
+        return _log_listener
+    if level is None:
+        level = os.environ.get("ECOHUB_LOG_LEVEL", "INFO").upper()
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(formatter)
+    handlers = [console_handler]
+    try:
+        os.makedirs(DATA_DIR, exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(APP_LOG_FILE, maxBytes=APP_LOG_MAX_BYTES,
+                                                            backupCount=APP_LOG_BACKUPS, encoding="utf-8", delay=True)
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+    except OSError as e:
+        print(f"ECOHUB: file logging disabled, cannot use '{APP_LOG_FILE}': {e}", file=sys.stderr)
+
+    log_queue = queue.SimpleQueue()
+    root_logger = logging.getLogger()
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    root_logger.setLevel(level)
+
+    _log_listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _log_listener.start()
+    atexit.register(_log_listener.stop) # Flushes queued records on interpreter exit
+    return _log_listener
 
 # IVO+GPT
 # --- Configuration ---
@@ -90,6 +154,63 @@ THEME_ECO_LIGHT = {
 # Global variable holding the currently active theme colors
 theme_colors = THEME_ECO_DARK.copy()
 
+# IVO+GPT
+# --- Theme Registry ---
+class ThemeRegistry:
+    """Tracks which theme colour role each raw Tk widget option uses.
+
+    ttk widgets follow ttk.Style, but tk.Frame/tk.Canvas (and ttk widgets given an explicit
+    background) keep the colours they were created with. Registered widgets are recoloured
+    in one pass by apply(), so a theme switch restyles pages in place instead of rebuilding
+    them. Entries are weak and dropped once their widget is destroyed.
+    """
+    TREE_ROW_TAGS = {'oddrow': TV_ODD, 'evenrow': TV_EVEN}
+
+    def __init__(self):
+        self._widgets = weakref.WeakKeyDictionary() # {widget: {option: colour_role}}
+        self._trees = weakref.WeakSet() # Treeviews using the alternating row tags
+
+    def register(self, widget, **option_roles):
+        """Colours widget options from their roles now and on every apply(); returns widget."""
+        self._widgets.setdefault(widget, {}).update(option_roles)
+        self._configure(widget, option_roles, theme_colors)
+        return widget
+
+    def register_tree(self, tree):
+        """Configures the odd/even row tags of a Treeview and keeps them themed."""
+        self._trees.add(tree)
+        self._configure_tree(tree, theme_colors)
+        return tree
+
+    def apply(self, colors):
+        """Re-applies the given palette to every registered widget that still exists."""
+        for widget, option_roles in list(self._widgets.items()):
+            if not self._configure(widget, option_roles, colors):
+                self._widgets.pop(widget, None)
+        for tree in list(self._trees):
+            if not self._configure_tree(tree, colors):
+                self._trees.discard(tree)
+
+    @staticmethod
+    def _configure(widget, option_roles, colors):
+        try:
+            widget.configure(**{option: colors[role] for option, role in option_roles.items()})
+            return True
+        except tk.TclError: # Widget destroyed
+            return False
+
+    def _configure_tree(self, tree, colors):
+        try:
+            # Tag colours apply to every row at once, however many rows the tree holds
+            for tag, role in self.TREE_ROW_TAGS.items():
+                tree.tag_configure(tag, background=colors[role], foreground=colors[FG])
+            return True
+        except tk.TclError:
+            return False
+
+# Widgets of the main app register here so theme switches can recolour them in place
+theme_registry = ThemeRegistry()
+
 # Fonts (Defined as constants)
 FONT_FAMILY = "Segoe UI"
 FONT_NORMAL = (FONT_FAMILY, 10)
@@ -109,8 +230,11 @@ app_state = {
     "user_profiles": {},        # Dict: {user_id: {"name": "...", "icon_color": "#..."}}
     "current_user_id": None,    # ID of the currently logged-in user
     "emission_factors": {},     # Dict: {factor_id: float_value} loaded from CSV/defaults
+    "exchange_rates": None,     # ExchangeRateTable: dated PHP per USD (see load_exchange_rates)
+    "grid_profiles": None,      # GridIntensityProfiles: hourly kg CO2e/kWh per region (see load_grid_profiles)
     "activities": [],           # List of dicts: [{"timestamp": ..., "category": ..., "details": {...}, "carbon_footprint": ...}]
     "activity_log": [],         # List of dicts: [{"timestamp": ..., "action": "..."}] for user actions
+    "user_file_stamps": {},     # Dict: {data_type: (mtime_ns, size) or None} of the files as read/last written (see write_user_files)
     "settings": {               # User-specific settings
         "theme": "eco_dark",    # Default theme
         "conversion": "CO2e"    # Default display unit
@@ -133,12 +257,37 @@ BASE_CATEGORIES: Dict[str, CategoryType] = {
 # --- File Paths & Constants ---
 DATA_DIR = "EcoHubData" # Folder to store all user data and configurations
 USER_PROFILES_CSV = os.path.join(DATA_DIR, "user_profiles.csv")
+APP_LOG_FILE = os.path.join(DATA_DIR, "ecohub.log")
+APP_LOG_MAX_BYTES = 1024 * 1024 # Rotate the application log at this size...
+APP_LOG_BACKUPS = 3 # ...keeping this many old files
 EMISSION_FACTORS_CSV = os.path.join(DATA_DIR, "emission_factors.csv")
+EMISSION_FACTOR_CATALOG = os.path.join(DATA_DIR, "emission_factors.catalog.json") # Compiled CSV + defaults, see load_factor_catalog
+FACTOR_CATALOG_FORMAT = 3 # Bump when the compiled catalog layout changes
+FACTOR_SETS_DIR = os.path.join(DATA_DIR, "factor_sets") # Immutable, content-addressed factor set versions
 # Colors for user profile icons on the selection screen
 ACCOUNT_ICON_COLORS = ["#8BC34A", "#4CAF50", "#66BB6A", "#9CCC65", "#AED581", "#C5E1A5", "#DCEDC8", "#E8F5E9"]
 MAX_ACTIVITY_LOG_SIZE = 150 # Maximum user actions in history
+PREVIEW_DEBOUNCE_MS = 150 # Delay before the Add Activity dialog recalculates its live preview
+UI_FRAME_BUDGET_MS = 8 # Max time per UIWorkScheduler slice before yielding back to Tk
+USER_CACHE_MAX_BYTES = 32 * 1024 * 1024 # Cap for recently used profiles kept loaded (measured as on-disk JSON size)
+USER_DATA_KEYS = ("settings", "activities", "activity_log") # Per-user JSON files
+SUMMARY_WINDOW_DAYS = 30 # "Recent" footprint window shown on the profile picker
+ACTIVITY_STREAM_CHUNK_SIZE = 64 * 1024 # Characters read per step when streaming an activities file
+ACTIVITY_PROGRESS_EVERY = 2000 # Records between load progress callbacks
+ACTIVITY_LOAD_POLL_MS = 50 # How often the session checks on a background activities load
+FACTOR_WATCH_POLL_MS = 2000 # How often a session stats emission_factors.csv for edits (hot reload)
+PERF_SAMPLE_CAPACITY = 512 # Most recent samples kept per instrumented operation
+PERF_LAG_PROBE_MS = 250 # Interval of the Tk event-loop lag probe
+UI_STALL_THRESHOLD_MS = 300 # Event-loop lag (beyond the probe interval) reported as a UI stall
+UI_STALL_SAMPLE_MS = 50 # Watchdog thread poll / stack sampling interval
+UI_STALL_MAX_SAMPLES = 100 # Stack samples kept per stall
+UI_STALL_LOG_FILE = os.path.join(DATA_DIR, "ui_stalls.log")
+UI_STALL_LOG_MAX_BYTES = 512 * 1024 # Rotate the stall log at this size...
+UI_STALL_LOG_BACKUPS = 3 # ...keeping this many old files
 # PHP/USD Conversion
-PHP_TO_USD_RATE = 57
+PHP_TO_USD_RATE = 57 # Fallback when exchange_rates.csv has no rates
+EXCHANGE_RATES_CSV = os.path.join(DATA_DIR, "exchange_rates.csv") # Optional daily rates: date,php_per_usd
+GRID_PROFILES_JSON = os.path.join(DATA_DIR, "grid_intensity_profiles.json") # Optional {"luzon": [24 or 8760 kg CO2e/kWh], ...}
 
 # --- Default Emission Factors ---
 # Stored as a constant dictionary
@@ -198,8 +347,8 @@ def create_stylish_button(parent, text, command, style="TButton", **kwargs):
 # EXPENSEWISE
 def create_card_frame(parent):
     """Creates a standard styled frame for holding card content."""
-    # Use the theme_colors dictionary directly
-    return tk.Frame(parent, bg=theme_colors[CARD], relief=tk.FLAT, bd=0)
+    # Registered so theme switches recolour it in place
+    return theme_registry.register(tk.Frame(parent, relief=tk.FLAT, bd=0), bg=CARD)
 
 # GUTIERREZ+KATSUYA
 def format_carbon_emission(amount_kg_co2e, conversion_unit="CO2e"):
@@ -240,7 +389,7 @@ def format_carbon_emission(amount_kg_co2e, conversion_unit="CO2e"):
             return f"{amount_kg_co2e:,.2f} kg CO₂e"
 
     except (ValueError, TypeError) as e:
-        logging.warning(f"Invalid value for carbon formatting: {amount_kg_co2e} ({type(amount_kg_co2e)}), Error: {e}")
+        logging.warning("Invalid value for carbon formatting: %s (%s), Error: %s", amount_kg_co2e, type(amount_kg_co2e), e)
         return "Invalid"
 
 # EXPENSEWISE
@@ -269,94 +418,464 @@ def get_unique_id(prefix):
     random_part = random.randint(10000, 99999)
     return f"{prefix}_{timestamp}_{random_part}"
 
+# IVO-ONLY
+def show_error(title, message, **kwargs):
+    """messagebox.showerror, skipped when headless (callers have already logged the error)."""
+    if not HEADLESS:
+        messagebox.showerror(title, message, **kwargs)
+
 # IVO-ONLY
 def ensure_data_dir():
     """Creates the data directory if it doesn't exist."""
     if not os.path.exists(DATA_DIR):
         try:
             os.makedirs(DATA_DIR)
-            logging.info(f"Created data directory: {DATA_DIR}")
+            logging.info("Created data directory: %s", DATA_DIR)
             # If directory was just created, create default factors file
             if not os.path.exists(EMISSION_FACTORS_CSV):
                 create_default_emission_factors_csv()
         except OSError as e:
-            logging.critical(f"Could not create data directory '{DATA_DIR}': {e}")
-            messagebox.showerror("Directory Error", f"Could not create data directory '{DATA_DIR}':\n{e}\nApplication cannot continue.")
+            logging.critical("Could not create data directory '%s': %s", DATA_DIR, e)
+            show_error("Directory Error", f"Could not create data directory '{DATA_DIR}':\n{e}\nApplication cannot continue.")
             exit(1) # Critical error
 
+# IVO-ONLY
+@functools.lru_cache(maxsize=None)
+def describe_emission_factor(factor_id):
+    """Derives display metadata {"unit", "category", "description"} from a factor ID (memoized)."""
+    unit = "kg CO2e/unit" # Default
+    category = "Unknown"
+    description = factor_id.replace("_", " ").title() # Basic description
+
+    # Simplified category determination
+    cat_prefix = factor_id.split('_')[0]
+    category_map = {
+        "res": "Residential", "trans": "Transportation", "food": "Food",
+        "goods": "Goods", "waste": "Waste", "serv": "Services",
+        "spending": "Goods", "digital": "Digital"
+    }
+    category = category_map.get(cat_prefix, "Unknown")
+
+    # Determine Unit Suffix
+    id_lower = factor_id.lower()
+    if "_kwh_hour" in id_lower: unit = "kWh/hour"
+    elif "_kwh_gb" in id_lower: unit = "kWh/GB"
+    elif "kwh" in id_lower: unit = "kg CO2e/kWh"
+    elif "_therm" in id_lower: unit = "kg CO2e/therm"
+    elif "_gallon" in id_lower: unit = "kg CO2e/gallon"
+    elif "_cord" in id_lower: unit = "kg CO2e/cord"
+    elif "_pkm" in id_lower: unit = "kg CO2e/pkm"
+    elif "_tkm" in id_lower: unit = "kg CO2e/tonne-km"
+    elif "_km" in id_lower: unit = "kg CO2e/km"
+    elif "_kg_kg" in id_lower: unit = "kg CO2e/kg"
+    elif "_tonne" in id_lower: unit = "kg CO2e/tonne"
+    elif "_m2" in id_lower: unit = "kg CO2e/m²"
+    elif "_usd" in id_lower or factor_id.startswith("spending_"): unit = "kg CO2e/PHP (Approx)"; description = description.replace("Usd", "per PHP")
+    elif "_gb" in id_lower: unit = "kg CO2e/GB"
+    elif "_kgN" in id_lower: unit = "kg CO2e/kg Nitrogen"
+    elif "_kg_crop" in id_lower: unit = "kg CO2e/kg Crop"
+    elif "_mult" in id_lower: unit = "Multiplier"
+    elif "cabin_" in id_lower: unit = "Multiplier"
+    elif "_hour" in id_lower: unit = "kWh/hour" # Catch device hours without kWh prefix
+
+    # Specific Overrides
+    if factor_id == "food_miles_avg_km": unit = "km"; description = "Average Food Travel Distance (Info)"
+    if factor_id.startswith("res_renew_") or factor_id.startswith("waste_recycle_"): description += " (Saving)"
+    if "nat_avg" in factor_id: description += " (Nat Avg)"
+    if "region_" in factor_id: description += " (Region Adj)"
+    if factor_id == "spending_other_goods_usd": description = "Spending Other Goods per PHP (Approx)"
+
+    # Clean up description prefix
+    desc_cleaned = description.replace(category + " ", "") if category != "Unknown" else description
+
+    return {"unit": unit, "category": category, "description": desc_cleaned.strip()}
+
 # IVO-ONLY
 def create_default_emission_factors_csv():
     """Creates the emission_factors.csv file with defaults if it doesn't exist."""
     if os.path.exists(EMISSION_FACTORS_CSV):
-         logging.debug(f"Emission factors file already exists: {EMISSION_FACTORS_CSV}")
+         logging.debug("Emission factors file already exists: %s", EMISSION_FACTORS_CSV)
          return
     try:
         with open(EMISSION_FACTORS_CSV, mode='w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = ['factor_id', 'value', 'unit', 'category', 'description', 'source_notes']
+            # effective_from / effective_to (YYYY-MM-DD, to exclusive) are optional: see _build_factor_timeline
+            fieldnames = ['factor_id', 'value', 'unit', 'category', 'description', 'source_notes', 'effective_from', 'effective_to']
             writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
             writer.writeheader()
-            logging.info(f"Writing {len(DEFAULT_EMISSION_FACTORS)} default factors to {EMISSION_FACTORS_CSV}")
+            logging.info("Writing %s default factors to %s", len(DEFAULT_EMISSION_FACTORS), EMISSION_FACTORS_CSV)
 
             for factor_id, value in DEFAULT_EMISSION_FACTORS.items():
-                # Determine Unit, Category, Description from factor_id
-                unit = "kg CO2e/unit" # Default
-                category = "Unknown"
-                description = factor_id.replace("_", " ").title() # Basic description
-                source_notes = ""
-
-                # Simplified category determination
-                cat_prefix = factor_id.split('_')[0]
-                category_map = {
-                    "res": "Residential", "trans": "Transportation", "food": "Food",
-                    "goods": "Goods", "waste": "Waste", "serv": "Services",
-                    "spending": "Goods", "digital": "Digital"
-                }
-                category = category_map.get(cat_prefix, "Unknown")
-
-                # Determine Unit Suffix
-                id_lower = factor_id.lower()
-                if "_kwh_hour" in id_lower: unit = "kWh/hour"
-                elif "_kwh_gb" in id_lower: unit = "kWh/GB"
-                elif "kwh" in id_lower: unit = "kg CO2e/kWh"
-                elif "_therm" in id_lower: unit = "kg CO2e/therm"
-                elif "_gallon" in id_lower: unit = "kg CO2e/gallon"
-                elif "_cord" in id_lower: unit = "kg CO2e/cord"
-                elif "_pkm" in id_lower: unit = "kg CO2e/pkm"
-                elif "_tkm" in id_lower: unit = "kg CO2e/tonne-km"
-                elif "_km" in id_lower: unit = "kg CO2e/km"
-                elif "_kg_kg" in id_lower: unit = "kg CO2e/kg"
-                elif "_tonne" in id_lower: unit = "kg CO2e/tonne"
-                elif "_m2" in id_lower: unit = "kg CO2e/m²"
-                elif "_usd" in id_lower or factor_id.startswith("spending_"): unit = "kg CO2e/PHP (Approx)"; description = description.replace("Usd", "per PHP")
-                elif "_gb" in id_lower: unit = "kg CO2e/GB"
-                elif "_kgN" in id_lower: unit = "kg CO2e/kg Nitrogen"
-                elif "_kg_crop" in id_lower: unit = "kg CO2e/kg Crop"
-                elif "_mult" in id_lower: unit = "Multiplier"
-                elif "cabin_" in id_lower: unit = "Multiplier"
-                elif "_hour" in id_lower: unit = "kWh/hour" # Catch device hours without kWh prefix
-
-                # Specific Overrides
-                if factor_id == "food_miles_avg_km": unit = "km"; description = "Average Food Travel Distance (Info)"
-                if factor_id.startswith("res_renew_") or factor_id.startswith("waste_recycle_"): description += " (Saving)"
-                if "nat_avg" in factor_id: description += " (Nat Avg)"
-                if "region_" in factor_id: description += " (Region Adj)"
-                if factor_id == "spending_other_goods_usd": description = "Spending Other Goods per PHP (Approx)"
-
-                # Clean up description prefix
-                desc_cleaned = description.replace(category + " ", "") if category != "Unknown" else description
-
+                info = describe_emission_factor(factor_id)
                 writer.writerow({
-                    'factor_id': factor_id, 'value': value, 'unit': unit,
-                    'category': category, 'description': desc_cleaned.strip(),
-                    'source_notes': source_notes
+                    'factor_id': factor_id, 'value': value, 'unit': info['unit'],
+                    'category': info['category'], 'description': info['description'],
+                    'source_notes': "", 'effective_from': "", 'effective_to': ""
                 })
-        logging.info(f"Successfully created default emission factors file: {EMISSION_FACTORS_CSV}")
+        logging.info("Successfully created default emission factors file: %s", EMISSION_FACTORS_CSV)
     except IOError as e:
-        logging.error(f"Could not write default emission factors file '{EMISSION_FACTORS_CSV}': {e}")
-        messagebox.showerror("File Error", f"Could not write default emission factors:\n{e}", parent=None) # No parent context here
+        logging.error("Could not write default emission factors file '%s': %s", EMISSION_FACTORS_CSV, e)
+        show_error("File Error", f"Could not write default emission factors:\n{e}", parent=None) # No parent context here
     except Exception as e:
-         logging.exception(f"Unexpected error creating default factors file: {e}")
-         messagebox.showerror("File Error", f"Could not write default emission factors:\n{e}", parent=None)
+         logging.exception("Unexpected error creating default factors file: %s", e)
+         show_error("File Error", f"Could not write default emission factors:\n{e}", parent=None)
+
+# IVO+GPT
+# --- Performance Instrumentation ---
+class PerfMonitor:
+    """Timing and counter instrumentation for the app's hot paths.
+
+    Each series (an operation's durations in ms, or a value such as bytes written per save)
+    is a fixed-size ring buffer of its most recent samples, so memory stays constant and
+    percentiles describe recent behaviour. While disabled, instrumented code only pays an
+    attribute check.
+    """
+
+    def __init__(self, capacity=PERF_SAMPLE_CAPACITY, enabled=True):
+        self.capacity = capacity
+        self.enabled = enabled
+        self._series = {} # {name: {"unit", "samples", "next", "count", "total", "max"}}
+        self._counters = {} # {name: int}
+
+    def record(self, name, value, unit="ms"):
+        """Adds one sample to a series, overwriting its oldest sample once the buffer is full."""
+        series = self._series.get(name)
+        if series is None:
+            series = self._series[name] = {"unit": unit, "samples": array('d', bytes(8 * self.capacity)),
+                                           "next": 0, "count": 0, "total": 0.0, "max": 0.0}
+        index = series["next"]
+        series["samples"][index] = value
+        series["next"] = (index + 1) % self.capacity
+        series["count"] += 1
+        series["total"] += value
+        if value > series["max"]: series["max"] = value
+
+    def increment(self, name, amount=1):
+        if self.enabled:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    @contextmanager
+    def timed(self, name):
+        """Context manager recording the wall time of its block under name."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - start) * 1000.0)
+
+    def instrument(self, name):
+        """Decorator recording each call's wall time under name."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(name, (time.perf_counter() - start) * 1000.0)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        """Returns {"series": {name: stats}, "counters": {...}}; stats cover the buffered samples."""
+        series_stats = {}
+        for name, series in sorted(self._series.items()):
+            buffered = min(series["count"], self.capacity)
+            values = sorted(series["samples"][:buffered])
+            if not values:
+                continue
+            def percentile(q):
+                return values[max(0, -(-int(q * 100) * len(values) // 100) - 1)] # Nearest rank
+            series_stats[name] = {
+                "unit": series["unit"],
+                "count": series["count"],
+                "mean": sum(values) / len(values),
+                "p50": percentile(0.50),
+                "p95": percentile(0.95),
+                "p99": percentile(0.99),
+                "max": series["max"],
+                "last": series["samples"][(series["next"] - 1) % self.capacity],
+            }
+        return {"series": series_stats, "counters": dict(sorted(self._counters.items()))}
+
+    def reset(self):
+        self._series.clear()
+        self._counters.clear()
+
+    def export_json(self, file_path):
+        """Writes the current snapshot to file_path. Returns True on success."""
+        data = self.snapshot()
+        data["exported"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        data["sample_capacity"] = self.capacity
+        return _save_json_data(file_path, data)
+
+# Shared instance; set ECOHUB_PERF=0 to start with recording disabled
+perf_monitor = PerfMonitor(enabled=os.environ.get("ECOHUB_PERF", "1") != "0")
+
+# IVO+GPT
+class UIStallWatchdog:
+    """Detects Tk event-loop stalls and records what the main thread was running.
+
+    The root's lag probe calls beat() from the Tk loop. A daemon thread polls the time since
+    the last beat; once it exceeds the probe interval by UI_STALL_THRESHOLD_MS, it samples the
+    main thread's stack via sys._current_frames() until the loop beats again, then writes one
+    incident (duration, blamed callback, most frequent stacks) to a rotating log file.
+    """
+
+    def __init__(self, expected_interval_ms=PERF_LAG_PROBE_MS, threshold_ms=UI_STALL_THRESHOLD_MS,
+                 log_file=UI_STALL_LOG_FILE):
+        self.expected_interval = expected_interval_ms / 1000.0
+        self.threshold = threshold_ms / 1000.0
+        self.log_file = log_file
+        self.incident_count = 0
+        self._last_beat = None # Set by the Tk loop; None until mainloop is running
+        self._main_thread_id = threading.main_thread().ident
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._logger = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="ui-stall-watchdog", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        if self._logger is not None:
+            for handler in self._logger.handlers[:]:
+                handler.close()
+                self._logger.removeHandler(handler)
+            self._logger = None
+
+    def beat(self):
+        """Called on the Tk thread every expected interval."""
+        self._last_beat = time.monotonic()
+
+    def _run(self):
+        poll = UI_STALL_SAMPLE_MS / 1000.0
+        while not self._stop_event.wait(poll):
+            last_beat = self._last_beat
+            if last_beat is None:
+                continue
+            if time.monotonic() - last_beat > self.expected_interval + self.threshold:
+                self._capture_stall(last_beat, poll)
+
+    def _capture_stall(self, stalled_beat, poll):
+        """Samples the main thread until the Tk loop beats again, then logs the incident."""
+        samples = Counter()
+        sample_count = 0
+        while self._last_beat == stalled_beat and not self._stop_event.is_set():
+            frame = sys._current_frames().get(self._main_thread_id)
+            if frame is None:
+                return # Main thread gone (interpreter shutting down)
+            if sample_count < UI_STALL_MAX_SAMPLES:
+                stack = traceback.extract_stack(frame)
+                samples[tuple((entry.filename, entry.lineno, entry.name, entry.line) for entry in stack)] += 1
+                sample_count += 1
+            del frame
+            self._stop_event.wait(poll)
+        if self._stop_event.is_set():
+            return
+        stall_ms = (time.monotonic() - stalled_beat - self.expected_interval) * 1000.0
+        self.incident_count += 1
+        perf_monitor.increment("ui_stalls")
+        self._write_incident(stall_ms, samples, sample_count)
+
+    @staticmethod
+    def _blamed_callback(stack):
+        """Names the Tk callback in a stack: the frame right below tkinter's CallWrapper, else the innermost app frame."""
+        for index, entry in enumerate(stack[:-1]):
+            if entry.name == "__call__" and os.path.basename(os.path.dirname(entry.filename)) == "tkinter":
+                callback = stack[index + 1]
+                return f"{callback.name} ({os.path.basename(callback.filename)}:{callback.lineno})"
+        for entry in reversed(stack):
+            if entry.filename == __file__:
+                return f"{entry.name} ({os.path.basename(entry.filename)}:{entry.lineno})"
+        return "unknown"
+
+    def _get_logger(self):
+        if self._logger is None:
+            logger = logging.getLogger("ecohub.ui_stalls")
+            logger.propagate = False # Incidents go to their own file, not the console
+            logger.setLevel(logging.WARNING)
+            handler = logging.handlers.RotatingFileHandler(self.log_file, maxBytes=UI_STALL_LOG_MAX_BYTES,
+                                                           backupCount=UI_STALL_LOG_BACKUPS, encoding="utf-8", delay=True)
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            logger.addHandler(handler)
+            self._logger = logger
+        return self._logger
+
+    def _write_incident(self, stall_ms, samples, sample_count):
+        ranked = samples.most_common(3)
+        blamed = self._blamed_callback(traceback.StackSummary.from_list(list(ranked[0][0]))) if ranked else "unknown (no samples)"
+        lines = [f"UI stall #{self.incident_count}: event loop blocked ~{stall_ms:.0f} ms in {blamed}; {sample_count} stack sample(s)"]
+        for stack, hits in ranked:
+            lines.append(f"  -- {hits}/{sample_count} samples:")
+            lines.extend("    " + line.rstrip("\n").replace("\n", "\n    ") for line in traceback.format_list(list(stack)))
+        try:
+            self._get_logger().warning("\n".join(lines))
+        except OSError as e:
+            logging.error("Could not write UI stall log '%s': %s", self.log_file, e)
+        logging.warning("UI stall: event loop blocked ~%.0f ms in %s (details in %s)", stall_ms, blamed, self.log_file)
+
+# IVO-ONLY
+# --- Compact Activity Records ---
+_detail_layouts = {} # Interned detail key tuples, shared by every record with the same inputs
+_NUMERIC_DETAIL_RE = re.compile(r"-?\d+(\.\d+)?", re.ASCII)
+_detail_vocabulary = {} # Non-numeric detail strings (form option labels + ones seen in data), bounded
+DETAIL_VOCABULARY_MAX = 4096
+
+def _compact_detail_value(value):
+    """Returns (stored_value, was_string): canonical numeric strings become int/float, other strings are interned."""
+    if type(value) is not str:
+        return value, False
+    known = _detail_vocabulary.get(value)
+    if known is not None:
+        return known, False
+    match = _NUMERIC_DETAIL_RE.fullmatch(value)
+    if match is None:
+        value = sys.intern(value)
+        if len(_detail_vocabulary) < DETAIL_VOCABULARY_MAX: _detail_vocabulary[value] = value
+        return value, False
+    number = float(value) if match.group(1) else int(value)
+    if (repr(number) if match.group(1) else str(number)) == value: # e.g. "007" or "2.50" stay strings
+        return number, True
+    return value, False
+
+class ActivityRecord(Mapping):
+    """Read-only, compact stand-in for an activity dict.
+
+    Behaves as the mapping {"timestamp", "category", "activity_details", "carbon_footprint"}
+    that submit_activity builds, so existing .get()/[] callers work unchanged. Detail keys
+    share one interned tuple per input layout; detail values sit in a tuple, with canonical
+    numeric strings held as int/float and flagged in a bitmask so to_dict() restores the
+    original strings exactly. factor_set is the ID of the factor set version that produced
+    carbon_footprint; exchange_rates and grid_profiles likewise name the rate table and grid
+    profiles it used, on the categories that read them (see input_stamps). Each is a key only
+    when set, as older files lack them. Unknown top-level keys are kept in _extra.
+    """
+    __slots__ = ("timestamp", "category", "carbon_footprint", "factor_set", "exchange_rates", "grid_profiles",
+                 "_detail_keys", "_detail_values", "_string_mask", "_extra")
+    FIELDS = ("timestamp", "category", "activity_details", "carbon_footprint")
+    OPTIONAL_FIELDS = ("factor_set", "exchange_rates", "grid_profiles")
+
+    def __init__(self, timestamp, category, activity_details, carbon_footprint=None, extra=None, value_pool=None,
+                 factor_set=None, exchange_rates=None, grid_profiles=None):
+        self.timestamp = timestamp
+        self.category = sys.intern(category) if type(category) is str else category
+        self.carbon_footprint = carbon_footprint
+        self.factor_set = sys.intern(factor_set) if type(factor_set) is str else factor_set
+        self.exchange_rates = sys.intern(exchange_rates) if type(exchange_rates) is str else exchange_rates
+        self.grid_profiles = sys.intern(grid_profiles) if type(grid_profiles) is str else grid_profiles
+        keys = tuple(activity_details)
+        layout = _detail_layouts.get(keys)
+        if layout is None:
+            layout = _detail_layouts[keys] = tuple(sys.intern(key) for key in keys)
+        self._detail_keys = layout
+        self._extra = extra or None
+        values = []
+        mask = bit = 0
+        for raw_value in activity_details.values():
+            value, was_string = _compact_detail_value(raw_value)
+            values.append(value)
+            if was_string: mask |= 1 << bit
+            bit += 1
+        values = tuple(values)
+        if value_pool is not None:
+            # Identical detail dicts share one value tuple; types are part of the key since 1 == 1.0 == True
+            values = value_pool.setdefault((layout, mask, values, tuple(map(type, values))), values)
+        self._detail_values = values
+        self._string_mask = mask
+
+    @classmethod
+    def from_dict(cls, activity, value_pool=None):
+        extra = {key: value for key, value in activity.items()
+                 if key not in cls.FIELDS and key not in cls.OPTIONAL_FIELDS}
+        return cls(activity["timestamp"], activity["category"], activity["activity_details"],
+                   activity.get("carbon_footprint"), extra, value_pool, activity.get("factor_set"),
+                   activity.get("exchange_rates"), activity.get("grid_profiles"))
+
+    def with_footprint(self, carbon_footprint, factor_set, exchange_rates=None, grid_profiles=None):
+        """A copy sharing this record's details, with a recomputed footprint and the input versions behind it."""
+        clone = ActivityRecord.__new__(ActivityRecord)
+        for slot in self.__slots__:
+            setattr(clone, slot, getattr(self, slot))
+        clone.carbon_footprint = carbon_footprint
+        clone.factor_set = factor_set
+        clone.exchange_rates = exchange_rates
+        clone.grid_profiles = grid_profiles
+        return clone
+
+    @property
+    def activity_details(self):
+        """A fresh dict of the raw inputs, exactly as submitted."""
+        mask = self._string_mask
+        if not mask:
+            return dict(zip(self._detail_keys, self._detail_values))
+        return {key: (str(value) if mask >> index & 1 else value)
+                for index, (key, value) in enumerate(zip(self._detail_keys, self._detail_values))}
+
+    def to_dict(self):
+        """The JSON-schema dict this record was built from."""
+        data = {"timestamp": self.timestamp, "category": self.category,
+                "activity_details": self.activity_details, "carbon_footprint": self.carbon_footprint}
+        for field in self.OPTIONAL_FIELDS:
+            value = getattr(self, field)
+            if value is not None: data[field] = value
+        if self._extra: data.update(self._extra)
+        return data
+
+    def __getitem__(self, key):
+        if key in self.FIELDS:
+            return getattr(self, key)
+        if key in self.OPTIONAL_FIELDS and getattr(self, key) is not None:
+            return getattr(self, key)
+        if self._extra and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __iter__(self):
+        yield from self.FIELDS
+        yield from (field for field in self.OPTIONAL_FIELDS if getattr(self, field) is not None)
+        if self._extra: yield from self._extra
+
+    def __len__(self):
+        return (len(self.FIELDS) + sum(getattr(self, field) is not None for field in self.OPTIONAL_FIELDS)
+                + (len(self._extra) if self._extra else 0))
+
+    def __repr__(self):
+        return f"ActivityRecord({self.to_dict()!r})"
+
+def make_activity_object_hook():
+    """Returns a json object_hook that turns valid activity dicts into ActivityRecords while parsing.
+
+    Records are built as soon as each object is decoded, so the full list of parsed dicts never
+    exists. One hook shares a value pool, deduplicating identical detail dicts within that load.
+    Invalid activity objects are returned unchanged for load_user_data to report.
+    """
+    value_pool = {}
+    def hook(obj):
+        if "activity_details" in obj and "timestamp" in obj:
+            if obj["timestamp"] and obj.get("category") and isinstance(obj["activity_details"], dict):
+                try:
+                    return ActivityRecord.from_dict(obj, value_pool)
+                except TypeError: # Unhashable detail value (e.g. a list): keep the dict
+                    return obj
+        return obj
+    return hook
+
+def _json_default(obj):
+    """json.dump hook: serializes ActivityRecord as its original dict."""
+    if isinstance(obj, ActivityRecord):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
 
 # --- Data Loading/Saving ---
 
@@ -370,7 +889,7 @@ def load_user_profiles_from_csv():
     required_fields = ['user_id', 'name', 'icon_color']
 
     if not os.path.exists(USER_PROFILES_CSV):
-        logging.warning(f"'{USER_PROFILES_CSV}' not found. Creating demo profile.")
+        logging.warning("'%s' not found. Creating demo profile.", USER_PROFILES_CSV)
     else:
         try:
             with open(USER_PROFILES_CSV, mode='r', newline='', encoding='utf-8') as csvfile:
@@ -386,27 +905,27 @@ def load_user_profiles_from_csv():
                         icon_color = row.get('icon_color', '').strip()
 
                         if not user_id or not name:
-                            logging.warning(f"Skipping invalid row {row_num} in profiles CSV (missing ID or Name): {row}")
+                            logging.warning("Skipping invalid row %s in profiles CSV (missing ID or Name): %s", row_num, row)
                             continue
 
                         # Validate or assign color
                         if not icon_color or not (icon_color.startswith('#') and len(icon_color) == 7):
-                            logging.warning(f"Invalid/missing icon_color '{icon_color}' for user {name} (row {row_num}), assigning random.")
+                            logging.warning("Invalid/missing icon_color '%s' for user %s (row %s), assigning random.", icon_color, name, row_num)
                             icon_color = random.choice(ACCOUNT_ICON_COLORS)
 
                         if user_id in profiles:
-                             logging.warning(f"Duplicate user ID '{user_id}' found in profiles CSV (row {row_num}). Overwriting.")
+                             logging.warning("Duplicate user ID '%s' found in profiles CSV (row %s). Overwriting.", user_id, row_num)
                         profiles[user_id] = {"name": name, "icon_color": icon_color}
 
                     except Exception as row_e:
-                        logging.error(f"Error processing profile row {row_num} ({row}): {row_e}. Skipping.")
+                        logging.error("Error processing profile row %s (%s): %s. Skipping.", row_num, row, row_e)
                         continue # Skip problematic rows
 
         except (ValueError, csv.Error, IOError) as e:
-            logging.exception(f"Failed to load user profiles from '{USER_PROFILES_CSV}': {e}. Attempting demo profile.")
+            logging.exception("Failed to load user profiles from '%s': %s. Attempting demo profile.", USER_PROFILES_CSV, e)
             profiles.clear() # Clear potentially corrupt data before creating demo
         except Exception as e:
-             logging.exception(f"Unexpected error loading user profiles: {e}")
+             logging.exception("Unexpected error loading user profiles: %s", e)
              profiles.clear()
 
     # If no valid profiles loaded after trying the file, create a demo user
@@ -442,10 +961,10 @@ def save_user_profiles_to_csv():
             with open(USER_PROFILES_CSV, mode='w', newline='', encoding='utf-8') as csvfile:
                 writer = csv.DictWriter(csvfile, fieldnames=required_fields)
                 writer.writeheader()
-            logging.info(f"Created empty user profiles file with header: '{USER_PROFILES_CSV}'.")
+            logging.info("Created empty user profiles file with header: '%s'.", USER_PROFILES_CSV)
             return True # Writing header successfully is considered success
         except IOError as e:
-            logging.error(f"Could not write header to empty '{USER_PROFILES_CSV}': {e}")
+            logging.error("Could not write header to empty '%s': %s", USER_PROFILES_CSV, e)
             return False # Indicate failure
 
     # Proceed with saving actual profiles
@@ -455,7 +974,7 @@ def save_user_profiles_to_csv():
             writer.writeheader()
             for user_id, details in profiles_to_save.items():
                 if not isinstance(details, dict):
-                    logging.warning(f"Skipping saving invalid profile data for ID {user_id}: {details}")
+                    logging.warning("Skipping saving invalid profile data for ID %s: %s", user_id, details)
                     continue
                 row_data = {
                     'user_id': user_id,
@@ -463,13 +982,13 @@ def save_user_profiles_to_csv():
                     'icon_color': details.get('icon_color', random.choice(ACCOUNT_ICON_COLORS))
                 }
                 writer.writerow(row_data)
-        logging.info(f"User profiles saved successfully to '{USER_PROFILES_CSV}'.")
+        logging.info("User profiles saved successfully to '%s'.", USER_PROFILES_CSV)
         return True # Explicitly return True on success
     except IOError as e:
-        logging.error(f"IOError saving user profiles to '{USER_PROFILES_CSV}': {e}")
+        logging.error("IOError saving user profiles to '%s': %s", USER_PROFILES_CSV, e)
         return False # Indicate failure
     except Exception as e:
-        logging.exception(f"Unexpected error saving user profiles to '{USER_PROFILES_CSV}'")
+        logging.exception("Unexpected error saving user profiles to '%s'", USER_PROFILES_CSV)
         return False # Indicate failure
 
 # IVO-ONLY
@@ -485,18 +1004,124 @@ def _load_json_data(file_path, default_value_factory=dict):
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
             data = json.load(f)
-            logging.debug(f"Loaded JSON: {file_path}")
+            logging.debug("Loaded JSON: %s", file_path)
             return data
     except FileNotFoundError:
-        logging.info(f"JSON file not found: {file_path}. Using default.")
+        logging.info("JSON file not found: %s. Using default.", file_path)
         return default_value_factory() # Call factory to get new default instance
     except json.JSONDecodeError as e:
-        logging.error(f"Error decoding JSON {file_path}: {e}. Using default.")
+        logging.error("Error decoding JSON %s: %s. Using default.", file_path, e)
         return default_value_factory()
     except Exception as e:
-        logging.exception(f"Unexpected error loading JSON {file_path}: {e}")
+        logging.exception("Unexpected error loading JSON %s: %s", file_path, e)
         return default_value_factory()
 
+_JSON_WHITESPACE_RE = re.compile(r"[ \t\n\r]*")
+
+# IVO-ONLY
+def iter_json_records(file_obj, object_hook=None, chunk_size=ACTIVITY_STREAM_CHUNK_SIZE):
+    """Yields the elements of a top-level JSON array, or the values of a JSON Lines file, one at a time.
+
+    Reads file_obj (text mode) chunk_size characters at a time, so memory holds about one
+    chunk plus the value being decoded instead of the whole file. The format is picked from
+    the first character ('[' means array). Raises json.JSONDecodeError on malformed input,
+    after yielding every value before the fault.
+    """
+    decoder = json.JSONDecoder(object_hook=object_hook)
+    buffer, pos = "", 0
+
+    def read_more():
+        nonlocal buffer, pos
+        chunk = file_obj.read(chunk_size)
+        if not chunk:
+            return False
+        buffer = buffer[pos:] + chunk # Drop what has been consumed
+        pos = 0
+        return True
+
+    def next_char():
+        """Skips whitespace; returns the next character, or '' at end of file."""
+        nonlocal pos
+        while True:
+            pos = _JSON_WHITESPACE_RE.match(buffer, pos).end()
+            if pos < len(buffer):
+                return buffer[pos]
+            if not read_more():
+                return ""
+
+    def decode_value():
+        nonlocal pos
+        if next_char() == "":
+            raise json.JSONDecodeError("Expecting value", buffer, pos)
+        while True: # A value cut by the chunk boundary fails to decode until the rest is read
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+                # A number is only known to be complete once a delimiter follows it ("1.5" of "1.5e3")
+                cut_number = type(value) in (int, float) and (end == len(buffer) or buffer[end] not in " \t\n\r,]")
+                if not cut_number or not read_more():
+                    pos = end
+                    return value
+            except json.JSONDecodeError:
+                if not read_more():
+                    raise
+
+    if next_char() != "[": # JSON Lines (also a single top-level value)
+        yield decode_value()
+        while next_char() != "":
+            yield decode_value()
+        return
+
+    pos += 1
+    if next_char() == "]":
+        pos += 1
+    else:
+        while True:
+            yield decode_value()
+            char = next_char()
+            pos += 1
+            if char == "]":
+                break
+            if char != ",":
+                raise json.JSONDecodeError("Expecting ',' delimiter", buffer, pos - 1)
+    if next_char() != "":
+        raise json.JSONDecodeError("Extra data", buffer, pos)
+
+# IVO-ONLY
+def load_activity_records(user_id, file_path, on_progress=None):
+    """Streams and validates a user's activities file into a list of ActivityRecords.
+
+    on_progress(valid_activities, fraction_read) is called every ACTIVITY_PROGRESS_EVERY
+    records with the (growing) list so far, e.g. to show progress or paint early rows.
+    A malformed file keeps the valid records read before the fault.
+    """
+    valid_activities = []
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            total_bytes = os.fstat(f.fileno()).st_size or 1
+            records = iter_json_records(f, object_hook=make_activity_object_hook())
+            for i, activity in enumerate(records):
+                if isinstance(activity, ActivityRecord): # Validated and compacted by the object_hook
+                    valid_activities.append(activity)
+                elif isinstance(activity, dict) and \
+                   activity.get("timestamp") and \
+                   activity.get("category") and \
+                   isinstance(activity.get("activity_details"), dict): # Ensure details is dict
+                    valid_activities.append(ActivityRecord.from_dict(activity)) # Compact in-memory form
+                else:
+                    logging.warning("Skipping invalid activity record #%s for user %s: %s", i+1, user_id, activity)
+                if on_progress and i % ACTIVITY_PROGRESS_EVERY == ACTIVITY_PROGRESS_EVERY - 1:
+                    on_progress(valid_activities, min(1.0, f.buffer.tell() / total_bytes))
+        logging.debug("Streamed JSON: %s", file_path)
+    except FileNotFoundError:
+        logging.info("JSON file not found: %s. Using default.", file_path)
+    except json.JSONDecodeError as e:
+        logging.error("Error decoding JSON %s: %s. Keeping the %s valid activities read before it.", file_path, e, len(valid_activities))
+    except Exception as e:
+        logging.exception("Unexpected error loading JSON %s: %s", file_path, e)
+    if on_progress:
+        on_progress(valid_activities, 1.0)
+    return valid_activities
+
 # IVO-ONLY
 def _save_json_data(file_path, data):
     """Saves data to a JSON file."""
@@ -504,334 +1129,2968 @@ def _save_json_data(file_path, data):
         # Ensure the directory exists right before saving
         os.makedirs(os.path.dirname(file_path), exist_ok=True)
         with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2)
-        logging.debug(f"Saved JSON: {file_path}")
+            json.dump(data, f, indent=2, default=_json_default)
+        logging.debug("Saved JSON: %s", file_path)
         return True
     except (IOError, TypeError) as e: # Catch specific expected errors
-        logging.error(f"Error saving JSON to {file_path}: {e}")
+        logging.error("Error saving JSON to %s: %s", file_path, e)
         return False
     except Exception as e:
-        logging.exception(f"Unexpected error saving JSON to {file_path}: {e}")
+        logging.exception("Unexpected error saving JSON to %s: %s", file_path, e)
         return False
 
 # IVO-ONLY
 # Emission Factors (CSV)
 def load_emission_factors():
-    """Loads factors from CSV, merging with defaults."""
+    """Loads factors (CSV merged over defaults) through the compiled factor catalog."""
     ensure_data_dir()
-    factors = {}
-    required_fields = ['factor_id', 'value']
-
-    try:
-        # Attempt to load from CSV if it exists
-        if os.path.exists(EMISSION_FACTORS_CSV):
-            with open(EMISSION_FACTORS_CSV, mode='r', newline='', encoding='utf-8') as csvfile:
-                reader = csv.DictReader(csvfile)
-                if not reader.fieldnames or not all(col in reader.fieldnames for col in required_fields):
-                     logging.warning(f"{EMISSION_FACTORS_CSV} header missing required columns. Merging with defaults.")
-                     # Continue to load what we can, defaults will fill gaps
-                else:
-                    for row_num, row in enumerate(reader, 1):
-                        try:
-                            factor_id = row.get('factor_id', '').strip()
-                            value_str = row.get('value', '').strip()
-                            if not factor_id or value_str is None: continue # Skip empty IDs or None values
-
-                            try:
-                                factors[factor_id] = float(value_str)
-                            except (ValueError, TypeError):
-                                logging.warning(f"Invalid value '{value_str}' for factor '{factor_id}' in CSV row {row_num}. Skipping.")
-                        except Exception as row_e:
-                            logging.error(f"Error processing factor row {row_num}: {row_e}. Skipping.")
-            logging.info(f"Loaded {len(factors)} factors from {EMISSION_FACTORS_CSV}.")
-        else:
-             raise FileNotFoundError
-
-    except FileNotFoundError:
-        logging.warning(f"Emission factors file '{EMISSION_FACTORS_CSV}' not found. Creating and using defaults.")
+    if not os.path.exists(EMISSION_FACTORS_CSV):
+        logging.warning("Emission factors file '%s' not found. Creating and using defaults.", EMISSION_FACTORS_CSV)
         create_default_emission_factors_csv()
-        factors = DEFAULT_EMISSION_FACTORS.copy()
-    except (csv.Error, IOError, ValueError) as e:
-        logging.warning(f"Failed to load/process factors from '{EMISSION_FACTORS_CSV}': {e}. Merging with defaults.")
-    except Exception as e:
-        logging.exception(f"Unexpected error loading factors: {e}. Merging with defaults.")
-        # Continue, defaults will merge below
 
-    # Merge loaded factors with defaults (defaults overwrite if missing/invalid in CSV)
-    # Start with a copy of defaults, then update with valid loaded factors
-    final_factors = DEFAULT_EMISSION_FACTORS.copy()
-    final_factors.update(factors)
+    catalog = load_factor_catalog()
+    final_factors = make_factor_set(catalog["factors"], catalog.get("schedules"))
 
     # Final check if factors dictionary is somehow empty
     if not final_factors:
          logging.critical("Emission factors are empty after all loading attempts. Using fallback defaults.")
          final_factors = DEFAULT_EMISSION_FACTORS.copy()
 
-    app_state["emission_factors"] = final_factors
-    logging.info(f"Final emission factor count: {len(app_state['emission_factors'])}")
+    version = register_factor_set(final_factors, catalog.get("version") if catalog["factors"] else None)
+    app_state["emission_factors"] = get_factor_set(version) # The shared read-only set
+    app_state["factor_set_version"] = version
+    logging.info("Final emission factor count: %s (factor set %s)", len(final_factors), version)
 
 # IVO-ONLY
-# Combined User Data Loading/Saving
-def load_user_data(user_id):
-    """Loads all data (settings, activities, logs, factors) for a user."""
-    logging.info(f"Loading data for user: {user_id}")
-    app_state["current_user_id"] = user_id
+def _parse_emission_factors_csv(text):
+    """Parses emission_factors.csv content into ({factor_id: value}, {factor_id: row metadata}, dated).
 
-    # 1. Load/Ensure Emission Factors (shared, load once per session effectively)
-    if not app_state.get("emission_factors"): # Only load if not already loaded
-        load_emission_factors()
+    Rows with an effective_from and/or effective_to date go to dated as
+    {factor_id: [(from, to, value), ...]} in file order instead of setting the undated value.
+    """
+    factors, row_info, dated = {}, {}, {}
+    required_fields = ['factor_id', 'value']
+    try:
+        reader = csv.DictReader(io.StringIO(text, newline=''))
+        if not reader.fieldnames or not all(col in reader.fieldnames for col in required_fields):
+             logging.warning("%s header missing required columns. Merging with defaults.", EMISSION_FACTORS_CSV)
+             return factors, row_info, dated # Defaults fill the gaps
+        for row_num, row in enumerate(reader, 1):
+            try:
+                factor_id = (row.get('factor_id') or '').strip()
+                value_str = (row.get('value') or '').strip()
+                if not factor_id or value_str is None: continue # Skip empty IDs or None values
 
-    # 2. Load User-Specific Data (Settings, Activities, Log)
-    user_data_config = {
-        "settings": {"default_factory": lambda: {"theme": "eco_dark", "conversion": "CO2e"}},
-        "activities": {"default_factory": list},
-        "activity_log": {"default_factory": list},
-    }
+                try:
+                    value = float(value_str)
+                except (ValueError, TypeError):
+                    logging.warning("Invalid value '%s' for factor '%s' in CSV row %s. Skipping.", value_str, factor_id, row_num)
+                    continue
+                effective = [(row.get(key) or '').strip() or None for key in ("effective_from", "effective_to")]
+                if effective != [None, None]:
+                    try:
+                        effective = [datetime.date.fromisoformat(day).isoformat() if day else None for day in effective]
+                    except ValueError:
+                        logging.warning("Invalid effective date %s for factor '%s' in CSV row %s. Skipping.", effective, factor_id, row_num)
+                        continue
+                    dated.setdefault(factor_id, []).append((effective[0], effective[1], value))
+                else:
+                    factors[factor_id] = value
+                info = {key: (row.get(key) or '').strip() for key in ("unit", "category", "description")}
+                row_info[factor_id] = {key: value for key, value in info.items() if value}
+            except Exception as row_e:
+                logging.error("Error processing factor row %s: %s. Skipping.", row_num, row_e)
+        logging.info("Loaded %s factors from %s.", len(factors), EMISSION_FACTORS_CSV)
+    except csv.Error as e:
+        logging.warning("Failed to load/process factors from '%s': %s. Merging with defaults.", EMISSION_FACTORS_CSV, e)
+    return factors, row_info, dated
 
-    for key, config in user_data_config.items():
-        file_path = get_user_data_file_path(user_id, key)
-        loaded_data = _load_json_data(file_path, default_value_factory=config["default_factory"])
-
-        # --- Post-load validation and cleanup ---
-        default_instance = config["default_factory"]() # Get a default instance for comparison/fallback
-        if key == "settings":
-            if not isinstance(loaded_data, dict):
-                logging.warning(f"Settings data for {user_id} invalid, using defaults.")
-                loaded_data = default_instance
-            # Ensure required keys exist using defaults
-            for k, v in default_instance.items():
-                loaded_data.setdefault(k, v)
-
-        elif key == "activities":
-            if not isinstance(loaded_data, list):
-                logging.warning(f"Activities data for {user_id} invalid, using empty list.")
-                loaded_data = default_instance
-            # Validate each activity structure
-            valid_activities = []
-            for i, activity in enumerate(loaded_data):
-                 if isinstance(activity, dict) and \
-                    activity.get("timestamp") and \
-                    activity.get("category") and \
-                    isinstance(activity.get("activity_details"), dict): # Ensure details is dict
-                    activity.setdefault("carbon_footprint", None) # Ensure key exists
-                    valid_activities.append(activity)
-                 else:
-                     logging.warning(f"Skipping invalid activity record #{i+1} for user {user_id}: {activity}")
-            loaded_data = valid_activities
+# IVO-ONLY
+def _build_factor_timeline(base_value, ranges):
+    """Turns dated CSV rows [(from, to, value)] into a FactorTimeline.
 
-        elif key == "activity_log":
-             if not isinstance(loaded_data, list):
-                 logging.warning(f"Activity log data for {user_id} invalid, using empty list.")
-                 loaded_data = default_instance
-             # Optional: Validate log entry format here if needed
+    A row applies from its from date (inclusive; open if empty) to its to date (exclusive;
+    open if empty); a later row wins where rows overlap. Outside every row the undated
+    value applies (None: the factor is undefined there).
+    """
+    boundaries = sorted({day for start, end, _ in ranges for day in (start, end) if day})
+    values = []
+    for point in [""] + boundaries: # "" sorts before any date: the segment before the first boundary
+        value = base_value
+        for start, end, row_value in ranges:
+            if (start is None or start <= point) and (end is None or point < end):
+                value = row_value
+        values.append(value)
+    # Drop boundaries where nothing changes
+    kept_boundaries, kept_values = [], values[:1]
+    for boundary, value in zip(boundaries, values[1:]):
+        if value != kept_values[-1]:
+            kept_boundaries.append(boundary)
+            kept_values.append(value)
+    return FactorTimeline(kept_boundaries, kept_values)
 
-        app_state[key] = loaded_data # Store validated data
+# IVO-ONLY
+def compile_factor_catalog(csv_text, source):
+    """Builds the catalog: CSV values merged over DEFAULT_EMISSION_FACTORS, plus per-factor metadata.
 
-    # 3. Set base categories (always static)
-    app_state["categories"] = BASE_CATEGORIES
+    Returns {"format", "source", "defaults_sha256", "version", "factors": {id: undated value},
+    "schedules": {id: {"boundaries", "values"}}, "info": {id: {"unit", "category", "description"}}};
+    source is the CSV's stamp (or None) and version the factor set ID of factors + schedules.
+    """
+    csv_factors, row_info, dated = _parse_emission_factors_csv(csv_text) if csv_text is not None else ({}, {}, {})
+    factors = DEFAULT_EMISSION_FACTORS.copy()
+    factors.update(csv_factors)
+    schedules = {}
+    for factor_id, ranges in dated.items():
+        timeline = _build_factor_timeline(factors.get(factor_id), ranges)
+        if timeline.boundaries: # Otherwise the rows just restate one value
+            schedules[factor_id] = timeline.to_json()
+        elif timeline.values[0] is not None:
+            factors[factor_id] = timeline.values[0]
+    info = {}
+    for factor_id in factors.keys() | schedules.keys():
+        entry = dict(describe_emission_factor(factor_id))
+        entry.update(row_info.get(factor_id, {})) # The CSV's own columns win
+        info[factor_id] = entry
+    return {
+        "format": FACTOR_CATALOG_FORMAT,
+        "source": source,
+        "defaults_sha256": _default_factors_fingerprint(),
+        "version": factor_set_id(make_factor_set(factors, schedules)),
+        "factors": factors,
+        "schedules": schedules,
+        "info": info,
+    }
+
+@functools.lru_cache(maxsize=1)
+def _default_factors_fingerprint():
+    """Hash of the built-in defaults, so a code update invalidates compiled catalogs."""
+    return hashlib.sha256(json.dumps(DEFAULT_EMISSION_FACTORS, sort_keys=True).encode("utf-8")).hexdigest()
 
-    logging.info(f"Data loading finished for {user_id}. Theme: {app_state['settings']['theme']}, Activities: {len(app_state['activities'])}")
+_factor_catalog_memo = None # Catalog already validated in this process
 
 # IVO-ONLY
-def save_user_data(user_id):
-    """Saves user-specific data (settings, activities, logs) to JSON files."""
-    if not user_id:
-        logging.error("Attempted to save data without a valid user ID.")
-        return False
+def load_factor_catalog():
+    """Returns the compiled factor catalog, recompiling only when emission_factors.csv changed.
 
-    logging.info(f"Saving data for user: {user_id}")
-    ensure_data_dir()
+    Validation, cheapest first: the in-process copy or the catalog file with the same CSV
+    (mtime_ns, size) is used as is; on a stamp mismatch the CSV's SHA-256 decides (a touched
+    or copied but unchanged file keeps the catalog). Otherwise the CSV is parsed and the
+    catalog rewritten atomically, so other processes pick up the same validated file.
+    """
+    global _factor_catalog_memo
+    try:
+        st = os.stat(EMISSION_FACTORS_CSV)
+        stamp = {"mtime_ns": st.st_mtime_ns, "size": st.st_size}
+    except OSError:
+        stamp = None
+
+    def same_stamp(catalog):
+        source = catalog.get("source")
+        if stamp is None or source is None:
+            return stamp is None and source is None
+        return source.get("mtime_ns") == stamp["mtime_ns"] and source.get("size") == stamp["size"]
+
+    memo = _factor_catalog_memo
+    if memo is not None and same_stamp(memo):
+        return memo
+
+    cached = None
+    try:
+        with open(EMISSION_FACTOR_CATALOG, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if not isinstance(cached, dict) or cached.get("format") != FACTOR_CATALOG_FORMAT \
+           or cached.get("defaults_sha256") != _default_factors_fingerprint() \
+           or not isinstance(cached.get("factors"), dict) or not isinstance(cached.get("info"), dict) \
+           or not isinstance(cached.get("version"), str) or not isinstance(cached.get("schedules"), dict):
+            cached = None
+    except FileNotFoundError:
+        pass
+    except (ValueError, OSError) as e:
+        logging.warning("Ignoring unreadable factor catalog %s: %s", EMISSION_FACTOR_CATALOG, e)
+        cached = None
+
+    if cached is not None and same_stamp(cached):
+        logging.debug("Factor catalog valid (stamp): %s", EMISSION_FACTOR_CATALOG)
+        _factor_catalog_memo = cached
+        return cached
+
+    csv_text = None
+    if stamp is not None:
+        try:
+            with open(EMISSION_FACTORS_CSV, 'rb') as f:
+                raw = f.read()
+            csv_text = raw.decode('utf-8-sig')
+            stamp["sha256"] = hashlib.sha256(raw).hexdigest()
+        except (OSError, UnicodeDecodeError) as e:
+            logging.warning("Failed to load/process factors from '%s': %s. Merging with defaults.", EMISSION_FACTORS_CSV, e)
+            stamp = None
+
+    if cached is not None and stamp is not None and (cached.get("source") or {}).get("sha256") == stamp["sha256"]:
+        logging.debug("Factor catalog valid (content hash): %s", EMISSION_FACTOR_CATALOG)
+        cached["source"] = stamp
+        catalog = cached
+    else:
+        logging.info("Compiling emission factor catalog from %s.", EMISSION_FACTORS_CSV)
+        catalog = compile_factor_catalog(csv_text, stamp)
+    _write_factor_catalog(catalog)
+    _factor_catalog_memo = catalog
+    return catalog
 
-    user_data_keys = ["settings", "activities", "activity_log"]
-    save_success_overall = True
+# IVO-ONLY
+def _write_factor_catalog(catalog):
+    """Writes the catalog via a temp file + rename, so readers never see a partial file."""
+    temp_path = f"{EMISSION_FACTOR_CATALOG}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(catalog, f, separators=(",", ":"))
+        os.replace(temp_path, EMISSION_FACTOR_CATALOG)
+    except OSError as e:
+        logging.warning("Could not write factor catalog %s: %s", EMISSION_FACTOR_CATALOG, e)
+        try: os.remove(temp_path)
+        except OSError: pass
 
-    for key in user_data_keys:
-        file_path = get_user_data_file_path(user_id, key)
-        data_to_save = app_state.get(key)
+# IVO-ONLY
+# --- Factor Set Versions ---
+_factor_sets = {} # version ID -> read-only factors; one shared object per distinct set
 
-        if data_to_save is None: # Should not happen if load_user_data ran correctly
-            logging.warning(f"No data for '{key}' found for user {user_id}. Skipping save.")
-            continue
+class FactorTimeline:
+    """Effective-dated values of one factor.
 
-        if not _save_json_data(file_path, data_to_save):
-            save_success_overall = False
-            logging.error(f"FAILED to save '{key}' to '{file_path}'.")
-            # Show error message ONLY if overall save fails later
+    values[i] applies from boundaries[i - 1] (inclusive) up to boundaries[i] (exclusive);
+    values[0] before the first boundary. Boundaries are sorted ISO dates; None values mean
+    the factor is undefined in that period.
+    """
+    __slots__ = ("boundaries", "values", "days")
 
-    if not save_success_overall:
-        logging.error(f"One or more data files failed to save for user: {user_id}.")
-        messagebox.showerror("Save Error", f"Failed to save some user data for {user_id}. Please check logs.")
+    def __init__(self, boundaries, values):
+        self.boundaries = list(boundaries)
+        self.values = list(values)
+        self.days = np.array(self.boundaries, dtype="datetime64[D]")
 
-    return save_success_overall
+    def period_at(self, timestamp):
+        return bisect.bisect_right(self.boundaries, str(timestamp)[:10])
 
-# --- Accounts Page Class (Profile Selection) ---
-class AccountsPage(tk.Tk):
-    """Initial window for selecting or creating a user profile."""
+    def to_json(self):
+        return {"boundaries": self.boundaries, "values": self.values}
 
-    # EXPENSEWISE
-    def __init__(self):
-        super().__init__()
-        self.selected_user_id = None # Store the ID of the selected user
-        # Apply theme directly (Accounts page always uses dark theme)
-        self.configure(bg=THEME_ECO_DARK[BG])
-        self.title("ECOHUB - Select Profile")
-        self.geometry("800x450") # Slightly taller for padding
+    def __eq__(self, other):
+        return isinstance(other, FactorTimeline) and self.boundaries == other.boundaries and self.values == other.values
 
-        # Ensure data dir exists and load profiles
-        ensure_data_dir()
-        load_user_profiles_from_csv()
+    __hash__ = None
 
-        # --- Styling ---
-        self.style = ttk.Style(self)
-        self.style.theme_use('clam')
-        # Removed Account.TButton styles as profile selection uses Frame+Label now
-        self.style.configure('AddAccount.TButton', background=THEME_ECO_DARK[BG], foreground=THEME_ECO_DARK[DISABLED], font=FONT_XXLARGE, borderwidth=1, relief=tk.SOLID, bordercolor=THEME_ECO_DARK[DISABLED])
-        self.style.map('AddAccount.TButton', foreground=[('active', THEME_ECO_DARK[FG])], bordercolor=[('active', THEME_ECO_DARK[FG])])
-        self.style.configure('Exit.TButton', font=FONT_NORMAL, foreground=THEME_ECO_DARK[FG], background="#555555", borderwidth=1, relief=tk.SOLID)
-        self.style.map('Exit.TButton', background=[('active', THEME_ECO_DARK[RED])], foreground=[('active', THEME_ECO_DARK[BTN_FG])])
+class DatedFactorSet(Mapping):
+    """A factor set in which some factors change over time.
 
-        # --- Layout ---
-        self.grid_rowconfigure(1, weight=1)
-        self.grid_columnconfigure(0, weight=1)
+    As a mapping it holds the undated values (what a plain set holds); at() and
+    resolve_many() give the values in force at activity timestamps. Each distinct
+    period is resolved once and shared.
+    """
+    __slots__ = ("base", "timelines", "_periods")
+
+    def __init__(self, base, timelines):
+        self.base = MappingProxyType(dict(base))
+        self.timelines = dict(sorted(timelines.items()))
+        self._periods = {} # period index tuple -> resolved read-only factors
+
+    def __getitem__(self, factor_id):
+        return self.base[factor_id]
+
+    def __iter__(self):
+        return iter(self.base)
+
+    def __len__(self):
+        return len(self.base)
+
+    def to_json(self):
+        return {"factors": dict(self.base), "schedules": {factor_id: timeline.to_json() for factor_id, timeline in self.timelines.items()}}
+
+    def at(self, timestamp):
+        """Factors in force at timestamp ("YYYY-MM-DD..." string)."""
+        return self._resolved(tuple(timeline.period_at(timestamp) for timeline in self.timelines.values()))
+
+    def resolve_many(self, days):
+        """Vectorized at() over a datetime64[D] array: returns (resolved, period_of), day i using resolved[period_of[i]].
+
+        One searchsorted per timeline over all days; NaT (unparseable timestamps) gets the latest values.
+        """
+        matrix = np.column_stack([np.searchsorted(timeline.days, days, side="right") for timeline in self.timelines.values()])
+        periods, period_of = np.unique(matrix, axis=0, return_inverse=True)
+        return [self._resolved(tuple(row)) for row in periods.tolist()], period_of.reshape(-1).tolist()
+
+    def _resolved(self, period):
+        factors = self._periods.get(period)
+        if factors is None:
+            values = dict(self.base)
+            for (factor_id, timeline), index in zip(self.timelines.items(), period):
+                value = timeline.values[index]
+                if value is None: values.pop(factor_id, None)
+                else: values[factor_id] = value
+            factors = self._periods[period] = MappingProxyType(values)
+        return factors
+
+def _timestamps_to_days(timestamps):
+    """Activity timestamps as a datetime64[D] array (NaT, which sorts last, where unparseable)."""
+    dates = [str(timestamp)[:10] for timestamp in timestamps]
+    try:
+        return np.array(dates, dtype="datetime64[D]")
+    except ValueError: # Convert one by one only if some are bad
+        days = np.empty(len(dates), dtype="datetime64[D]")
+        for i, date in enumerate(dates):
+            try: days[i] = np.datetime64(date, "D")
+            except ValueError: days[i] = np.datetime64("NaT")
+        return days
+
+def make_factor_set(factors, schedules=None):
+    """A plain {factor_id: value} dict, or a DatedFactorSet when some factors have schedules."""
+    if not schedules:
+        return dict(factors)
+    return DatedFactorSet(factors, {factor_id: FactorTimeline(schedule["boundaries"], schedule["values"])
+                                    for factor_id, schedule in schedules.items()})
+
+def factors_at(factors, timestamp):
+    """The {factor_id: value} mapping in force at timestamp (plain sets are the same at any time)."""
+    return factors.at(timestamp) if isinstance(factors, DatedFactorSet) else factors
+
+def _factor_periods(factors, days):
+    """(resolved factor mappings, period index per day) for a batch of activity days."""
+    if isinstance(factors, DatedFactorSet):
+        return factors.resolve_many(days)
+    return [factors], itertools.repeat(0)
+
+def _factor_set_content(factors):
+    return factors.to_json() if isinstance(factors, DatedFactorSet) else dict(factors)
+
+def factor_set_id(factors):
+    """Content-hash version ID of a factor set (values and schedules): equal sets always get the same ID."""
+    return content_id("fs", _factor_set_content(factors))
+
+def content_id(prefix, content):
+    """Content-hash ID "<prefix>-<hash>" of JSON-able content: equal content always gets the same ID."""
+    canonical = json.dumps(content, sort_keys=True, separators=(",", ":"))
+    return f"{prefix}-" + hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
 
-        # Title
-        title_label = tk.Label(self, text="Who's Tracking?", font=FONT_XLARGE, bg=THEME_ECO_DARK[BG], fg=THEME_ECO_DARK[FG])
-        title_label.grid(row=0, column=0, pady=(40, 20)) # Adjusted padding
+# IVO-ONLY
+def register_factor_set(factors, version=None):
+    """Stores a factor set as an immutable version and returns its ID.
 
-        # Accounts Frame (Scrollable potentially, but usually few profiles)
-        self.accounts_frame = tk.Frame(self, bg=THEME_ECO_DARK[BG])
-        self.accounts_frame.grid(row=1, column=0, sticky="n", pady=10) # Reduced bottom padding
-        self.accounts_frame.grid_columnconfigure(0, weight=1) # Center the inner frame
+    A set that is already known (same content, e.g. an unchanged CSV on every start) is
+    neither copied nor rewritten; new versions go to FACTOR_SETS_DIR/<id>.json once.
+    """
+    version = version or factor_set_id(factors)
+    if version in _factor_sets:
+        return version
+    _factor_sets[version] = factors if isinstance(factors, DatedFactorSet) else MappingProxyType(dict(factors))
+    path = os.path.join(FACTOR_SETS_DIR, f"{version}.json")
+    if not os.path.exists(path):
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(FACTOR_SETS_DIR, exist_ok=True)
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(_factor_set_content(factors), f, sort_keys=True, separators=(",", ":"))
+            os.replace(temp_path, path)
+            logging.info("Stored new factor set version %s.", version)
+        except OSError as e:
+            logging.warning("Could not store factor set %s: %s", version, e)
+            try: os.remove(temp_path)
+            except OSError: pass
+    return version
 
-        self.display_user_profiles()
+# IVO-ONLY
+def get_factor_set(version):
+    """Read-only factors of a stored version, or None if the version is unknown or its file is damaged."""
+    factors = _factor_sets.get(version)
+    if factors is not None or not isinstance(version, str):
+        return factors
+    try:
+        with open(os.path.join(FACTOR_SETS_DIR, f"{os.path.basename(version)}.json"), 'r', encoding='utf-8') as f:
+            loaded = json.load(f)
+    except (OSError, ValueError):
+        return None
+    try:
+        if isinstance(loaded.get("factors"), dict) and isinstance(loaded.get("schedules"), dict): # Dated set
+            loaded = make_factor_set(loaded["factors"], loaded["schedules"])
+        valid = factor_set_id(loaded) == version # Immutable: content must match its ID
+    except (AttributeError, KeyError, TypeError, ValueError):
+        valid = False
+    if not valid:
+        logging.warning("Factor set file for %s does not match its version ID. Ignoring.", version)
+        return None
+    factors = _factor_sets[version] = loaded if isinstance(loaded, DatedFactorSet) else MappingProxyType(loaded)
+    return factors
 
-        # Exit Button
-        exit_button = ttk.Button(self, text="Exit Application", command=self.exit_app, style="Exit.TButton", width=15)
-        exit_button.place(relx=0.98, rely=0.98, anchor='se', x=-15, y=-15) # Adjusted position
+# IVO-ONLY
+def _activity_footprint(activity, factors, php_per_usd=PHP_TO_USD_RATE, grid=None):
+    """Monthly kg CO2e of an activity's stored inputs under factors, rounded as submit_activity does."""
+    total, _ = calculate_footprint_components(activity.get("category"), clean_activity_details(activity.get("activity_details") or {}),
+                                              factors, php_per_usd, grid)
+    return round(max(0, total), 3)
+
+def _activity_input_key(activity):
+    """Hashable key of a record's category + inputs (equal keys, equal footprints), or None for plain dicts."""
+    if isinstance(activity, ActivityRecord):
+        return (activity.category, activity._detail_keys, activity._detail_values, activity._string_mask)
+    return None
 
-        self.center_window()
-        self.protocol("WM_DELETE_WINDOW", self.exit_app) # Handle window close button
+# IVO-ONLY
+INPUT_STAMP_FIELDS = ("exchange_rates", "grid_profiles")
 
-    # EXPENSEWISE
-    def center_window(self):
-        """Centers the window on the screen."""
-        self.update_idletasks()
-        width = self.winfo_width()
-        height = self.winfo_height()
-        x_pos = (self.winfo_screenwidth() // 2) - (width // 2)
-        y_pos = (self.winfo_screenheight() // 2) - (height // 2)
-        self.geometry(f'{width}x{height}+{x_pos}+{y_pos}')
-        self.attributes('-alpha', 1.0) # Ensure fully opaque
+def input_stamps(exchange_rates=None, grid_profiles=None):
+    """category -> the stamp fields naming the rate table and grid profiles its footprints read.
 
-    # EXPENSEWISE
-    def display_user_profiles(self):
-        """Creates and displays the profile icons and add button."""
-        # Clear previous widgets
-        for widget in self.accounts_frame.winfo_children():
-            widget.destroy()
+    Shopping reads the exchange rates and GRID_PROFILE_CATEGORIES the grid profiles (each
+    defaults to the session's current one); other categories get no fields.
+    """
+    rates = {"exchange_rates": (exchange_rates or current_exchange_rates()).version}
+    grid = {"grid_profiles": (grid_profiles or current_grid_profiles()).version}
+    stamps = {category: {} for category in BASE_CATEGORIES}
+    stamps["shopping"] = rates
+    stamps.update(dict.fromkeys(GRID_PROFILE_CATEGORIES, grid))
+    return stamps
+
+def _inputs_stale(activity, stamps):
+    """Whether activity's rate or grid stamp differs from its category's fields in stamps."""
+    return any(activity.get(field) != version for field, version in stamps.get(activity.get("category"), {}).items())
+
+def _restamped(activity, carbon_footprint, factor_set, stamps=None):
+    """activity with carbon_footprint and its stamps: factor_set plus its category's fields from
+    stamps (None: the input stamps it already has)."""
+    if stamps is None:
+        fields = {field: activity.get(field) for field in INPUT_STAMP_FIELDS if activity.get(field) is not None}
+    else:
+        fields = stamps.get(activity.get("category"), {})
+    if isinstance(activity, ActivityRecord):
+        return activity.with_footprint(carbon_footprint, factor_set, **fields)
+    return dict(activity, carbon_footprint=carbon_footprint, factor_set=factor_set, **fields) # Plain dict that could not be compacted
 
-        # Use an inner frame to easily center the grid of profiles
-        inner_frame = tk.Frame(self.accounts_frame, bg=THEME_ECO_DARK[BG])
-        inner_frame.pack(pady=10) # Pack centers it horizontally due to accounts_frame config
+def _iter_batch(activities, selected, factors, exchange_rates, grid_profiles=None, timestamps=None):
+    """Yields (index, activity, memo key or None, factors in force, php_per_usd, grid) for activities[selected].
 
-        max_cols = 4 # Max profiles per row
-        profiles = app_state.get("user_profiles", {})
-        # Sort profiles alphabetically by name for consistent order
-        sorted_profiles = sorted(profiles.items(), key=lambda item: item[1].get('name', '').lower())
+    Effective-dated factors, exchange rates and grid profile months are resolved for the
+    whole batch in one vectorized pass over the activity dates (timestamps, one per selected
+    index, overrides the activities' own); equal memo keys mean equal footprints.
+    """
+    grid_profiles = grid_profiles or current_grid_profiles()
+    if timestamps is None:
+        timestamps = [activities[index].get("timestamp") for index in selected]
+    days = _timestamps_to_days(timestamps)
+    resolved, period_of = _factor_periods(factors, days)
+    rates = exchange_rates.rates_for(days).tolist()
+    months = grid_profiles.months_of(days).tolist() if grid_profiles.by_month else itertools.repeat(None)
+    for index, period, rate, month in zip(selected, period_of, rates, months):
+        activity = activities[index]
+        category = activity.get("category")
+        if category != "shopping":
+            rate = PHP_TO_USD_RATE # Only spending is converted; keeps other memo keys shared across days
+        grid = grid_profiles.for_month(month) if month is not None and category in GRID_PROFILE_CATEGORIES else None
+        key = _activity_input_key(activity)
+        yield index, activity, ((key, period, rate, grid and month) if key is not None else None), resolved[period], rate, grid
 
-        col_count = 0
-        row_count = 0
-        for user_id, details in sorted_profiles:
-            profile_col = col_count % max_cols
-            profile_row = row_count + (col_count // max_cols)
+# IVO-ONLY
+def recompute_activities(activities, from_version, to_version):
+    """Recomputes, in place, every activity whose footprint came from factor set from_version.
+
+    from_version None selects unstamped (pre-versioning) activities; from_version equal to
+    to_version selects only those whose exchange rate or grid profile stamp is out of date.
+    Updated records get the to_version footprint and stamps, with the current rates and grid
+    profiles; identical inputs are computed once. Returns the number of activities updated.
+    Raises KeyError for an unknown to_version.
+    """
+    factors = get_factor_set(to_version)
+    if factors is None:
+        raise KeyError(f"Unknown factor set version: {to_version}")
+    exchange_rates, grid_profiles = current_exchange_rates(), current_grid_profiles()
+    stamps = input_stamps(exchange_rates, grid_profiles)
+    selected = _select_activities(activities, from_version, stamps if from_version == to_version else None)
+    results = {} # memo key -> footprint
+    for index, activity, key, period_factors, rate, grid in _iter_batch(activities, selected, factors, exchange_rates, grid_profiles):
+        footprint = results.get(key) if key is not None else None
+        if footprint is None:
+            footprint = _activity_footprint(activity, period_factors, rate, grid)
+            if key is not None: results[key] = footprint
+        activities[index] = _restamped(activity, footprint, to_version, stamps)
+    return len(selected)
+
+def _select_activities(activities, factor_set, stamps=None):
+    """Indices of the activities stamped with factor_set (None: unstamped); given stamps, only
+    those whose input stamps are stale against them."""
+    return [index for index, activity in enumerate(activities)
+            if isinstance(activity, Mapping) and activity.get("factor_set") == factor_set
+            and (stamps is None or _inputs_stale(activity, stamps))]
 
-            container = tk.Frame(inner_frame, bg=THEME_ECO_DARK[BG])
-            container.grid(row=profile_row, column=profile_col, padx=25, pady=15, sticky="n") # Increased padding
+# IVO-ONLY
+def diff_factor_sets(old_factors, new_factors):
+    """Factor IDs added, removed or changed (in value or effective-date schedule) between two factor sets."""
+    changed = {factor_id for factor_id in old_factors.keys() | new_factors.keys()
+               if old_factors.get(factor_id) != new_factors.get(factor_id)}
+    old_timelines, new_timelines = getattr(old_factors, "timelines", {}), getattr(new_factors, "timelines", {})
+    changed.update(factor_id for factor_id in old_timelines.keys() | new_timelines.keys()
+                   if old_timelines.get(factor_id) != new_timelines.get(factor_id))
+    return changed
 
-            name = details.get('name', 'Unknown')
-            initial = name[0].upper() if name else "?"
-            icon_color = details.get('icon_color', random.choice(ACCOUNT_ICON_COLORS))
+class _FactorUsageRecorder(Mapping):
+    """Read-through view of a factor set that notes every factor ID a calculation looks up."""
+    __slots__ = ("factors", "used")
 
-            # Clickable Frame for Icon
-            icon_frame = tk.Frame(container, bg=icon_color, width=100, height=100, cursor="hand2")
-            icon_frame.pack(pady=(0, 8)) # Space between icon and name
-            icon_frame.pack_propagate(False) # Prevent label from shrinking frame
+    def __init__(self, factors):
+        self.factors = factors
+        self.used = set()
 
-            initial_label = tk.Label(icon_frame, text=initial, font=FONT_XXLARGE, bg=icon_color, fg=THEME_ECO_DARK[BTN_FG])
-            initial_label.place(relx=0.5, rely=0.5, anchor="center")
+    def __getitem__(self, factor_id):
+        self.used.add(factor_id) # Also misses: a factor added later may matter
+        return self.factors[factor_id]
 
-            name_label = tk.Label(container, text=name, font=FONT_ACCOUNT_NAME, bg=THEME_ECO_DARK[BG], fg=THEME_ECO_DARK[FG], wraplength=110) # Wrap long names
-            name_label.pack()
+    def __iter__(self):
+        return iter(self.factors)
 
-            # Bind click event to the container, icon frame, and labels
-            # Use lambda to capture the correct user_id for each profile
-            for widget in [container, icon_frame, initial_label, name_label]:
-                widget.bind("<Button-1>", lambda e, u_id=user_id: self.select_user(u_id))
+    def __len__(self):
+        return len(self.factors)
 
-            col_count += 1
+# IVO-ONLY
+def plan_factor_change(activities, from_version, to_version, changed_ids, factors, exchange_rates=None, grid_profiles=None):
+    """Works out how a factor edit affects activities stamped from_version (no UI, no mutation).
+
+    Only activities whose calculation reads one of changed_ids get a new footprint (and the
+    current rate and grid stamps); the rest keep theirs and are just restamped to to_version.
+    Returns (replacements, changed) where replacements is [(index, old_record, new_record)]
+    and changed the indices whose footprint moved. Safe to run on a worker thread over a
+    snapshot of the list.
+    """
+    replacements, changed = [], []
+    exchange_rates, grid_profiles = exchange_rates or current_exchange_rates(), grid_profiles or current_grid_profiles()
+    stamps = input_stamps(exchange_rates, grid_profiles)
+    selected = _select_activities(activities, from_version)
+    results = {} # memo key -> new footprint, or None if unaffected
+    for index, activity, key, period_factors, rate, grid in _iter_batch(activities, selected, factors, exchange_rates, grid_profiles):
+        if key is not None and key in results:
+            footprint = results[key]
+        else:
+            recorder = _FactorUsageRecorder(period_factors)
+            footprint = _activity_footprint(activity, recorder, rate, grid)
+            if recorder.used.isdisjoint(changed_ids):
+                footprint = None
+            if key is not None: results[key] = footprint
+        if footprint is None or footprint == activity.get("carbon_footprint"):
+            replacements.append((index, activity, _restamped(activity, activity.get("carbon_footprint"), to_version)))
+        else:
+            replacements.append((index, activity, _restamped(activity, footprint, to_version, stamps)))
+            changed.append(index)
+    return replacements, changed
+
+def _plan_recompute(activities, by_version, exchange_rates, grid_profiles, what):
+    """(replacements, changed) for recomputing {factor set version: [indices]} each under its own
+    factor set with exchange_rates and grid_profiles. Records whose footprint and stamps would
+    not move are left out."""
+    replacements, changed = [], []
+    stamps = input_stamps(exchange_rates, grid_profiles)
+    for version, selected in by_version.items():
+        factors = get_factor_set(version)
+        if factors is None:
+            logging.warning("Factor set %s is unknown; %s %s activities keep their footprints.", version, len(selected), what)
+            continue
+        results = {} # memo key -> footprint
+        for index, activity, key, period_factors, rate, grid in _iter_batch(activities, selected, factors, exchange_rates, grid_profiles):
+            footprint = results.get(key) if key is not None else None
+            if footprint is None:
+                footprint = _activity_footprint(activity, period_factors, rate, grid)
+                if key is not None: results[key] = footprint
+            if footprint != activity.get("carbon_footprint"):
+                changed.append(index)
+            elif not _inputs_stale(activity, stamps):
+                continue
+            replacements.append((index, activity, _restamped(activity, footprint, version, stamps)))
+    return replacements, changed
 
-        # Add "+" button for creating new profiles
-        add_col = col_count % max_cols
-        add_row = row_count + (col_count // max_cols)
-        add_container = tk.Frame(inner_frame, bg=THEME_ECO_DARK[BG])
-        add_container.grid(row=add_row, column=add_col, padx=25, pady=15, sticky="n")
+# IVO-ONLY
+# --- Exchange Rates ---
+class ExchangeRateTable:
+    """Daily PHP-per-USD rates, held as sorted NumPy arrays.
+
+    A day uses the latest rate on or before it (the earliest rate before the table starts);
+    an empty table uses PHP_TO_USD_RATE for every day. Tables are never modified: a reload
+    builds a new one. version is a content ID ("xr-..."), stamped on the shopping activities
+    it prices.
+    """
+    __slots__ = ("dates", "days", "rates", "source", "version")
+
+    def __init__(self, dates=(), rates=(), source=None):
+        self.dates = list(dates) # Sorted ISO days, for bisect
+        self.days = np.array(self.dates, dtype="datetime64[D]")
+        self.rates = np.array(rates, dtype=np.float64)
+        self.source = source # (mtime_ns, size) of the file it was read from
+        self.version = content_id("xr", [self.dates, self.rates.tolist()] if self.dates else PHP_TO_USD_RATE)
+
+    def rate_at(self, timestamp):
+        """PHP per USD on the day of timestamp ("YYYY-MM-DD...")."""
+        if not self.dates:
+            return PHP_TO_USD_RATE
+        index = bisect.bisect_right(self.dates, str(timestamp)[:10]) - 1
+        return float(self.rates[max(index, 0)])
+
+    def rates_for(self, days):
+        """Vectorized rate_at over a datetime64[D] array (NaT gets the latest rate)."""
+        if not self.dates:
+            return np.full(len(days), float(PHP_TO_USD_RATE))
+        return self.rates[np.maximum(np.searchsorted(self.days, days, side="right") - 1, 0)]
+
+    def changed_span(self, other):
+        """Days [start, end) on which other gives a different rate, or None if none does.
+
+        start / end are ISO days, None for an open side. Rates only change at table dates,
+        so comparing both tables there (and just before the first) is exact.
+        """
+        points = sorted(set(self.dates) | set(other.dates))
+        if not points:
+            return None # Both use the fixed fallback rate
+        days = np.array(points, dtype="datetime64[D]")
+        probes = np.concatenate([days[:1] - 1, days]) # probes[k] stands for [points[k - 1], points[k])
+        differs = np.flatnonzero(self.rates_for(probes) != other.rates_for(probes))
+        if not len(differs):
+            return None
+        first, last = int(differs[0]), int(differs[-1])
+        return (points[first - 1] if first else None), (points[last] if last < len(points) else None)
+
+def current_exchange_rates():
+    """The session's exchange rate table (an empty one, i.e. the fixed rate, before loading)."""
+    table = app_state.get("exchange_rates")
+    return table if table is not None else ExchangeRateTable()
 
-        # Use a Frame with border for the add icon visual
-        add_icon_frame = tk.Frame(add_container, bg=THEME_ECO_DARK[BG], width=100, height=100, cursor="hand2",
-                                  relief=tk.SOLID, borderwidth=2,
-                                  highlightbackground=THEME_ECO_DARK[DISABLED], # Use highlight for border
-                                  highlightthickness=2, highlightcolor=THEME_ECO_DARK[DISABLED]) # Fallback color
-        add_icon_frame.pack(pady=(0, 8))
-        add_icon_frame.pack_propagate(False)
+# IVO-ONLY
+def _file_stamp(path):
+    """(mtime_ns, size) of path, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
 
-        add_label = tk.Label(add_icon_frame, text="+", font=FONT_XXLARGE, bg=THEME_ECO_DARK[BG], fg=THEME_ECO_DARK[DISABLED])
-        add_label.place(relx=0.5, rely=0.5, anchor="center")
-        add_label.bind("<Enter>", lambda e: add_label.config(fg=THEME_ECO_DARK[FG])) # Hover effect
-        add_label.bind("<Leave>", lambda e: add_label.config(fg=THEME_ECO_DARK[DISABLED]))
+# IVO-ONLY
+def load_exchange_rates():
+    """Reads exchange_rates.csv (date,php_per_usd) into app_state["exchange_rates"] and returns the table."""
+    source = _file_stamp(EXCHANGE_RATES_CSV)
+    by_date = {}
+    if source is None:
+        logging.debug("No %s; using the fixed rate of %s PHP per USD.", EXCHANGE_RATES_CSV, PHP_TO_USD_RATE)
+    else:
+        try:
+            with open(EXCHANGE_RATES_CSV, mode='r', newline='', encoding='utf-8-sig') as csvfile:
+                for row_num, row in enumerate(csv.DictReader(csvfile), 1):
+                    try:
+                        day = datetime.date.fromisoformat((row.get('date') or '').strip()).isoformat()
+                        rate = float((row.get('php_per_usd') or '').strip())
+                        if rate <= 0: raise ValueError("rate must be positive")
+                    except (ValueError, TypeError) as e:
+                        logging.warning("Skipping exchange rate row %s (%s): %s", row_num, row, e)
+                        continue
+                    by_date[day] = rate # A later row for the same day wins
+            logging.info("Loaded %s exchange rates from %s.", len(by_date), EXCHANGE_RATES_CSV)
+        except (OSError, csv.Error) as e:
+            logging.warning("Failed to load exchange rates from '%s': %s. Using the fixed rate.", EXCHANGE_RATES_CSV, e)
+    dates = sorted(by_date)
+    table = app_state["exchange_rates"] = ExchangeRateTable(dates, [by_date[day] for day in dates], source)
+    return table
+
+def exchange_rates_changed(table):
+    """Whether exchange_rates.csv differs (one os.stat) from the file table was read from."""
+    return _file_stamp(EXCHANGE_RATES_CSV) != table.source
 
-        add_name_label = tk.Label(add_container, text="Add Profile", font=FONT_ACCOUNT_NAME, bg=THEME_ECO_DARK[BG], fg=THEME_ECO_DARK[DISABLED])
-        add_name_label.pack()
+# IVO-ONLY
+def plan_rate_change(activities, old_rates, new_rates):
+    """Works out how an exchange rate update affects footprints (no UI, no mutation).
 
-        # Bind click event to add profile elements
-        for widget in [add_container, add_icon_frame, add_label, add_name_label]:
-            widget.bind("<Button-1>", self.add_user_profile_dialog)
+    Only shopping activities dated inside the span where the rates differ are recomputed,
+    each under its own stamped factor set (unstamped ones are left alone); those outside it
+    that were stamped with old_rates just move to the new_rates stamp. Returns
+    (replacements, changed) like plan_factor_change.
+    """
+    if old_rates.version == new_rates.version:
+        return [], []
+    candidates = [index for index, activity in enumerate(activities)
+                  if isinstance(activity, Mapping) and activity.get("category") == "shopping" and activity.get("factor_set")]
+    days = _timestamps_to_days([activities[index].get("timestamp") for index in candidates])
+    span = old_rates.changed_span(new_rates)
+    in_span = np.zeros(len(days), dtype=bool)
+    if span is not None:
+        start, end = span
+        in_span[:] = True
+        if start: in_span &= days >= np.datetime64(start)
+        if end: in_span &= days < np.datetime64(end)
+        else: in_span |= np.isnat(days) # Unparseable dates use the latest rate
+    by_version, restamped = {}, []
+    stamps = {"shopping": {"exchange_rates": new_rates.version}}
+    for index, inside in zip(candidates, in_span.tolist()):
+        activity = activities[index]
+        if inside:
+            by_version.setdefault(activity.get("factor_set"), []).append(index)
+        elif activity.get("exchange_rates") == old_rates.version: # Same rate on its day, so the footprint stands
+            restamped.append((index, activity, _restamped(activity, activity.get("carbon_footprint"), activity.get("factor_set"), stamps)))
+
+    replacements, changed = _plan_recompute(activities, by_version, new_rates, None, "shopping")
+    changed.sort()
+    return restamped + replacements, changed
 
-    # EXPENSEWISE
-    def add_user_profile_dialog(self, event=None):
-        """Opens a dialog to get the new profile name."""
-        # Configuration for the simple dialog
-        fields = {"name": {"label": "Profile Name:", "required": True}}
-        dialog = SimpleEntryDialog(self, "Create New Profile", fields)
-        result = dialog.result # This blocks until the dialog is closed
+# IVO-ONLY
+# --- Hourly Grid Intensity ---
+HOURS_PER_DAY = 24
+GRID_PROFILE_CATEGORIES = ("residential", "digital") # Categories whose electricity can use hourly profiles
+USAGE_WINDOW_DESC = "Optional: when it is mostly used (24h clock, e.g. 20-23 or 22-2, 7)."
+_MONTH_START_DAYS = np.cumsum([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30]) # Day of year each month starts (8760 h year)
+
+@functools.lru_cache(maxsize=256)
+def parse_usage_window(text):
+    """Hours of the day in a usage window such as "20-23" or "22-2, 7"; None if empty.
+
+    "a-b" covers a:00 up to b:00, wrapping past midnight when b <= a; a single "h" covers
+    that hour. Raises ValueError for anything else.
+    """
+    if isinstance(text, (int, float)) and not isinstance(text, bool) and float(text).is_integer():
+        text = str(int(text)) # A single hour, converted by clean_activity_details
+    text = str(text or "").strip()
+    if not text or text == "None":
+        return None
+    hours = set()
+    for part in text.split(","):
+        bounds = [int(bound) for bound in part.split("-")]
+        if len(bounds) == 1 and 0 <= bounds[0] < HOURS_PER_DAY:
+            hours.add(bounds[0])
+        elif len(bounds) == 2 and 0 <= bounds[0] < HOURS_PER_DAY and 0 <= bounds[1] <= HOURS_PER_DAY:
+            start, end = bounds
+            hours.update(range(start, end) if start < end else itertools.chain(range(start, HOURS_PER_DAY), range(0, end)))
+        else:
+            raise ValueError(f"Invalid usage window: {part.strip()!r}")
+    return tuple(sorted(hours))
 
-        if result and isinstance(result, dict):
-            name = result.get("name", "").strip()
-            if not name:
-                 messagebox.showerror("Invalid Input", "Profile name cannot be empty.", parent=self)
-                 return
+@functools.lru_cache(maxsize=256)
+def usage_profile(window):
+    """Share of a day's use in each hour (sums to 1): even over the window's hours, or the whole day."""
+    try:
+        hours = parse_usage_window(window)
+    except ValueError: # Stored junk: spread evenly, like an empty window
+        hours = None
+    profile = np.zeros(HOURS_PER_DAY)
+    if hours: profile[list(hours)] = 1.0 / len(hours)
+    else: profile[:] = 1.0 / HOURS_PER_DAY
+    profile.flags.writeable = False # Shared by the cache
+    return profile
+
+def grid_region_key(region_label):
+    """Profile key of a form region label: "Luzon" -> "luzon", "Unknown/Default" -> "default"."""
+    return str(region_label or "default").split("/")[-1].strip().lower()
+
+def _grid_month_matrix(values):
+    """(12, 24) month-by-hour intensities from a 24-value typical day or an 8760-value year."""
+    hourly = np.asarray(values, dtype=np.float64)
+    if hourly.shape == (HOURS_PER_DAY,):
+        return np.tile(hourly, (12, 1))
+    if hourly.shape == (365 * HOURS_PER_DAY,):
+        days_per_month = np.diff(np.append(_MONTH_START_DAYS, 365))
+        daily = hourly.reshape(365, HOURS_PER_DAY)
+        return np.add.reduceat(daily, _MONTH_START_DAYS, axis=0) / days_per_month[:, None]
+    raise ValueError(f"expected 24 or 8760 hourly values, got {hourly.size}")
+
+class GridIntensityProfiles:
+    """Hourly grid carbon intensity (kg CO2e/kWh) per region, reduced to (12, 24) month-by-hour arrays.
+
+    An activity's effective intensity is the dot product of its month's 24 hours with its
+    usage profile; for_month() views cache those per (region, window), so a batch does one
+    dot product per distinct combination. version is a content ID ("gp-...") of the arrays,
+    stamped on the activities of GRID_PROFILE_CATEGORIES.
+    """
+    __slots__ = ("by_month", "source", "version", "_months")
+
+    def __init__(self, by_month=None, source=None):
+        self.by_month = by_month or {} # region key -> (12, 24) array
+        self.source = source # (mtime_ns, size) of the file it was read from
+        self.version = content_id("gp", {region: matrix.tolist() for region, matrix in self.by_month.items()})
+        self._months = {}
+
+    def for_month(self, month):
+        """Intensity lookups for activities in month (1-12)."""
+        view = self._months.get(month)
+        if view is None:
+            view = self._months[month] = _GridMonth({region: matrix[month - 1] for region, matrix in self.by_month.items()})
+        return view
+
+    def months_of(self, days):
+        """Vectorized month (1-12) of a datetime64[D] array; NaT counts as the current month."""
+        months = days.astype("datetime64[M]").astype(np.int64) % 12 + 1
+        return np.where(np.isnat(days), datetime.date.today().month, months)
+
+class _GridMonth:
+    __slots__ = ("rows", "_intensities")
+
+    def __init__(self, rows):
+        self.rows = rows # region key -> 24 hourly intensities
+        self._intensities = {}
+
+    def has_region(self, region):
+        return region in self.rows
+
+    def intensity(self, region, window):
+        """Usage-weighted kg CO2e/kWh of region for a usage window (None: spread over the day)."""
+        key = (region, window)
+        value = self._intensities.get(key)
+        if value is None:
+            value = self._intensities[key] = float(self.rows[region] @ usage_profile(window))
+        return value
+
+def current_grid_profiles():
+    """The session's grid profiles (empty, i.e. flat grid factors, before loading)."""
+    profiles = app_state.get("grid_profiles")
+    return profiles if profiles is not None else GridIntensityProfiles()
 
-            # Check for duplicate names (case-insensitive)
-            current_profiles = app_state.get("user_profiles", {})
-            if any(prof.get('name', '').lower() == name.lower() for prof in current_profiles.values() if isinstance(prof, dict)):
-                 messagebox.showerror("Duplicate Profile", f"A profile named '{name}' already exists.", parent=self)
-                 return
+# IVO-ONLY
+def load_grid_profiles():
+    """Reads grid_intensity_profiles.json into app_state["grid_profiles"] and returns it.
 
-            try:
-                new_id = get_unique_id("user")
-                new_profile = {"name": name, "icon_color": random.choice(ACCOUNT_ICON_COLORS)}
-                # Update in-memory state
-                app_state["user_profiles"][new_id] = new_profile
-                # Save to CSV
-                if save_user_profiles_to_csv():
-                    logging.info(f"Created and saved new profile: {name} ({new_id})")
-                    self.display_user_profiles() # Refresh the display
-                else:
-                    # If save failed, revert the change in memory
-                    app_state["user_profiles"].pop(new_id, None)
-                    messagebox.showerror("Save Error", "Could not save the new profile. Please try again.", parent=self)
+    The file maps region keys ("luzon", "visayas", "mindanao", "default"; "national" for
+    residential electricity) to 24 or 8760 hourly kg CO2e/kWh values. Invalid regions are
+    skipped; regions without a profile keep their flat grid factor.
+    """
+    source = _file_stamp(GRID_PROFILES_JSON)
+    by_month = {}
+    if source is not None:
+        try:
+            with open(GRID_PROFILES_JSON, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if not isinstance(data, dict):
+                raise ValueError("expected an object of region: [hourly values]")
+            for region, values in data.items():
+                try:
+                    by_month[grid_region_key(region)] = _grid_month_matrix(values)
+                except (ValueError, TypeError) as e:
+                    logging.warning("Skipping grid profile '%s' in %s: %s", region, GRID_PROFILES_JSON, e)
+            logging.info("Loaded hourly grid profiles for %s from %s.", sorted(by_month), GRID_PROFILES_JSON)
+        except (OSError, ValueError) as e:
+            logging.warning("Failed to load grid profiles from '%s': %s. Using flat grid factors.", GRID_PROFILES_JSON, e)
+    profiles = app_state["grid_profiles"] = GridIntensityProfiles(by_month, source)
+    return profiles
+
+def grid_profiles_changed(profiles):
+    """Whether grid_intensity_profiles.json differs (one os.stat) from the file profiles were read from."""
+    return _file_stamp(GRID_PROFILES_JSON) != profiles.source
 
-            except Exception as e:
-                logging.exception("Error creating profile")
+# IVO-ONLY
+def plan_grid_change(activities, new_profiles, exchange_rates=None):
+    """Works out how a grid profile update affects footprints (no UI, no mutation).
+
+    Activities of GRID_PROFILE_CATEGORIES not yet stamped with new_profiles are recomputed
+    with them, each under its own stamped factor set (unstamped ones are left alone). Returns
+    (replacements, changed) like plan_factor_change.
+    """
+    by_version = {}
+    for index, activity in enumerate(activities):
+        if (isinstance(activity, Mapping) and activity.get("category") in GRID_PROFILE_CATEGORIES
+                and activity.get("factor_set") and activity.get("grid_profiles") != new_profiles.version):
+            by_version.setdefault(activity.get("factor_set"), []).append(index)
+    replacements, changed = _plan_recompute(activities, by_version, exchange_rates or current_exchange_rates(), new_profiles, "grid")
+    changed.sort()
+    return replacements, changed
+
+# IVO-ONLY
+# Profile Summaries (JSON, read by the profile picker instead of full histories)
+def compute_activity_summary(activities, today=None):
+    """Builds a profile summary: lifetime total plus per-day totals of the recent window (kg CO2e).
+
+    Day buckets (rather than a single 30-day figure) let the picker slide the window to
+    the current date without touching the activities again.
+    """
+    today = today or datetime.date.today()
+    window_start = (today - datetime.timedelta(days=SUMMARY_WINDOW_DAYS - 1)).isoformat()
+    lifetime_kg = 0.0
+    daily_kg = {}
+    for activity in activities:
+        try:
+            footprint = float(activity.get("carbon_footprint") or 0.0)
+        except (TypeError, ValueError, AttributeError):
+            continue
+        lifetime_kg += footprint
+        day = str(activity.get("timestamp", ""))[:10] # "YYYY-MM-DD HH:MM:SS" -> date part
+        if day >= window_start:
+            daily_kg[day] = daily_kg.get(day, 0.0) + footprint
+    return {
+        "lifetime_kg": round(lifetime_kg, 3),
+        "daily_kg": {day: round(kg, 3) for day, kg in sorted(daily_kg.items())},
+        "category_kg": {cat: round(kg, 3) for cat, kg in aggregate_category_totals(activities).items()}, # Dashboard cards before activities load
+        "activity_count": len(activities),
+    }
+
+# IVO-ONLY
+def save_profile_summary(user_id, activities):
+    """Rewrites a user's summary file from their activities. Returns True on success."""
+    return _save_json_data(get_user_data_file_path(user_id, "summary"), compute_activity_summary(activities))
+
+# IVO-ONLY
+def load_profile_summary(user_id):
+    """Returns a user's raw summary dict (see compute_activity_summary), or None if missing/unreadable."""
+    file_path = get_user_data_file_path(user_id, "summary")
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            summary = json.load(f)
+        return summary if isinstance(summary, dict) else None
+    except FileNotFoundError:
+        return None
+    except (ValueError, OSError) as e:
+        logging.warning("Ignoring unreadable profile summary %s: %s", file_path, e)
+        return None
+
+# IVO-ONLY
+def load_profile_summaries(user_ids, today=None):
+    """Reads the summary file of each profile once.
+
+    Returns:
+        dict: {user_id: {"lifetime_kg": float, "recent_kg": float, "activity_count": int}};
+              profiles without a (valid) summary file are left out.
+    """
+    today = today or datetime.date.today()
+    window_start = (today - datetime.timedelta(days=SUMMARY_WINDOW_DAYS - 1)).isoformat()
+    summaries = {}
+    for user_id in user_ids:
+        file_path = get_user_data_file_path(user_id, "summary")
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                summary = json.load(f)
+            daily_kg = summary.get("daily_kg") or {}
+            summaries[user_id] = {
+                "lifetime_kg": float(summary.get("lifetime_kg") or 0.0),
+                "recent_kg": sum(float(kg) for day, kg in daily_kg.items() if day >= window_start),
+                "activity_count": int(summary.get("activity_count") or 0),
+            }
+        except FileNotFoundError:
+            continue # Written the next time the profile is opened
+        except (ValueError, TypeError, AttributeError, OSError) as e:
+            logging.warning("Ignoring unreadable profile summary %s: %s", file_path, e)
+    return summaries
+
+# IVO-ONLY
+# Recently Used Profiles (in-memory LRU)
+def _get_user_file_stamps(user_id):
+    """Returns {data_type: (mtime_ns, size) or None} for a user's JSON files."""
+    stamps = {}
+    for key in USER_DATA_KEYS:
+        try:
+            st = os.stat(get_user_data_file_path(user_id, key))
+            stamps[key] = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            stamps[key] = None # Missing file (defaults were used)
+    return stamps
+
+# IVO-ONLY
+class UserDataCache:
+    """LRU of fully loaded, validated per-user state, so switching back to a profile skips parsing.
+
+    Entries hold the same objects the session works on, and are refreshed by save_user_data.
+    An entry is dropped when any of the user's files changed on disk since it was stored
+    (mtime/size mismatch). Memory is bounded by max_bytes, estimated from JSON file sizes.
+    """
+
+    def __init__(self, max_bytes=USER_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict() # {user_id: {"state": {...}, "stamps": {...}, "size": int}}
+        self._total_bytes = 0
+
+    def get(self, user_id):
+        """Returns the cached state dict for user_id, or None on a miss or stale entry."""
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        if entry["stamps"] != _get_user_file_stamps(user_id):
+            logging.info("User cache: files changed on disk for %s, reloading.", user_id)
+            self.invalidate(user_id)
+            return None
+        self._entries.move_to_end(user_id) # Most recently used
+        return entry["state"]
+
+    def put(self, user_id, state):
+        """Stores state (a {data_type: data} dict) for user_id, evicting least recently used entries."""
+        self.invalidate(user_id)
+        stamps = _get_user_file_stamps(user_id)
+        size = sum(stamp[1] for stamp in stamps.values() if stamp)
+        if size > self.max_bytes:
+            logging.debug("User cache: %s (%s bytes) exceeds cap, not cached.", user_id, size)
+            return
+        self._entries[user_id] = {"state": state, "stamps": stamps, "size": size}
+        self._total_bytes += size
+        while self._total_bytes > self.max_bytes:
+            evicted_id, evicted = self._entries.popitem(last=False)
+            self._total_bytes -= evicted["size"]
+            logging.debug("User cache: evicted %s.", evicted_id)
+
+    def invalidate(self, user_id):
+        """Drops the entry for user_id, if any."""
+        entry = self._entries.pop(user_id, None)
+        if entry:
+            self._total_bytes -= entry["size"]
+
+    def clear(self):
+        self._entries.clear()
+        self._total_bytes = 0
+
+# Loaded profiles kept across session switches
+user_data_cache = UserDataCache()
+
+# IVO-ONLY
+# Per-file User Data Loading/Saving (shared by the app session and the local API)
+USER_DATA_DEFAULTS = {
+    "settings": lambda: {"theme": "eco_dark", "conversion": "CO2e"},
+    "activities": list, # Streamed and validated record by record
+    "activity_log": list,
+}
+
+def read_user_file(user_id, key, on_activity_progress=None):
+    """Loads and validates one of a user's USER_DATA_KEYS files; defaults when missing or invalid."""
+    file_path = get_user_data_file_path(user_id, key)
+    if key == "activities":
+        return load_activity_records(user_id, file_path, on_activity_progress)
+    loaded_data = _load_json_data(file_path, default_value_factory=USER_DATA_DEFAULTS[key])
+
+    # --- Post-load validation and cleanup ---
+    default_instance = USER_DATA_DEFAULTS[key]() # Get a default instance for comparison/fallback
+    if key == "settings":
+        if not isinstance(loaded_data, dict):
+            logging.warning("Settings data for %s invalid, using defaults.", user_id)
+            loaded_data = default_instance
+        # Ensure required keys exist using defaults
+        for k, v in default_instance.items():
+            loaded_data.setdefault(k, v)
+
+    elif key == "activity_log":
+         if not isinstance(loaded_data, list):
+             logging.warning("Activity log data for %s invalid, using empty list.", user_id)
+             loaded_data = default_instance
+         # Optional: Validate log entry format here if needed
+
+    return loaded_data
+
+class UserFilesChanged(Exception):
+    """Raised by write_user_files when files changed on disk since they were read; nothing was written."""
+
+    def __init__(self, user_id, keys):
+        super().__init__(f"{', '.join(keys)} of {user_id} changed on disk since they were loaded")
+        self.user_id = user_id
+        self.keys = keys
+
+def write_user_files(user_id, state, keys=USER_DATA_KEYS, stamps=None):
+    """Writes state[key] to the user's file for each key (plus the summary with activities). Returns True if all saved.
+
+    stamps ({key: (mtime_ns, size) or None}, as from _get_user_file_stamps when state was
+    read) guards against another process (the app or the local API) having saved the same
+    files since: if any of keys differs on disk, nothing is written and UserFilesChanged is
+    raised. The stamps of the files written are updated in place.
+    """
+    if stamps is not None:
+        changed = [key for key in keys if _file_stamp(get_user_data_file_path(user_id, key)) != stamps.get(key)]
+        if changed:
+            logging.error("Not saving %s for %s: changed on disk since loaded (%s -> %s).", changed, user_id,
+                          [stamps.get(key) for key in changed], [_file_stamp(get_user_data_file_path(user_id, key)) for key in changed])
+            raise UserFilesChanged(user_id, changed)
+    save_success_overall = True
+    bytes_written = 0
+
+    for key in keys:
+        file_path = get_user_data_file_path(user_id, key)
+        data_to_save = state.get(key)
+
+        if data_to_save is None: # Should not happen if load_user_data ran correctly
+            logging.warning("No data for '%s' found for user %s. Skipping save.", key, user_id)
+            continue
+
+        if not _save_json_data(file_path, data_to_save):
+            save_success_overall = False
+            logging.error("FAILED to save '%s' to '%s'.", key, file_path)
+            # Show error message ONLY if overall save fails later
+        else:
+            if stamps is not None: stamps[key] = _file_stamp(file_path) # Our own write
+            if perf_monitor.enabled: bytes_written += os.path.getsize(file_path)
+
+    if perf_monitor.enabled and bytes_written:
+        perf_monitor.record("save_user_data bytes", bytes_written, unit="bytes")
+
+    if "activities" in keys and save_success_overall:
+        # Keep the picker's summary in step with the activities file
+        save_profile_summary(user_id, state.get("activities") or [])
+    return save_success_overall
+
+# IVO-ONLY
+# Combined User Data Loading/Saving
+@perf_monitor.instrument("load_user_data")
+def load_user_data(user_id, on_activity_progress=None, defer_activities=False):
+    """Loads all data (settings, activities, logs, factors) for a user.
+
+    Activities are streamed (see load_activity_records); on_activity_progress is passed through.
+    With defer_activities, activities are left empty and app_state["activities_loading"] set;
+    the caller loads them (e.g. on a worker thread) and hands them to finish_activity_load().
+    Returns True when activities were loaded, False when deferred.
+    """
+    logging.info("Loading data for user: %s", user_id)
+    app_state["current_user_id"] = user_id
+
+    # 1. Load/Ensure Emission Factors (shared, load once per session effectively)
+    if not app_state.get("emission_factors"): # Only load if not already loaded
+        load_emission_factors()
+    if app_state.get("exchange_rates") is None:
+        load_exchange_rates()
+    if app_state.get("grid_profiles") is None:
+        load_grid_profiles()
+    app_state["categories"] = BASE_CATEGORIES
+    app_state["activities_loading"] = False
+
+    # Recently used profile whose files are unchanged: reuse it without parsing/validation
+    cached_state = user_data_cache.get(user_id)
+    if cached_state is not None:
+        app_state.update(cached_state)
+        app_state["user_file_stamps"] = _get_user_file_stamps(user_id) # Just matched the entry's
+        logging.info("Data for %s served from memory cache. Activities: %s", user_id, len(app_state['activities']))
+        return True
+
+    # 2. Load User-Specific Data (Settings, Activities, Log)
+    # Stamped before reading, so a save racing the read shows up as a change (see write_user_files)
+    app_state["user_file_stamps"] = _get_user_file_stamps(user_id)
+    for key in USER_DATA_KEYS:
+        if key == "activities" and defer_activities:
+            app_state[key] = [] # Placeholder; save_user_data leaves the file alone meanwhile
+            app_state["activities_loading"] = True
+        else:
+            app_state[key] = read_user_file(user_id, key, on_activity_progress)
+
+    if defer_activities:
+        logging.info("Settings and log loaded for %s; activities load deferred.", user_id)
+        return False
+    finish_activity_load(user_id, app_state["activities"])
+    logging.info("Data loading finished for %s. Theme: %s, Activities: %s", user_id, app_state['settings']['theme'], len(app_state['activities']))
+    return True
+
+# IVO-ONLY
+def finish_activity_load(user_id, activities):
+    """Installs a user's loaded activities, caches the now complete state and backfills the summary."""
+    app_state["activities"] = activities
+    app_state["activities_loading"] = False
+    user_data_cache.put(user_id, {key: app_state[key] for key in USER_DATA_KEYS})
+
+    # Profiles created before summaries existed (or before per-category totals) get one on first open
+    summary = load_profile_summary(user_id)
+    if summary is None or "category_kg" not in summary:
+        save_profile_summary(user_id, activities)
+
+# IVO-ONLY
+@perf_monitor.instrument("save_user_data")
+def save_user_data(user_id, keys=USER_DATA_KEYS):
+    """Saves user-specific data (settings, activities, logs) to JSON files.
+
+    Pass a subset of keys (e.g. ("settings",)) to rewrite only those files.
+    """
+    if not user_id:
+        logging.error("Attempted to save data without a valid user ID.")
+        return False
+
+    logging.info("Saving data for user: %s", user_id)
+    ensure_data_dir()
+
+    loading_in_background = app_state.get("activities_loading") and user_id == app_state.get("current_user_id")
+    if loading_in_background and "activities" in keys:
+        # In-memory activities are only a placeholder until the background load finishes
+        logging.info("Activities for %s still loading; leaving their file untouched.", user_id)
+        keys = tuple(key for key in keys if key != "activities")
+
+    # Only the session's own user has stamps from when its files were read
+    stamps = app_state["user_file_stamps"] if user_id == app_state.get("current_user_id") else None
+    try:
+        save_success_overall = write_user_files(user_id, app_state, keys, stamps)
+    except UserFilesChanged as e:
+        user_data_cache.invalidate(user_id)
+        show_error("Save Conflict",
+                   f"Could not save: {e} (e.g. through the local API), and saving would overwrite those changes.\n\n"
+                   "Reopen the profile to continue with the data on disk.")
+        return False
+
+    if not save_success_overall:
+        # Memory no longer matches disk; next load must come from the files
+        user_data_cache.invalidate(user_id)
+        logging.error("One or more data files failed to save for user: %s.", user_id)
+        show_error("Save Error", f"Failed to save some user data for {user_id}. Please check logs.")
+    elif user_id == app_state.get("current_user_id") and not loading_in_background:
+        # Re-stamp the cache entry with the live session objects (some may have been replaced)
+        user_data_cache.put(user_id, {key: app_state[key] for key in USER_DATA_KEYS})
+
+    return save_success_overall
+
+# IVO-ONLY
+# --- Carbon Calculation Engine ---
+# Average days/weeks per month, used to normalise every input period to a monthly figure
+DAYS_PER_MONTH = 30.4375 # More precise average
+WEEKS_PER_MONTH = DAYS_PER_MONTH / 7.0
+
+# Food/spending input keys mapped to their emission factor keys (tuples are averaged)
+FOOD_INPUTS_MAP = {
+    "beef_kg": ("food_prod_beef_kg_kg", "food_prod_lamb_kg_kg"), # Tuple for averaging
+    "pork_kg": "food_prod_pork_kg_kg",
+    "poultry_kg": "food_prod_poultry_kg_kg",
+    "seafood_kg": "food_prod_seafood_kg_kg",
+    "dairy_kg": "food_prod_dairy_kg_kg",
+    "eggs_kg": "food_prod_eggs_kg_kg",
+    # Combine Veg/Fruits/Grains/Legumes for simplicity if desired, or keep separate
+    "veg_fruit_kg": ("food_prod_vegetables_kg_kg", "food_prod_fruits_kg_kg"),
+    "grains_legumes_kg": ("food_prod_grains_kg_kg", "food_prod_legumes_kg_kg")
+}
+FOOD_INPUTS_LABELS = { # For validation messages
+    "beef_kg": "Beef / Lamb", "pork_kg": "Pork", "poultry_kg": "Poultry",
+    "seafood_kg": "Fish & Seafood", "dairy_kg": "Dairy", "eggs_kg": "Eggs",
+    "veg_fruit_kg": "Vegetables & Fruits", "grains_legumes_kg": "Grains & Legumes"
+}
+SPENDING_CATS_MAP = {
+    "clothing_spending": "spending_clothing_usd",
+    "electronics_spending": "spending_electronics_usd",
+    "appliances_spending": "spending_appliances_usd",
+    "furniture_spending": "spending_furniture_usd",
+    "other_spending": "spending_other_goods_usd"
+}
+SPENDING_CATS_LABELS = { # For validation messages
+     "clothing_spending": "Clothing Spending", "electronics_spending": "Electronics Spending",
+     "appliances_spending": "Appliances Spending", "furniture_spending": "Furniture Spending",
+     "other_spending": "Other Goods Spending"
+}
+# Choices offered by the Add Activity form comboboxes, per category and detail key
+ACTIVITY_FORM_OPTIONS = {
+    "residential": {
+        "elec_period": ["Monthly", "Bi-monthly", "Quarterly", "Annually"],
+        "heat_fuel_type": ["None", "Natural Gas", "Heating Oil", "Propane", "Wood"],
+        "heat_wood_type": ["Hardwood", "Softwood"],
+        "heat_fuel_period": ["Monthly", "Quarterly", "Annually"],
+        "water_heater_type": ["Electric", "Natural Gas", "Solar Thermal", "None"],
+        "water_usage_period": ["Monthly", "Quarterly", "Annually"],
+        "renew_type": ["None", "Solar Panels", "Wind Turbines"],
+        "renew_period": ["Monthly", "Quarterly", "Annually"],
+    },
+    "travel": {
+        "mode": ["Car", "Motorcycle", "Bus", "Train", "Subway", "Jeepney", "Air Travel", "Rideshare"],
+        "period": ["Per Trip", "Daily Total", "Weekly Total", "Monthly Total"],
+        "car_fuel_type": ["Gasoline", "Diesel", "Electric"],
+        "rideshare_fuel_type": ["Gasoline", "Diesel", "Electric"],
+        "flight_type": ["Short (<1500km)", "Medium (1500-6000km)", "Long (>6000km)"], # Simplified labels
+        "flight_cabin": ["Economy", "Business", "First"],
+    },
+    "food": {
+        "consumption_period": ["Per Week", "Per Month"],
+        "local_sourcing": ["Low (<25% Local)", "Medium (25-75% Local)", "High (>75% Local)"],
+        "packaging_level": ["Minimal (Bulk, Loose)", "Average Mix", "Mostly Packaged"],
+        "region": ["Luzon", "Visayas", "Mindanao", "Unknown/Other"],
+    },
+    "shopping": {
+        "spending_period": ["Monthly", "Quarterly", "Annually", "One-off Purchase"],
+        "area_type_retail": ["Urban", "Rural", "Unknown"],
+        "waste_period": ["Per Week", "Per Month"],
+        "waste_disposal": ["Landfill (Unknown Methane)", "Landfill (Low Methane)", "Landfill (Medium Methane)", "Landfill (High Methane)", "Incineration", "Mixed Recycling & Waste"],
+    },
+    "services": {
+        "dry_cleaning_period": ["Per Month", "Per Year"],
+        "landscaping_period": ["Per Month", "Per Year"],
+        "area_type_services": ["Urban", "Rural", "Unknown"],
+    },
+    "digital": {
+        "streaming_quality": ["Low (SD)", "Medium (HD)", "High (4K)"],
+        "gaming_type": ["Low Demand", "High Demand"], # Simplified labels
+        "data_period": ["Per Month", "Per Day"],
+        "region_grid": ["Luzon", "Visayas", "Mindanao", "Unknown/Default"],
+    },
+}
+
+# IVO-ONLY
+def _seed_detail_vocabulary():
+    """Interns the known option labels up front, so loaded records share them from the first one."""
+    for options in itertools.chain.from_iterable(fields.values() for fields in ACTIVITY_FORM_OPTIONS.values()):
+        for label in options:
+            _compact_detail_value(label)
+
+_seed_detail_vocabulary()
+
+# IVO-ONLY
+def clean_activity_details(raw_details):
+    """Converts numeric strings to numbers, keeps others as is."""
+    cleaned = {}
+    for key, value in raw_details.items():
+        if isinstance(value, (bool, int, float)):
+            cleaned[key] = value
+        elif value is None:
+            cleaned[key] = None
+        else: # Should be string or string-like from tkVar.get()
+            val_str = str(value).strip()
+            if val_str == "" or val_str == "None":
+                cleaned[key] = None
+            else:
+                try: # Attempt numeric conversion
+                    num_val = float(val_str)
+                    # Store as int if it's effectively whole
+                    cleaned[key] = int(num_val) if num_val.is_integer() else num_val
+                except ValueError:
+                    cleaned[key] = val_str # Keep as string if not numeric
+    return cleaned
+
+# IVO-ONLY
+def aggregate_category_totals(activities):
+    """Sums carbon_footprint (kg CO2e) per BASE_CATEGORIES key; invalid values are ignored."""
+    category_totals = {cat_key: 0.0 for cat_key in BASE_CATEGORIES}
+    for activity in activities:
+        cat = activity.get("category")
+        fp_raw = activity.get("carbon_footprint")
+        if cat in category_totals and fp_raw is not None:
+            try: category_totals[cat] += float(fp_raw)
+            except (ValueError, TypeError): pass # Ignore invalid values
+    return category_totals
+
+# IVO-ONLY
+def get_float_or_zero(value_str):
+    """Safely convert string to float, returning 0.0 on failure or empty."""
+    if value_str is None: return 0.0
+    try:
+        cleaned_str = str(value_str).strip()
+        return float(cleaned_str) if cleaned_str else 0.0
+    except (ValueError, TypeError):
+        return 0.0
+
+# IVO-ONLY
+def get_int_or_zero(value_str):
+    """Safely convert string to int, returning 0 on failure or empty."""
+    if value_str is None: return 0
+    try:
+         cleaned_str = str(value_str).strip()
+         return int(float(cleaned_str)) if cleaned_str else 0
+    except (ValueError, TypeError):
+         return 0
+
+# IVO-ONLY
+_unknown_periods_logged = set() # Periods already warned about; each is reported once per session
+
+def get_monthly_average(amount, period):
+    """Converts an amount covering `period` into its average monthly contribution."""
+    # Treat "Per Trip" as a one-off contribution for this period's calculation
+    # Treat "One-off Purchase" as averaged over a year
+    if period == "Monthly": return amount
+    if period == "Per Week": return amount * WEEKS_PER_MONTH
+    if period == "Daily Total": return amount * DAYS_PER_MONTH
+    if period == "Annually": return amount / 12.0
+    if period == "Quarterly": return amount / 3.0
+    if period == "Bi-monthly": return amount / 2.0
+    if period == "One-off Purchase": return amount / 12.0 # Average one-off over a year
+    if period == "Per Trip": return amount # Treat trip as its own contribution
+
+    # Fallback for unknown periods (batch recomputes hit the same ones over and over)
+    if str(period) not in _unknown_periods_logged: # str: a malformed record may hold an unhashable value
+        _unknown_periods_logged.add(str(period))
+        logging.warning("Unknown period '%s' encountered in calculation. Using raw amount.", period)
+    return amount
+
+# IVO-ONLY
+def validate_activity_inputs(category, details):
+    """Validates raw Add Activity inputs for category; returns a list of error messages (empty if valid)."""
+    errors = []
+    def check_num(key, name, allow_zero=True, is_int=False):
+        val_str = str(details.get(key, "")).strip()
+        is_valid = False
+        if val_str:
+            try:
+                val = float(val_str)
+                if (allow_zero and val >= 0) or (not allow_zero and val > 0):
+                     if is_int and val != int(val): # Check if float represents int if needed
+                          is_valid = False
+                     else:
+                          is_valid = True
+            except ValueError: pass
+        elif allow_zero: is_valid = True # Empty allowed if zero allowed
+        if not is_valid:
+             req = f"{'positive' if not allow_zero else 'non-negative'}{' whole' if is_int else ''}"
+             errors.append(f"'{name}' must be a {req} number or empty.")
+
+    # IVO-ONLY
+    def check_window(key, name):
+        try: parse_usage_window(details.get(key))
+        except ValueError: errors.append(f"'{name}' must be hours like 20-23 or 22-2, 7 (24h clock) or empty.")
+
+    # IVO-ONLY
+    def check_req(key, name):
+        val = details.get(key)
+        if val is None or str(val).strip() == "" or str(val) == "None":
+             errors.append(f"'{name}' is required.")
+
+    # IVO-ONLY
+    # Choice fields are matched as text by the calculation (.split(), .lower())
+    for key in ACTIVITY_FORM_OPTIONS.get(category, {}):
+        value = details.get(key)
+        if value is not None and not isinstance(value, str):
+            errors.append(f"'{key.replace('_', ' ').title()}' must be one of its options, as text.")
+
+    # IVO+GPT (REPEATING RULES)
+    # --- Category-Specific Rules ---
+    if category == "residential":
+        check_req("elec_kwh", "Electricity Used"); check_num("elec_kwh", "Electricity Used", allow_zero=False)
+        check_req("elec_period", "Electricity Billing Period")
+        heat_fuel = details.get("heat_fuel_type"); heat_amt = get_float_or_zero(details.get("heat_fuel_amount"))
+        if heat_fuel != "None": check_num("heat_fuel_amount", f"{heat_fuel} Amount"); # Allow 0
+        water_type = details.get("water_heater_type"); water_amt = get_float_or_zero(details.get("water_usage_amount"))
+        if water_type != "None": check_num("water_usage_amount", f"{water_type} Usage"); # Allow 0
+        renew_type = details.get("renew_type"); renew_amt = get_float_or_zero(details.get("renew_kwh_gen"))
+        if renew_type != "None": check_num("renew_kwh_gen", "kWh Generated"); # Allow 0
+        check_window("elec_window", "Main Usage Hours")
+
+    elif category == "travel":
+        check_req("mode", "Mode"); check_req("distance", "Distance"); check_num("distance", "Distance", allow_zero=False)
+        check_req("period", "Period/Frequency")
+        mode = details.get("mode")
+        if mode == "Car": check_req("car_fuel_type", "Car Fuel")
+        if mode == "Rideshare": check_req("rideshare_fuel_type", "Rideshare Fuel"); check_req("rideshare_passengers", "Passengers"); check_num("rideshare_passengers", "Passengers", allow_zero=False, is_int=True)
+        if mode == "Air Travel": check_req("flight_type", "Flight Type"); check_req("flight_cabin", "Cabin")
+
+    elif category == "food":
+        check_req("consumption_period", "Consumption Period"); check_req("region", "Region")
+        has_amount = any(get_float_or_zero(details.get(k)) > 0 for k in FOOD_INPUTS_MAP)
+        if not has_amount: errors.append("Enter amount for at least one food category.")
+        else: # Only check positivity if amounts entered
+             for k, label in FOOD_INPUTS_LABELS.items(): check_num(k, label)
+
+    elif category == "shopping": # Goods & Waste
+        has_spend = any(get_float_or_zero(details.get(k)) > 0 for k in SPENDING_CATS_MAP)
+        has_waste = get_float_or_zero(details.get("waste_kg")) > 0
+        if not has_spend and not has_waste: errors.append("Enter Spending or Waste details.")
+        if has_spend or has_waste: check_req("area_type_retail", "Area Type")
+        if has_spend: check_req("spending_period", "Spending Period"); # Check amounts are positive
+        for k, label in SPENDING_CATS_LABELS.items(): check_num(k, label)
+        if has_waste: check_req("waste_kg", "Waste Amount"); check_num("waste_kg", "Waste Amount", allow_zero=False); check_req("waste_period", "Waste Period"); check_req("waste_disposal", "Disposal Method")
+
+    elif category == "services":
+         has_dc = get_float_or_zero(details.get("dry_cleaning_kg")) > 0
+         has_ls = get_float_or_zero(details.get("landscaping_m2")) > 0
+         if not has_dc and not has_ls: errors.append("Enter details for Dry Cleaning or Landscaping.")
+         if has_dc or has_ls: check_req("area_type_services", "Area Type")
+         if has_dc: check_req("dry_cleaning_kg", "Dry Cleaning Amount"); check_num("dry_cleaning_kg", "Dry Cleaning Amount", allow_zero=False); check_req("dry_cleaning_period", "DC Period")
+         if has_ls: check_req("landscaping_m2", "Landscaping Area"); check_num("landscaping_m2", "Landscaping Area", allow_zero=False); check_req("landscaping_period", "LS Period")
+
+    elif category == "digital":
+         usage_keys = ["laptop_hours", "mobile_hours", "tablet_hours", "streaming_hours", "gaming_hours", "data_usage_gb"]
+         has_usage = any(get_float_or_zero(details.get(k)) > 0 for k in usage_keys)
+         if not has_usage: errors.append("Enter usage for at least one digital activity.")
+         else: # Check numbers are valid if entered
+             for k in usage_keys: check_num(k, k.replace("_", " ").title())
+         if get_float_or_zero(details.get("data_usage_gb")) > 0: check_req("data_period", "Data Period")
+         check_req("region_grid", "Region (Grid)")
+         check_window("device_window", "Device Hours"); check_window("streaming_window", "Streaming Time"); check_window("gaming_window", "Gaming Time")
+
+    return errors
+
+# IVO-ONLY
+# --- Region-Aware Factor Resolution ---
+REGIONAL_OPTION_FIELDS = {"food": "region", "shopping": "area_type_retail", "services": "area_type_services", "digital": "region_grid"}
+LANDFILL_METHANE_LEVELS = ("Low", "Medium", "High")
+REGIONAL_TABLE_CACHE_SIZE = 64 # Factor mappings (sets / dated periods) whose tables stay cached
+
+def _resolve_regional(factors, category, label):
+    """Region- or area-dependent factors of one (category, label), fallbacks applied, as a tuple.
+
+    food: (regional kg adjustment,); shopping: (retail multiplier, landfill factor per
+    LANDFILL_METHANE_LEVELS); services: (dry cleaning, landscaping); digital: (grid kWh factor,).
+    """
+    if category == "food":
+        region_map = {"Luzon": "food_region_luzon_kg_crop", "Visayas": "food_region_visayas_kg_crop", "Mindanao": "food_region_mindanao_kg_crop"}
+        return (factors.get(region_map.get(label), 0),)
+    if category == "shopping":
+        base_landfill = tuple(factors.get(key, 0) for key in ("waste_landfill_low_ch4_kg_kg", "waste_landfill_med_ch4_kg_kg", "waste_landfill_high_ch4_kg_kg"))
+        if label == "Unknown":
+            return (1.0,) + base_landfill
+        area = label.lower()
+        regional_landfill_key = f"waste_region_{area}_landfill_kg_kg" # Regional override of every methane level
+        return (factors.get(f"goods_region_{area}_retail_mult", 1.0),) + tuple(factors.get(regional_landfill_key, base) for base in base_landfill)
+    if category == "services":
+        area = label.lower()
+        return (factors.get(f"serv_drycleaning_region_{area}_kg_garment", factors.get("serv_drycleaning_base_kg_garment", 0)),
+                factors.get(f"serv_landscaping_region_{area}_m2", factors.get("serv_landscaping_base_m2", 0)))
+    if category == "digital":
+        return (factors.get(f"digital_grid_{label.lower()}_kwh", factors.get("digital_grid_default_kwh", 0)),)
+    raise KeyError(category)
+
+class RegionalFactorTable:
+    """Resolved region-dependent factors of one factor mapping, keyed by (category, region or area label).
+
+    Every form option is resolved up front; other labels (e.g. from older files) on first
+    use. Build through regional_factors(), which shares one table per read-only mapping.
+    """
+    __slots__ = ("factors", "resolved")
+
+    def __init__(self, factors, precompute=True):
+        self.factors = factors
+        self.resolved = {}
+        if precompute:
+            for category, field in REGIONAL_OPTION_FIELDS.items():
+                for label in ACTIVITY_FORM_OPTIONS[category][field]:
+                    self.resolved[category, label] = _resolve_regional(factors, category, label)
+
+    def get(self, category, label):
+        values = self.resolved.get((category, label))
+        if values is None:
+            values = self.resolved[category, label] = _resolve_regional(self.factors, category, label)
+        return values
+
+_regional_tables = OrderedDict() # id(factors) -> (factors, table), LRU; holding factors keeps the id valid
+_regional_tables_lock = threading.Lock() # Batch recomputes run on worker threads
+_last_regional_table = (None, None) # Fast path: consecutive records usually share factors
+
+def regional_factors(factors):
+    """The RegionalFactorTable of factors, cached for read-only sets (a new set gets a new table).
+
+    Other mappings (a plain dict that could still change, or the recompute's usage
+    recorder, which must see each lookup) get an uncached table resolved on demand.
+    """
+    global _last_regional_table
+    last_factors, last_table = _last_regional_table
+    if last_factors is factors:
+        return last_table
+    if not isinstance(factors, (MappingProxyType, DatedFactorSet)):
+        return RegionalFactorTable(factors, precompute=False)
+    with _regional_tables_lock:
+        entry = _regional_tables.get(id(factors))
+        if entry is not None and entry[0] is factors:
+            _regional_tables.move_to_end(id(factors))
+            table = entry[1]
+        else:
+            table = RegionalFactorTable(factors)
+            _regional_tables[id(factors)] = (factors, table)
+            if len(_regional_tables) > REGIONAL_TABLE_CACHE_SIZE:
+                _regional_tables.popitem(last=False)
+    _last_regional_table = (factors, table)
+    return table
+
+# IVO-ONLY
+def calculate_footprint_components(category, details, factors, php_per_usd=PHP_TO_USD_RATE, grid=None):
+    """Calculates the monthly CO2e of cleaned activity details, split into components.
+
+    Returns (total_co2e, components) where components maps a readable name to its kg CO2e.
+    Free of logging and dialogs; missing or non-numeric inputs count as zero, so it is also
+    safe to call on a half-filled form. php_per_usd converts shopping spending (see
+    ExchangeRateTable.rate_at for the rate of a given date). grid, the activity month's
+    GridIntensityProfiles.for_month(), replaces the flat grid factors of regions that have
+    an hourly profile, weighted by the usage windows in details.
+    """
+    total_co2e = 0.0
+    components = {}
+
+    # --- Residential ---
+    if category == "residential":
+        # Elec
+        monthly_elec = get_monthly_average(get_float_or_zero(details.get("elec_kwh")), details.get("elec_period", "Monthly"))
+        elec_factor = factors.get("res_elec_usage_ph_nat_avg_kwh", 0)
+        if grid is not None and grid.has_region("national"):
+            elec_factor = grid.intensity("national", details.get("elec_window"))
+        elec_fp = monthly_elec * elec_factor
+        components["Electricity"] = elec_fp
+        total_co2e += elec_fp
+
+        # Heat
+        heat_fuel = details.get("heat_fuel_type")
+        monthly_heat = get_monthly_average(get_float_or_zero(details.get("heat_fuel_amount")), details.get("heat_fuel_period", "Monthly"))
+        heat_fp = 0.0
+        if monthly_heat > 0 and heat_fuel != "None":
+            factor_key = None
+            if heat_fuel == "Natural Gas": factor_key = "res_heat_nat_gas_therm"
+            elif heat_fuel == "Heating Oil": factor_key = "res_heat_heating_oil_gallon"
+            elif heat_fuel == "Propane": factor_key = "res_heat_propane_gallon"
+            elif heat_fuel == "Wood":
+                 wood_type = details.get("heat_wood_type", "Hardwood")
+                 factor_key = "res_heat_wood_softwood_cord" if wood_type == "Softwood" else "res_heat_wood_hardwood_cord"
+            if factor_key: heat_fp = monthly_heat * factors.get(factor_key, 0)
+        components["Heating"] = heat_fp
+        total_co2e += heat_fp
+
+        # Water Heat
+        water_type = details.get("water_heater_type")
+        monthly_water = get_monthly_average(get_float_or_zero(details.get("water_usage_amount")), details.get("water_usage_period", "Monthly"))
+        water_fp = 0.0
+        if monthly_water > 0 and water_type != "None":
+            factor_key = None
+            if water_type == "Electric": factor_key = "res_water_elec_kwh"
+            elif water_type == "Natural Gas": factor_key = "res_water_gas_therm"
+            elif water_type == "Solar Thermal": factor_key = "res_water_solar_thermal_kwh"
+            if factor_key: water_fp = monthly_water * factors.get(factor_key, 0)
+        components["Water Heating"] = water_fp
+        total_co2e += water_fp
+
+        # Renewables (Savings)
+        renew_type = details.get("renew_type")
+        monthly_renew = get_monthly_average(get_float_or_zero(details.get("renew_kwh_gen")), details.get("renew_period", "Monthly"))
+        renew_fp = 0.0
+        if monthly_renew > 0 and renew_type != "None":
+             factor_key = "res_renew_solar_panels_kwh" if renew_type == "Solar Panels" else "res_renew_wind_turbines_kwh"
+             renew_fp = monthly_renew * factors.get(factor_key, 0) # Factor is negative
+        components["Renewables"] = renew_fp
+        total_co2e += renew_fp
+
+    # --- Transportation ---
+    elif category == "travel":
+        mode = details.get("mode")
+        distance_km = get_float_or_zero(details.get("distance"))
+        period = details.get("period", "Per Trip") # Already validated
+
+        # Get base factor (per km or pkm) and multipliers
+        factor_val, is_pkm, multiplier, occupancy = 0.0, False, 1.0, 1
+        if mode == "Car":
+            fuel = details.get("car_fuel_type"); f_key = {"Gasoline": "trans_pv_gasoline_km", "Diesel": "trans_pv_diesel_km", "Electric": "trans_pv_electric_km"}.get(fuel); factor_val = factors.get(f_key, 0); is_pkm = False
+        elif mode == "Motorcycle": factor_val = factors.get("trans_pub_motorcycle_pkm", 0); is_pkm = True
+        elif mode == "Bus": factor_val = factors.get("trans_pub_bus_pkm", 0); is_pkm = True
+        elif mode == "Train": factor_val = factors.get("trans_pub_train_pkm", 0); is_pkm = True
+        elif mode == "Subway": factor_val = factors.get("trans_pub_subway_pkm", 0); is_pkm = True
+        elif mode == "Jeepney": factor_val = factors.get("trans_pub_jeepney_pkm", 0); is_pkm = True
+        elif mode == "Air Travel":
+            flight_type = details.get("flight_type") or "Medium"; cabin = details.get("flight_cabin")
+            f_key = {"Short": "trans_air_short_pkm", "Medium": "trans_air_medium_pkm", "Long": "trans_air_long_pkm"}.get(flight_type.split()[0], "trans_air_medium_pkm") # Approx match
+            factor_val = factors.get(f_key, 0); is_pkm = True
+            m_key = {"Economy": "trans_air_cabin_economy", "Business": "trans_air_cabin_business", "First": "trans_air_cabin_first"}.get(cabin, "trans_air_cabin_economy")
+            multiplier = factors.get(m_key, 1.0)
+        elif mode == "Rideshare":
+            fuel = details.get("rideshare_fuel_type"); passengers = get_int_or_zero(details.get("rideshare_passengers")); occupancy = max(1, passengers)
+            f_key = {"Gasoline": "trans_pv_gasoline_km", "Diesel": "trans_pv_diesel_km", "Electric": "trans_pv_electric_km"}.get(fuel); factor_val = factors.get(f_key, 0); is_pkm = False
+
+        # Calculate footprint for the distance
+        trip_fp = 0
+        if is_pkm: trip_fp = distance_km * factor_val * multiplier
+        else: trip_fp = (distance_km * factor_val * multiplier) / occupancy
+
+        # Convert trip footprint to monthly average based on period
+        total_co2e = get_monthly_average(trip_fp, period)
+        components[mode or "Travel"] = total_co2e
+
+    # --- Food ---
+    elif category == "food":
+        consumption_period = details.get("consumption_period", "Per Week")
+        monthly_prod_fp = 0.0
+        total_monthly_kg = 0 # Track total kg for regional adjustments
+
+        for input_key, factor_info in FOOD_INPUTS_MAP.items():
+            amount_kg = get_float_or_zero(details.get(input_key))
+            if amount_kg <= 0: continue
+
+            monthly_kg = get_monthly_average(amount_kg, consumption_period)
+            total_monthly_kg += monthly_kg # Accumulate total for regional adjustment later
+
+            factor_val = 0
+            if isinstance(factor_info, tuple): # Average factors if tuple provided
+                 f_vals = [factors.get(f_key, 0) for f_key in factor_info]
+                 factor_val = sum(f_vals) / len(f_vals) if f_vals else 0
+            else: # Single factor key
+                 factor_val = factors.get(factor_info, 0)
+
+            monthly_prod_fp += monthly_kg * factor_val
+
+        # Apply Multipliers
+        local = details.get("local_sourcing") or "Medium"; organic = details.get("organic_preference", False); packaging = details.get("packaging_level") or "Average"
+        local_mult = {"Low": 1.05, "Medium": 1.0, "High": 0.90}.get(local.split()[0], 1.0)
+        fert_conv = factors.get("food_farm_fertilizer_conventional_kgN", 1.0); fert_org = factors.get("food_farm_fertilizer_organic_kgN", 1.0); base_fert = (fert_conv + fert_org) / 2.0
+        fert_mult = (fert_org / base_fert) if organic and base_fert > 0 else ((fert_conv / base_fert) if base_fert > 0 else 1.0)
+        pkg_mult = {"Minimal": 0.95, "Average": 1.0, "Mostly": 1.10}.get(packaging.split()[0], 1.0)
+        adjusted_fp = monthly_prod_fp * local_mult * fert_mult * pkg_mult
+        components["Food Production"] = adjusted_fp
+
+        # Regional Additive Adjustment
+        region_adj_fp = 0.0
+        region = details.get("region", "Luzon")
+        if total_monthly_kg > 0:
+            region_factor, = regional_factors(factors).get("food", region)
+            if region_factor != 0:
+                 region_adj_fp = total_monthly_kg * region_factor
+        components["Regional Adjustment"] = region_adj_fp
+
+        total_co2e = adjusted_fp + region_adj_fp
+
+    # --- Goods & Waste (Was Shopping Before Waste Research was Unavailable) ---
+    elif category == "shopping":
+        # Spending
+        spending_period = details.get("spending_period", "Monthly")
+        area_type = details.get("area_type_retail") or "Urban"
+        region_mult, *landfill_factors = regional_factors(factors).get("shopping", area_type)
+        period_spending_fp = 0.0
+        usd_conv = 1.0 / php_per_usd if php_per_usd > 0 else 0
+
+        for input_key, factor_key in SPENDING_CATS_MAP.items():
+             php_amount = get_float_or_zero(details.get(input_key))
+             if php_amount > 0 and usd_conv > 0:
+                  usd_amount = php_amount * usd_conv
+                  base_factor = factors.get(factor_key, 0)
+                  period_spending_fp += usd_amount * base_factor
+
+        period_spending_fp *= region_mult
+        monthly_spending_fp = get_monthly_average(period_spending_fp, spending_period)
+        components["Goods Spending"] = monthly_spending_fp
+
+        # Waste
+        waste_kg = get_float_or_zero(details.get("waste_kg"))
+        monthly_waste_fp = 0.0
+        if waste_kg > 0:
+            waste_period = details.get("waste_period", "Per Week")
+            disposal = details.get("waste_disposal") or "Unknown"
+            monthly_waste_kg = get_monthly_average(waste_kg, waste_period)
+
+            waste_factor = 0.0
+            if "Recycling" in disposal: waste_factor = factors.get("waste_recycle_avg_mix_kg_kg", 0)
+            elif "Incineration" in disposal: waste_factor = factors.get("waste_incineration_kg_kg", 0)
+            else: # Landfill (regional override already resolved)
+                 lf_level = next((i for i, level in enumerate(LANDFILL_METHANE_LEVELS) if level in disposal), 1) # Default Medium/Unknown
+                 waste_factor = landfill_factors[lf_level]
+            monthly_waste_fp = monthly_waste_kg * waste_factor
+        components["Waste"] = monthly_waste_fp
+
+        total_co2e = monthly_spending_fp + monthly_waste_fp
+
+    # --- Services ---
+    elif category == "services":
+        area_type = details.get("area_type_services") or "Urban"
+        dc_factor, ls_factor = regional_factors(factors).get("services", area_type)
+        dc_kg = get_float_or_zero(details.get("dry_cleaning_kg"))
+        ls_m2 = get_float_or_zero(details.get("landscaping_m2"))
+        dc_period = details.get("dry_cleaning_period", "Per Month")
+        ls_period = details.get("landscaping_period", "Per Month")
+
+        # Dry Cleaning
+        monthly_dc_fp = 0.0
+        if dc_kg > 0:
+            monthly_dc_kg = get_monthly_average(dc_kg, dc_period)
+            monthly_dc_fp = monthly_dc_kg * dc_factor
+        components["Dry Cleaning"] = monthly_dc_fp
+
+        # Landscaping
+        monthly_ls_fp = 0.0
+        if ls_m2 > 0:
+            monthly_ls_m2 = get_monthly_average(ls_m2, ls_period)
+            monthly_ls_fp = monthly_ls_m2 * ls_factor
+        components["Landscaping"] = monthly_ls_fp
+
+        total_co2e = monthly_dc_fp + monthly_ls_fp
+
+    # --- Digital ---
+    elif category == "digital":
+        region = details.get("region_grid") or "Luzon"
+        grid_factor, = regional_factors(factors).get("digital", region)
+
+        # Device energy (kWh/day)
+        dev_kwh = (get_float_or_zero(details.get("laptop_hours")) * factors.get("digital_laptop_kwh_hour",0) +
+                   get_float_or_zero(details.get("mobile_hours")) * factors.get("digital_mobile_kwh_hour",0) +
+                   get_float_or_zero(details.get("tablet_hours")) * factors.get("digital_tablet_kwh_hour",0))
+
+        # Stream/Game energy (kWh/day)
+        sq = details.get("streaming_quality") or "Medium"; sh = get_float_or_zero(details.get("streaming_hours"))
+        gt = details.get("gaming_type") or "Low"; gh = get_float_or_zero(details.get("gaming_hours"))
+        stream_f = factors.get({"Low": "digital_stream_low_kwh_hour", "High": "digital_stream_high_kwh_hour"}.get(sq.split()[0], "digital_stream_medium_kwh_hour"), 0)
+        game_f = factors.get({"Low": "digital_game_low_kwh_hour", "High": "digital_game_high_kwh_hour"}.get(gt.split()[0], "digital_game_low_kwh_hour"), 0)
+        sg_kwh = (sh * stream_f) + (gh * game_f)
+
+        # Data energy (kWh/day)
+        data_gb = get_float_or_zero(details.get("data_usage_gb"))
+        data_period = details.get("data_period", "Per Month")
+        daily_data_gb = get_monthly_average(data_gb, data_period) / DAYS_PER_MONTH # Convert monthly avg GB to daily avg GB
+        data_kwh_f = factors.get("digital_datacenter_kwh_gb", 0) + factors.get("digital_network_kwh_gb", 0)
+        data_kwh = daily_data_gb * data_kwh_f
+
+        region_key = grid_region_key(region)
+        if grid is not None and grid.has_region(region_key):
+            # Hourly profile: each use weighted by the grid intensity of its usage window
+            intensity = functools.partial(grid.intensity, region_key)
+            components["Devices"] = dev_kwh * intensity(details.get("device_window")) * DAYS_PER_MONTH
+            components["Streaming & Gaming"] = (sh * stream_f * intensity(details.get("streaming_window")) +
+                                                gh * game_f * intensity(details.get("gaming_window"))) * DAYS_PER_MONTH
+            components["Data"] = data_kwh * intensity(None) * DAYS_PER_MONTH # Spread over the day
+            total_co2e = sum(components.values())
+        else:
+            # Total daily kWh and monthly CO2e
+            total_kwh_day = dev_kwh + sg_kwh + data_kwh
+            total_co2e = total_kwh_day * grid_factor * DAYS_PER_MONTH
+            components["Devices"] = dev_kwh * grid_factor * DAYS_PER_MONTH
+            components["Streaming & Gaming"] = sg_kwh * grid_factor * DAYS_PER_MONTH
+            components["Data"] = data_kwh * grid_factor * DAYS_PER_MONTH
+
+    return total_co2e, components
+
+# IVO-ONLY
+# --- Headless Batch Calculator (python ECOHUB.py calc) ---
+CALC_BATCH_SIZE = 4096 # JSONL lines read, scored and written per batch engine pass
+CALC_MEMO_MAX = 8192 # Distinct inputs the scoring memo keeps (about 2 KB each), oldest dropped first
+
+class ScoringMemo:
+    """Validation results and footprints of inputs already scored, shared across scoring calls.
+
+    Both tables keep insertion order, so trim() drops the oldest entries and memory stays
+    bounded on endless streams of distinct inputs; an input evicted while still in use is
+    simply scored again. Hits are not reordered, keeping them as cheap as a dict lookup.
+    """
+    __slots__ = ("inputs", "footprints")
+
+    def __init__(self):
+        self.inputs = {} # (category, detail items, value types) -> (errors, ActivityRecord or None)
+        self.footprints = {} # _iter_batch memo key -> footprint
+
+    def trim(self, limit=CALC_MEMO_MAX):
+        """Drops the oldest entries of either table beyond limit."""
+        for table in (self.inputs, self.footprints):
+            for key in list(itertools.islice(table, len(table) - limit)) if len(table) > limit else ():
+                del table[key]
+
+def _score_records(records, factors, exchange_rates=None, grid_profiles=None, memo=None):
+    """Validates and scores activity mappings with the batch engine, as submit_activity would.
+
+    records have "category", "activity_details" and an optional "timestamp". Returns
+    [footprint, errors, timestamp] per record, in order: errors is a tuple of messages
+    (footprint None when non-empty) and timestamp the record's own, or now if it has none.
+    Each distinct input is validated and compacted once.
+    """
+    memo = memo if memo is not None else ScoringMemo()
+    memo.trim()
+    now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    outcomes, activities, timestamps, slots = [], [], [], []
+    for record in records:
+        timestamp = record.get("timestamp") or now
+        outcome = [None, (), timestamp]
+        outcomes.append(outcome)
+        category, details = record.get("category"), record.get("activity_details")
+        if not isinstance(category, str) or category not in BASE_CATEGORIES: # str first: a list is unhashable
+            outcome[1] = (f"Unknown category: {category!r}.",)
+            continue
+        if not isinstance(timestamp, str):
+            outcome[1] = ("'timestamp' must be a string like 2025-01-31 18:30:00.",)
+            continue
+        if not isinstance(details, Mapping):
+            outcome[1] = ("'activity_details' must be an object.",)
+            continue
+        key = (category, tuple(details.items()), tuple(map(type, details.values()))) # Types too, since 1 == 1.0 == True
+        try:
+            entry = memo.inputs.get(key)
+        except TypeError: # A list or object among the details
+            outcome[1] = ("'activity_details' values must be numbers, strings or null.",)
+            continue
+        if entry is None:
+            errors = tuple(validate_activity_inputs(category, details))
+            entry = memo.inputs[key] = (errors, None if errors else ActivityRecord(None, category, details))
+        if entry[0]:
+            outcome[1] = entry[0]
+        else:
+            activities.append(entry[1])
+            timestamps.append(str(timestamp))
+            slots.append(outcome)
+
+    batch = _iter_batch(activities, range(len(activities)), factors, exchange_rates or current_exchange_rates(), grid_profiles, timestamps)
+    for index, activity, key, period_factors, rate, grid in batch:
+        outcome = slots[index]
+        footprint = memo.footprints.get(key)
+        if footprint is None:
+            try:
+                footprint = _activity_footprint(activity, period_factors, rate, grid)
+            except KeyError as e:
+                outcome[1] = (f"Missing emission factor: {e}.",)
+                continue
+            except (TypeError, ValueError, AttributeError, ArithmeticError) as e: # A bad record never ends the batch
+                outcome[1] = (f"Calculation error: {e}",)
+                continue
+            memo.footprints[key] = footprint
+        outcome[0] = footprint
+    return outcomes
+
+def score_activities(records, factors, factor_set, exchange_rates=None, grid_profiles=None, memo=None):
+    """Copies of activity dicts with timestamp, carbon_footprint, factor_set and "errors" filled in.
+
+    See _score_records; factor_set and the category's rate or grid stamp (see input_stamps)
+    are only set on records that got a footprint.
+    """
+    stamps = input_stamps(exchange_rates, grid_profiles)
+    return [_enriched_record(record, outcome, factor_set, stamps)
+            for record, outcome in zip(records, _score_records(records, factors, exchange_rates, grid_profiles, memo))]
+
+def _enriched_record(record, outcome, factor_set, stamps):
+    footprint, errors, timestamp = outcome
+    result = dict(record, timestamp=timestamp, carbon_footprint=footprint, errors=list(errors))
+    for field in ("factor_set",) + INPUT_STAMP_FIELDS:
+        result.pop(field, None)
+    if footprint is not None:
+        result["factor_set"] = factor_set
+        result.update(stamps.get(record.get("category"), {}))
+    return result
+
+def run_calc_cli(argv=None):
+    """`python ECOHUB.py calc [INPUT] [-o OUTPUT] [--factor-set VERSION]`; returns the exit status.
+
+    Streams one activity JSON object per line (the activities file schema) and writes each
+    line back with timestamp, carbon_footprint, the input stamps and "errors" added (see
+    score_activities), CALC_BATCH_SIZE lines at a time, so memory stays flat however long the
+    input. Lines that are not JSON objects come back as {"line", "errors"}. Invalid records
+    are reported in-band; the status is non-zero only for usage or I/O errors.
+    """
+    parser = argparse.ArgumentParser(prog="ECOHUB.py calc", description="Score JSONL activity records without the GUI.")
+    parser.add_argument("input", nargs="?", default="-", help="JSONL file of activities (default: stdin)")
+    parser.add_argument("-o", "--output", default="-", help="file for the enriched JSONL (default: stdout)")
+    parser.add_argument("--factor-set", help="factor set version to score with (default: the current emission_factors.csv)")
+    args = parser.parse_args(argv)
+
+    load_emission_factors()
+    version = args.factor_set or app_state["factor_set_version"]
+    factors = get_factor_set(version)
+    if factors is None:
+        parser.error(f"unknown factor set version: {version}")
+    exchange_rates, grid_profiles = load_exchange_rates(), load_grid_profiles()
+    stamps = input_stamps(exchange_rates, grid_profiles)
+    stamps_json = {category: "".join(f', "{field}": {json.dumps(value)}' for field, value in fields.items())
+                   for category, fields in stamps.items()}
+    version_json = json.dumps(version)
+
+    try:
+        source = sys.stdin if args.input == "-" else open(args.input, 'r', encoding='utf-8')
+        sink = sys.stdout if args.output == "-" else open(args.output, 'w', encoding='utf-8')
+    except OSError as e:
+        logging.error("Cannot open %s", e)
+        return 1
+
+    memo = ScoringMemo()
+    decode = json.JSONDecoder().raw_decode # Lines are already stripped, so skip loads()' whitespace handling
+    total = failed = 0
+    start = time.perf_counter()
+    lines = enumerate(source, 1)
+    try:
+        while True:
+            chunk = list(itertools.islice(lines, CALC_BATCH_SIZE))
+            if not chunk:
+                break
+            parsed = [] # (line_no, text, record or None, error)
+            for line_no, line in chunk:
+                text = line.strip()
+                if not text:
+                    continue
+                try:
+                    record, end = decode(text)
+                    if end != len(text): raise ValueError(f"Extra data at column {end + 1}")
+                except ValueError as e:
+                    parsed.append((line_no, text, None, f"Invalid JSON: {e}"))
+                    continue
+                parsed.append((line_no, text, record, None) if isinstance(record, dict) else (line_no, text, None, "Expected a JSON object."))
+            records = [record for _, _, record, _ in parsed if record is not None]
+            outcomes = iter(_score_records(records, factors, exchange_rates, grid_profiles, memo))
+
+            output, footprint_json = [], {}
+            for line_no, text, record, error in parsed:
+                if record is None:
+                    output.append(json.dumps({"line": line_no, "errors": [error]}, ensure_ascii=False))
+                    failed += 1
+                    continue
+                outcome = next(outcomes)
+                footprint, errors, _ = outcome
+                failed += bool(errors)
+                if record.get("timestamp") and record.keys().isdisjoint(("carbon_footprint", "factor_set", "errors") + INPUT_STAMP_FIELDS):
+                    # Append the new fields to the line as read instead of re-encoding the whole record
+                    if errors:
+                        output.append(f'{text[:-1]}, "carbon_footprint": null, "errors": {json.dumps(errors, ensure_ascii=False)}}}')
+                    else:
+                        number = footprint_json.get(footprint)
+                        if number is None: number = footprint_json[footprint] = json.dumps(footprint)
+                        output.append(f'{text[:-1]}, "carbon_footprint": {number}, "errors": [], "factor_set": {version_json}{stamps_json[record["category"]]}}}')
+                    continue
+                output.append(json.dumps(_enriched_record(record, outcome, version, stamps), ensure_ascii=False))
+            total += len(output)
+            sink.write("\n".join(output) + "\n" if output else "")
+        sink.flush()
+    except OSError as e:
+        logging.error("Batch calculation stopped after %s records: %s", total, e)
+        return 1
+    finally:
+        if source is not sys.stdin: source.close()
+        if sink is not sys.stdout: sink.close()
+
+    elapsed = time.perf_counter() - start
+    logging.info("Scored %s records (%s with errors) in %.2fs with factor set %s.", total, failed, elapsed, version)
+    return 0
+
+# IVO-ONLY
+# --- Local HTTP API (python ECOHUB.py serve) ---
+API_DEFAULT_HOST = "127.0.0.1" # Loopback only: the API has no authentication
+API_DEFAULT_PORT = 8765
+API_MAX_HEADER_BYTES = 16 * 1024 # Request line + headers
+API_MAX_BODY_BYTES = 4 * 1024 * 1024
+API_IDLE_TIMEOUT_S = 30 # Keep-alive connections idle this long are closed
+API_HISTORY_LIMIT = 1000 # Default and largest page of GET /users/<id>/activities
+API_IO_WORKERS = 8 # Threads doing the API's file work (one user at a time each)
+
+class ApiError(Exception):
+    """An error response: HTTP status, message and optional extra JSON fields."""
+
+    def __init__(self, status, message, **fields):
+        super().__init__(message)
+        self.status = status
+        self.payload = {"error": message, **fields}
+
+class UserActivityStore:
+    """Per-user settings, activities and log for the local API, via read_user_file / write_user_files.
+
+    Each operation on a user holds that user's asyncio.Lock and runs on a worker thread, so the
+    event loop (and other users' requests) never wait on that user's disk I/O. Loaded users stay
+    in a UserDataCache of their own, which reloads a user whose files changed on disk (e.g.
+    saved by the app in the meantime).
+
+    Writes are checked against the file stamps taken when the state was read, so a save never
+    overwrites one made by another process in between (the request fails with 409 instead).
+    That check cannot reach into a running app: it keeps its own copy in memory, and its next
+    save is refused once the API has written, so the API must not write to a profile the app
+    has open.
+    """
+
+    def __init__(self, workers=API_IO_WORKERS):
+        # Its own pool, so the API's disk work never queues behind other run_in_executor users
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ecohub-api")
+        self._cache = UserDataCache()
+        self._cache_lock = threading.Lock() # The cache is shared by the worker threads of different users
+        self._locks = {} # user_id -> asyncio.Lock
+        self._stamps = {} # user_id -> file stamps of its cached state, see write_user_files
+
+    async def run(self, user_id, func, *args):
+        """Awaits func(state, *args) on a worker thread with user_id's lock held."""
+        lock = self._locks.get(user_id)
+        if lock is None:
+            lock = self._locks[user_id] = asyncio.Lock()
+        async with lock:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, self._call, user_id, func, args)
+
+    def _call(self, user_id, func, args):
+        with self._cache_lock:
+            state = self._cache.get(user_id)
+        if state is None:
+            stamps = _get_user_file_stamps(user_id) # Before reading, as load_user_data does
+            state = {key: read_user_file(user_id, key) for key in USER_DATA_KEYS}
+            with self._cache_lock:
+                self._cache.put(user_id, state)
+                self._stamps[user_id] = stamps
+        return func(state, *args)
+
+    def save(self, user_id, state, keys):
+        """write_user_files from inside run(); re-stamps the cache entry, or drops it on failure.
+
+        Raises ApiError 409 if the files changed on disk since state was read.
+        """
+        try:
+            saved = write_user_files(user_id, state, keys, self._stamps[user_id])
+        except UserFilesChanged as e:
+            with self._cache_lock:
+                self._cache.invalidate(user_id) # The next request reads the files again
+            raise ApiError(409, f"Not saved: {e} (is the profile open in the app?). Retry to apply it to the current data.")
+        with self._cache_lock:
+            if saved: self._cache.put(user_id, state)
+            else: self._cache.invalidate(user_id) # Memory no longer matches disk
+        return saved
+
+def _history_filter(query):
+    """Predicate for the ?category=&start=&end= query (ISO days, end exclusive); ApiError if malformed."""
+    category = query.get("category")
+    if category is not None and category not in BASE_CATEGORIES:
+        raise ApiError(400, f"Unknown category: {category!r}.")
+    bounds = []
+    for name in ("start", "end"):
+        value = query.get(name)
+        try:
+            bounds.append(datetime.date.fromisoformat(value).isoformat() if value else None)
+        except ValueError:
+            raise ApiError(400, f"'{name}' must be a date like 2025-01-31.")
+    start, end = bounds
+
+    def matches(activity):
+        if category is not None and activity.get("category") != category:
+            return False
+        day = str(activity.get("timestamp", ""))[:10]
+        return (start is None or day >= start) and (end is None or day < end)
+    return matches
+
+def _query_int(query, name, default, maximum=None):
+    try:
+        value = int(query.get(name, default))
+    except ValueError:
+        raise ApiError(400, f"'{name}' must be a whole number.")
+    if value < 0 or (maximum is not None and value > maximum):
+        raise ApiError(400, f"'{name}' must be from 0 to {maximum}." if maximum is not None else f"'{name}' must not be negative.")
+    return value
+
+def _page_of_history(state, matches, offset, limit):
+    matched = [activity for activity in state["activities"] if matches(activity)]
+    return {"total": len(matched), "offset": offset, "limit": limit,
+            "activities": [activity.to_dict() if isinstance(activity, ActivityRecord) else activity
+                           for activity in matched[offset:offset + limit]]}
+
+def _aggregate_history(state, matches):
+    matched = [activity for activity in state["activities"] if matches(activity)]
+    by_month = {}
+    for activity in matched:
+        try: footprint = float(activity.get("carbon_footprint"))
+        except (ValueError, TypeError): continue # Ignore invalid values, as aggregate_category_totals does
+        month = str(activity.get("timestamp", ""))[:7]
+        by_month[month] = by_month.get(month, 0.0) + footprint
+    by_category = aggregate_category_totals(matched)
+    return {"activity_count": len(matched), "total_kg": round(sum(by_category.values()), 3),
+            "by_category": {cat: round(kg, 3) for cat, kg in by_category.items()},
+            "by_month": {month: round(kg, 3) for month, kg in sorted(by_month.items())}}
+
+def _reload_changed_factors():
+    """Reloads emission factors, exchange rates or grid profiles whose files were edited (run on a worker thread)."""
+    if load_factor_catalog().get("version") != app_state.get("factor_set_version"):
+        load_emission_factors()
+        logging.info("Local API: emission factors reloaded (factor set %s).", app_state["factor_set_version"])
+    elif exchange_rates_changed(current_exchange_rates()):
+        logging.info("Local API: exchange rates reloaded (%s).", load_exchange_rates().version)
+    elif grid_profiles_changed(current_grid_profiles()):
+        logging.info("Local API: grid profiles reloaded (%s).", load_grid_profiles().version)
+
+class LocalApiServer:
+    """A small HTTP/1.1 JSON service over asyncio streams (standard library only).
+
+    POST /calculate                 {category, activity_details[, timestamp]} or a list of them
+    POST /users/<id>/activities     scores and stores one activity, like Add Activity
+    GET  /users/<id>/activities     ?category=&start=&end=&offset=&limit= history page
+    GET  /users/<id>/aggregates     ?category=&start=&end= totals by category and month
+
+    Calculations are in-band like `calc` (records carry "errors"); storing an invalid activity
+    is a 422. New calculations follow edits to the factor, rate and grid profile files; stored
+    footprints are left to the app's Recalculate Footprints. Do not add activities to a profile
+    that is open in the app (see UserActivityStore): the app would refuse its next save.
+    """
+
+    def __init__(self, store=None):
+        self.store = store or UserActivityStore()
+        self.watcher = None # watch_factor_files task, see start_api_server
+        self._memo, self._memo_for = ScoringMemo(), None
+        self._memo_lock = threading.Lock() # Scoring runs on the store's worker threads, which share the memo
+
+    async def handle_connection(self, reader, writer):
+        """Serves requests on one connection until it closes, idles out or asks to close."""
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), API_IDLE_TIMEOUT_S)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    writer.write(self._response(431, {"error": "Request headers too large."}, False))
+                    break
+                keep_alive, status, payload = await self._handle_request(head, reader)
+                writer.write(self._response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_request(self, head, reader):
+        """(keep_alive, status, payload) for the request whose head was read."""
+        request_line, *header_lines = head.decode("latin-1").rstrip("\r\n").split("\r\n")
+        try:
+            method, target, version = request_line.split(" ")
+        except ValueError:
+            return False, 400, {"error": "Malformed request line."}
+        headers = {}
+        for line in header_lines:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+        if "transfer-encoding" in headers:
+            return False, 411, {"error": "Send the body with a Content-Length."}
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            return False, 400, {"error": "Invalid Content-Length."}
+        if length < 0 or length > API_MAX_BODY_BYTES:
+            return False, 413, {"error": f"Body larger than {API_MAX_BODY_BYTES} bytes."}
+        try:
+            body = await reader.readexactly(length) if length else b""
+        except asyncio.IncompleteReadError:
+            return False, 400, {"error": "Body shorter than its Content-Length."}
+
+        start = time.perf_counter()
+        try:
+            status, payload = await self._dispatch(method, target, body)
+        except ApiError as e:
+            status, payload = e.status, e.payload
+        except Exception:
+            logging.exception("Local API: %s %s failed", method, target)
+            status, payload = 500, {"error": "Internal server error."}
+        if perf_monitor.enabled:
+            perf_monitor.record("api_request", (time.perf_counter() - start) * 1000.0)
+        logging.debug("Local API: %s %s -> %s", method, target, status)
+        return keep_alive, status, payload
+
+    @staticmethod
+    def _response(status, payload, keep_alive):
+        body = json.dumps(payload, ensure_ascii=False, default=_json_default).encode("utf-8")
+        head = (f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\nContent-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        return head.encode("latin-1") + body
+
+    async def _dispatch(self, method, target, body):
+        url = urllib.parse.urlsplit(target)
+        parts = [urllib.parse.unquote(part) for part in url.path.strip("/").split("/")]
+        query = dict(urllib.parse.parse_qsl(url.query))
+
+        if parts == ["calculate"]:
+            self._allow(method, "POST")
+            return 200, await self._calculate(self._json_body(body))
+        if len(parts) == 3 and parts[0] == "users" and parts[2] in ("activities", "aggregates"):
+            user_id, resource = parts[1], parts[2]
+            self._allow(method, "GET", "POST" if resource == "activities" else "GET")
+            await self._require_user(user_id)
+            if resource == "aggregates":
+                return 200, await self.store.run(user_id, _aggregate_history, _history_filter(query))
+            if method == "POST":
+                return 201, await self._add_activity(user_id, self._json_body(body))
+            limit = _query_int(query, "limit", API_HISTORY_LIMIT, API_HISTORY_LIMIT)
+            return 200, await self.store.run(user_id, _page_of_history, _history_filter(query), _query_int(query, "offset", 0), limit)
+        raise ApiError(404, f"No endpoint at {url.path}.")
+
+    @staticmethod
+    def _allow(method, *methods):
+        if method not in methods:
+            raise ApiError(405, f"Use {' or '.join(sorted(set(methods)))}.")
+
+    @staticmethod
+    def _json_body(body):
+        try:
+            return json.loads(body)
+        except ValueError as e: # Includes undecodable UTF-8
+            raise ApiError(400, f"Invalid JSON body: {e}")
+
+    async def _require_user(self, user_id):
+        if user_id in app_state["user_profiles"]:
+            return
+        # Possibly created in the app since the profiles were read
+        await asyncio.get_running_loop().run_in_executor(self.store.executor, load_user_profiles_from_csv)
+        if user_id not in app_state["user_profiles"]:
+            raise ApiError(404, f"Unknown user: {user_id}.")
+
+    def _scoring_context(self):
+        """(factor set version, factors, rates, grid profiles, memo) in force now; the memo is only reused while they are."""
+        version, rates, grid_profiles = app_state["factor_set_version"], current_exchange_rates(), current_grid_profiles()
+        if self._memo_for != (version, rates, grid_profiles):
+            self._memo, self._memo_for = ScoringMemo(), (version, rates, grid_profiles)
+        return version, get_factor_set(version), rates, grid_profiles, self._memo
+
+    def _score(self, records):
+        """(factor set version, score_activities results) under the current context (worker thread, one at a time)."""
+        with self._memo_lock:
+            version, factors, rates, grid_profiles, memo = self._scoring_context()
+            return version, score_activities(records, factors, version, rates, grid_profiles, memo)
+
+    async def _score_off_loop(self, records):
+        """_score on the store's thread pool, so a large batch does not hold up other connections."""
+        if not all(isinstance(record.get("category"), str) for record in records):
+            raise ApiError(400, "'category' must be a string.")
+        return await asyncio.get_running_loop().run_in_executor(self.store.executor, self._score, records)
+
+    async def _calculate(self, body):
+        records = body if isinstance(body, list) else [body]
+        if not records or len(records) > CALC_BATCH_SIZE or not all(isinstance(record, dict) for record in records):
+            raise ApiError(400, f"Send an activity object or a list of 1 to {CALC_BATCH_SIZE} of them.")
+        _, results = await self._score_off_loop(records)
+        return results if isinstance(body, list) else results[0]
+
+    async def _add_activity(self, user_id, body):
+        if not isinstance(body, dict):
+            raise ApiError(400, "Send one activity object.")
+        timestamp = body.get("timestamp")
+        if timestamp is not None:
+            try: datetime.datetime.strptime(str(timestamp), "%Y-%m-%d %H:%M:%S")
+            except ValueError: raise ApiError(400, "'timestamp' must look like 2025-01-31 18:30:00.")
+        version, (result,) = await self._score_off_loop([body])
+        if result["errors"]:
+            raise ApiError(422, "Invalid activity.", errors=result["errors"])
+        record = ActivityRecord(result["timestamp"], result["category"], body["activity_details"], result["carbon_footprint"],
+                                factor_set=version, exchange_rates=result.get("exchange_rates"), grid_profiles=result.get("grid_profiles"))
+        return await self.store.run(user_id, self._append_activity, user_id, record)
+
+    def _append_activity(self, state, user_id, record):
+        """Appends record and its log entry to a loaded user state and saves both files (worker thread)."""
+        activity_log = state["activity_log"]
+        state["activities"].append(record)
+        activity_log.append({"timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                             "action": f"Added {record.category.title()} activity ({record.carbon_footprint:.2f} kg CO₂e) via local API"})
+        del activity_log[:-MAX_ACTIVITY_LOG_SIZE]
+        if not self.store.save(user_id, state, ("activities", "activity_log")):
+            raise ApiError(500, "Could not save the activity. Please check logs.")
+        return record.to_dict()
+
+    async def watch_factor_files(self):
+        """Background task: stat-polls the factor, rate and grid profile files like the app session does."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(FACTOR_WATCH_POLL_MS / 1000.0)
+            try:
+                await loop.run_in_executor(self.store.executor, _reload_changed_factors)
+            except Exception:
+                logging.exception("Emission factor file check failed")
+
+def _prepare_api_state():
+    load_emission_factors()
+    load_exchange_rates()
+    load_grid_profiles()
+    load_user_profiles_from_csv()
+
+async def start_api_server(host=API_DEFAULT_HOST, port=API_DEFAULT_PORT):
+    """Loads factors and profiles, then starts the local API; returns the asyncio.Server (port 0 picks a free one)."""
+    await asyncio.get_running_loop().run_in_executor(None, _prepare_api_state)
+    api = LocalApiServer()
+    server = await asyncio.start_server(api.handle_connection, host, port, limit=API_MAX_HEADER_BYTES)
+    api.watcher = asyncio.create_task(api.watch_factor_files()) # Lives as long as the server holds api
+    return server
+
+def run_api_server(argv=None):
+    """`python ECOHUB.py serve [--host HOST] [--port PORT]`: runs the local API until interrupted."""
+    parser = argparse.ArgumentParser(prog="ECOHUB.py serve", description="Serve footprint calculations and history over local HTTP.")
+    parser.add_argument("--host", default=API_DEFAULT_HOST, help=f"interface to listen on (default: {API_DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=API_DEFAULT_PORT, help=f"TCP port (default: {API_DEFAULT_PORT})")
+    args = parser.parse_args(argv)
+
+    async def serve():
+        server = await start_api_server(args.host, args.port)
+        for sock in server.sockets:
+            logging.info("Local API listening on http://%s:%s", *sock.getsockname()[:2])
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        logging.info("Local API stopped.")
+    except OSError as e:
+        logging.error("Local API could not start: %s", e)
+        return 1
+    return 0
+
+# IVO-ONLY
+# --- Headless Entry Point: nothing below this line is needed without the GUI ---
+if HEADLESS:
+    command = sys.argv[1]
+    configure_logging(os.environ.get("ECOHUB_LOG_LEVEL", "WARNING" if command == "calc" else "INFO").upper())
+    sys.exit({"calc": run_calc_cli, "serve": run_api_server}[command](sys.argv[2:]))
+
+# IVO+GPT
+# --- Cooperative UI Work Scheduler ---
+class UIWorkScheduler:
+    """Runs long UI jobs in small time slices on the Tk event loop.
+
+    A job is an iterator (each next() performs one unit of work, e.g. one Treeview row) or a
+    plain callable. Each slice runs jobs in priority order (lower value first, FIFO within a
+    priority) until the frame budget is spent, then yields to Tk via after(0) so input and
+    redraws are handled before the next slice. Jobs can be tagged with an owner (usually a
+    page) and cancelled together when that owner is destroyed.
+    """
+    PRIORITY_HIGH = 0
+    PRIORITY_NORMAL = 10
+    PRIORITY_LOW = 20
+
+    # IVO+GPT
+    def __init__(self, root, frame_budget_ms=UI_FRAME_BUDGET_MS):
+        self.root = root
+        self.frame_budget = frame_budget_ms / 1000.0
+        self._queue = [] # Heap of (priority, seq, job)
+        self._seq = itertools.count()
+        self._after_id = None
+
+    # IVO+GPT
+    def submit(self, work, priority=PRIORITY_NORMAL, owner=None, on_done=None):
+        """Queues an iterator (or callable) and returns its job handle for cancel()."""
+        if callable(work):
+            work = self._run_once(work)
+        job = {"iter": iter(work), "owner": owner, "on_done": on_done, "cancelled": False}
+        heapq.heappush(self._queue, (priority, next(self._seq), job))
+        self._schedule(idle=True)
+        return job
+
+    @staticmethod
+    def _run_once(func):
+        yield func()
+
+    # IVO+GPT
+    def cancel(self, job):
+        """Cancels a single job (no-op if it already finished)."""
+        if job: job["cancelled"] = True
+
+    # IVO+GPT
+    def cancel_owner(self, owner):
+        """Cancels every pending job registered for the given owner."""
+        for _, _, job in self._queue:
+            if job["owner"] is owner: job["cancelled"] = True
+
+    # IVO+GPT
+    def shutdown(self):
+        """Drops all jobs and the pending slice (call before the root is destroyed)."""
+        self._queue.clear()
+        if self._after_id:
+            try: self.root.after_cancel(self._after_id)
+            except tk.TclError: pass
+            self._after_id = None
+
+    def has_pending(self):
+        """True while any non-cancelled job is queued."""
+        return any(not job["cancelled"] for _, _, job in self._queue)
+
+    # IVO+GPT
+    def _schedule(self, idle=False):
+        if self._after_id: return # A slice is already pending
+        try:
+            self._after_id = self.root.after_idle(self._run_slice) if idle else self.root.after(0, self._run_slice)
+        except tk.TclError: # Root already destroyed
+            self._after_id = None
+            self._queue.clear()
+
+    # IVO+GPT
+    def _run_slice(self):
+        """Runs queued work until the frame budget is used up, then reschedules."""
+        self._after_id = None
+        deadline = time.perf_counter() + self.frame_budget
+        while self._queue:
+            # Off the heap while it runs: the step (or on_done) may submit jobs that sort ahead of it
+            entry = heapq.heappop(self._queue)
+            job = entry[2]
+            if not job["cancelled"]:
+                try:
+                    next(job["iter"])
+                    heapq.heappush(self._queue, entry) # Same (priority, seq): keeps its place
+                    if time.perf_counter() < deadline: continue
+                    break # Budget spent; job stays queued for the next slice
+                except StopIteration:
+                    if job["on_done"]:
+                        try: job["on_done"]()
+                        except Exception: logging.exception("Error in UI job completion callback")
+                except tk.TclError as e: # Target widget destroyed mid-job
+                    logging.debug("UI job stopped (widget gone): %s", e)
+                except Exception:
+                    logging.exception("Error in scheduled UI job")
+            if time.perf_counter() >= deadline: break
+        if self._queue:
+            self._schedule()
+
+# --- Application Root (single Tk instance) ---
+class ECOHUBRoot(tk.Tk):
+    """The one Tk root of the process, hosting either the account picker or a user session.
+
+    Tcl, fonts, ttk themes and the loaded profiles/emission factors live as long as the
+    root does; switching profiles only swaps the view frame inside it.
+    """
+
+    # IVO+GPT
+    def __init__(self):
+        super().__init__()
+        self.current_view = None # AccountsPage or ECOHUBApp frame currently shown
+        self.current_theme = "eco_dark"
+
+        # Ensure data dir exists and load profiles (once; views edit app_state in place)
+        ensure_data_dir()
+        load_user_profiles_from_csv()
+
+        # --- Styling ---
+        self.style = ttk.Style(self)
+        self.apply_theme(self.current_theme)
+
+        # Time-sliced UI work shared by all views, cancelled per owner when views go away
+        self.scheduler = UIWorkScheduler(self)
+
+        # Stall watchdog, fed by the lag probe below
+        self.watchdog = UIStallWatchdog()
+        self.watchdog.start()
+
+        # --- Layout ---
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+        self.protocol("WM_DELETE_WINDOW", self._on_window_close) # Handle window close button
+
+        self._lag_probe_due = None
+        self._schedule_lag_probe()
+        self.show_accounts()
+
+    # IVO+GPT
+    def _schedule_lag_probe(self):
+        """Re-arms the event-loop lag probe (a timer whose lateness is the lag)."""
+        self._lag_probe_due = time.perf_counter() + PERF_LAG_PROBE_MS / 1000.0
+        self.after(PERF_LAG_PROBE_MS, self._on_lag_probe)
+
+    # IVO+GPT
+    def _on_lag_probe(self):
+        self.watchdog.beat()
+        if perf_monitor.enabled:
+            lag_ms = max(0.0, (time.perf_counter() - self._lag_probe_due) * 1000.0)
+            perf_monitor.record("tk_idle_lag", lag_ms)
+        self._schedule_lag_probe()
+
+    # IVO+GPT
+    def apply_theme(self, theme_name):
+        """Points theme_colors at theme_name and activates its (cached) ttk theme."""
+        self.current_theme = theme_name
+        self._apply_theme_colors()
+        self._configure_styles()
+
+    # EXPENSEWISE
+    def _apply_theme_colors(self):
+        """Updates the global theme_colors dict based on current_theme."""
+        global theme_colors
+        if self.current_theme == "eco_light":
+            theme_colors.update(THEME_ECO_LIGHT)
+        else:
+            theme_colors.update(THEME_ECO_DARK)
+
+    # IVO+GPT
+    def _configure_styles(self):
+        """Activates the ttk theme for current_theme, building it on first use.
+
+        Each app theme becomes its own ttk theme derived from 'clam', so its styles are
+        configured once per session; later switches are a single theme_use().
+        """
+        ttk_theme_name = f"ecohub_{self.current_theme}"
+        if ttk_theme_name in self.style.theme_names():
+            self.style.theme_use(ttk_theme_name) # Cached: styles already configured
+        else:
+            self.style.theme_create(ttk_theme_name, parent='clam') # Base theme
+            self.style.theme_use(ttk_theme_name)
+            self._build_theme_styles()
+
+        # Combobox Styling (Listbox part)
+        # Use option_add for listbox customization (standard Tk practice)
+        self.option_add('*TCombobox*Listbox*Background', theme_colors[CB_LIST_BG])
+        self.option_add('*TCombobox*Listbox*Foreground', theme_colors[CB_LIST_FG])
+        self.option_add('*TCombobox*Listbox*selectBackground', theme_colors[CB_LIST_SEL_BG])
+        self.option_add('*TCombobox*Listbox*selectForeground', theme_colors[CB_LIST_SEL_FG])
+
+        # --- Update non-ttk widget backgrounds ---
+        # (Widgets of the open view are recoloured through theme_registry)
+        self.configure(bg=theme_colors[BG])
+
+    # IVO+GPT
+    def _build_theme_styles(self):
+        """Configures all ttk styles of the active ttk theme from theme_colors."""
+        # General Widget Styling
+        self.style.configure('.', background=theme_colors[BG], foreground=theme_colors[FG], font=FONT_NORMAL)
+        self.style.configure('TFrame', background=theme_colors[BG])
+        self.style.configure('TLabel', background=theme_colors[BG], foreground=theme_colors[FG], font=FONT_NORMAL)
+
+        # Specific Label Styles
+        self.style.configure('Sidebar.TLabel', background=theme_colors[SIDEBAR], foreground=theme_colors[FG])
+        self.style.configure('Card.TLabel', background=theme_colors[CARD], foreground=theme_colors[FG])
+        self.style.configure('Desc.TLabel', background=theme_colors[BG], foreground=theme_colors[LBL_DESC_FG], font=FONT_DESC)
+        self.style.configure('CardDesc.TLabel', background=theme_colors[CARD], foreground=theme_colors[LBL_DESC_FG], font=FONT_DESC)
+        self.style.configure('DialogDesc.TLabel', background=theme_colors[DLG_CARD], foreground=theme_colors[LBL_DESC_FG], font=FONT_DESC)
+        self.style.configure('Title.TLabel', background=theme_colors[BG], foreground=theme_colors[FG], font=FONT_LARGE)
+        self.style.configure('CardTitle.TLabel', background=theme_colors[CARD], foreground=theme_colors[FG], font=FONT_BOLD)
+        self.style.configure('Accent.TLabel', background=theme_colors[CARD], foreground=theme_colors[ACCENT], font=FONT_BOLD)
+        self.style.configure('Error.TLabel', background=theme_colors[BG], foreground=theme_colors[RED], font=FONT_BOLD)
+        date_time_fg = theme_colors[DISABLED] if self.current_theme == 'eco_dark' else theme_colors[ACCENT_DARKER]
+        self.style.configure('DateTime.TLabel', background=theme_colors[SIDEBAR], foreground=date_time_fg, font=FONT_SMALL)
+
+        # Button Styling
+        self.style.configure('TButton', background=theme_colors[ACCENT], foreground=theme_colors[BTN_FG], font=FONT_BOLD, padding=6, borderwidth=0, relief=tk.FLAT)
+        self.style.map('TButton', background=[('active', theme_colors[ACCENT_DARKER])], foreground=[('active', theme_colors[BTN_FG])])
+        self.style.configure('Sidebar.TButton', background=theme_colors[SIDEBAR], foreground=theme_colors[FG], font=FONT_BOLD, anchor='w', padding=(15, 8), borderwidth=0, relief=tk.FLAT)
+        self.style.map('Sidebar.TButton', background=[('active', theme_colors[ACCENT]), ('selected', theme_colors[ACCENT])], foreground=[('active', theme_colors[BTN_FG]), ('selected', theme_colors[BTN_FG])])
+        self.style.configure('FAB.TButton', background=theme_colors[ACCENT], foreground=theme_colors[BTN_FG], font=(FONT_FAMILY, 18, "bold"), padding=10, borderwidth=0, relief=tk.FLAT)
+        self.style.map('FAB.TButton', background=[('active', theme_colors[ACCENT_DARKER])])
+
+        # Treeview Styling
+        self.style.configure("Treeview", background=theme_colors[CARD], foreground=theme_colors[FG], fieldbackground=theme_colors[CARD], rowheight=28, borderwidth=0, relief=tk.FLAT)
+        self.style.configure("Treeview.Heading", background=theme_colors[TV_HEAD_BG], foreground=theme_colors[FG], font=FONT_BOLD, relief="flat", padding=(5, 5))
+        self.style.map("Treeview.Heading", background=[('active', theme_colors[ACCENT])])
+        self.style.layout("Treeview", [('Treeview.treearea', {'sticky': 'nswe'})])
+
+        # Progressbar Styling
+        self.style.configure("TProgressbar", thickness=10, background=theme_colors[ACCENT], troughcolor=theme_colors[CARD])
+
+        # Combobox widget itself
+        self.style.configure('TCombobox', background=theme_colors[CARD], foreground=theme_colors[FG], fieldbackground=theme_colors[CARD], selectbackground=theme_colors[CARD], selectforeground=theme_colors[FG], arrowcolor=theme_colors[FG], borderwidth=1, padding=5, relief=tk.FLAT, bordercolor=theme_colors[DISABLED]) # Add subtle border
+        self.style.map('TCombobox', fieldbackground=[('readonly', theme_colors[CARD])], bordercolor=[('focus', theme_colors[ACCENT])]) # Highlight border on focus
+
+        # Entry Styling
+        self.style.configure('TEntry', background=theme_colors[CARD], foreground=theme_colors[FG], fieldbackground=theme_colors[CARD], insertcolor=theme_colors[FG], borderwidth=1, padding=5, relief=tk.FLAT, bordercolor=theme_colors[DISABLED]) # Add subtle border
+        self.style.map('TEntry', fieldbackground=[('focus', theme_colors[CARD])], bordercolor=[('focus', theme_colors[ACCENT])]) # Highlight border on focus
+
+        # Notebook Styling
+        self.style.configure('TNotebook', background=theme_colors[BG], borderwidth=0)
+        self.style.configure('TNotebook.Tab', font=FONT_BOLD, padding=[10, 5], background=theme_colors[CARD], foreground=theme_colors[FG], borderwidth=0)
+        self.style.map('TNotebook.Tab', background=[('selected', theme_colors[ACCENT])], foreground=[('selected', theme_colors[BTN_FG])])
+
+        # Scrollbar Styling
+        self.style.configure("Vertical.TScrollbar", background=theme_colors[SB_BG], troughcolor=theme_colors[SB_TROUGH], borderwidth=0, arrowcolor=theme_colors[FG], relief=tk.FLAT)
+        self.style.map("Vertical.TScrollbar", background=[('active', theme_colors[ACCENT])])
+
+        # Checkbutton/Radiobutton Styling
+        # Base style matching background
+        self.style.configure("TCheckbutton", background=theme_colors[BG], foreground=theme_colors[FG], font=FONT_NORMAL)
+        self.style.map("TCheckbutton", indicatorcolor=[('selected', theme_colors[ACCENT])])
+        self.style.configure("TRadiobutton", background=theme_colors[BG], foreground=theme_colors[FG], font=FONT_NORMAL)
+        self.style.map("TRadiobutton", indicatorcolor=[('selected', theme_colors[ACCENT])])
+        # Variations for placing on cards/dialog cards
+        self.style.configure("Card.TRadiobutton", background=theme_colors[CARD], foreground=theme_colors[FG])
+        self.style.map("Card.TRadiobutton", background=[('active', theme_colors[CARD])], indicatorcolor=[('selected', theme_colors[ACCENT])])
+        self.style.configure("Dialog.TRadiobutton", background=theme_colors[DLG_CARD], foreground=theme_colors[DLG_FG])
+        self.style.map("Dialog.TRadiobutton", background=[('active', theme_colors[DLG_CARD])], indicatorcolor=[('selected', theme_colors[ACCENT])])
+        self.style.configure("Card.TCheckbutton", background=theme_colors[CARD], foreground=theme_colors[FG])
+        self.style.map("Card.TCheckbutton", background=[('active', theme_colors[CARD])], indicatorcolor=[('selected', theme_colors[ACCENT])])
+        self.style.configure("Dialog.TCheckbutton", background=theme_colors[DLG_CARD], foreground=theme_colors[DLG_FG])
+        self.style.map("Dialog.TCheckbutton", background=[('active', theme_colors[DLG_CARD])], indicatorcolor=[('selected', theme_colors[ACCENT])])
+
+        # Toolbutton (if used later)
+        self.style.configure("Toolbutton", anchor="center", padding=5, font=FONT_NORMAL, background=theme_colors[CARD], foreground=theme_colors[FG], borderwidth=1, relief="raised")
+        self.style.map("Toolbutton", relief=[('selected', 'sunken'), ('active', 'raised')], background=[('selected', theme_colors[ACCENT]), ('active', theme_colors[CARD])], foreground=[('selected', theme_colors[BTN_FG]), ('active', theme_colors[FG])])
+
+        # Account picker styles (the picker is always dark, whatever theme is active)
+        self.style.configure('AddAccount.TButton', background=THEME_ECO_DARK[BG], foreground=THEME_ECO_DARK[DISABLED], font=FONT_XXLARGE, borderwidth=1, relief=tk.SOLID, bordercolor=THEME_ECO_DARK[DISABLED])
+        self.style.map('AddAccount.TButton', foreground=[('active', THEME_ECO_DARK[FG])], bordercolor=[('active', THEME_ECO_DARK[FG])])
+        self.style.configure('Exit.TButton', font=FONT_NORMAL, foreground=THEME_ECO_DARK[FG], background="#555555", borderwidth=1, relief=tk.SOLID)
+        self.style.map('Exit.TButton', background=[('active', THEME_ECO_DARK[RED])], foreground=[('active', THEME_ECO_DARK[BTN_FG])])
+
+    # IVO+GPT
+    def _set_view(self, view):
+        """Replaces the current view frame with view."""
+        if self.current_view is not None and self.current_view.winfo_exists():
+            self.current_view.destroy()
+        self.current_view = view
+        view.grid(row=0, column=0, sticky="nsew")
+
+    # EXPENSEWISE
+    def show_accounts(self):
+        """Shows the profile picker."""
+        logging.info("Showing Accounts Page...")
+        app_state["current_user_id"] = None
+        self._set_view(AccountsPage(self))
+        self.title("ECOHUB - Select Profile")
+        self.geometry("800x600") # Room for the search box and two rows of tiles
+        self.center_window()
+
+    # IVO-ONLY
+    def open_session(self, user_id):
+        """Replaces the picker with the main app for user_id."""
+        logging.info("Launching Main App for user: %s...", user_id)
+        start = time.perf_counter()
+        try:
+            session = ECOHUBApp(self, user_id)
+        except Exception as e:
+            logging.exception("CRITICAL ERROR during main application execution for %s", user_id)
+            messagebox.showerror("Application Error", f"A critical error occurred:\n{e}\n\nReturning to profile selection.", parent=self)
+            self.show_accounts() # Attempt recovery
+            return
+        self._set_view(session)
+        self.title(f"ECOHUB - {app_state['user_profiles'].get(user_id, {}).get('name', 'Eco-User')}")
+        self.geometry("1250x750") # Default size
+        logging.info("Session for %s ready in %.1f ms.", user_id, (time.perf_counter() - start) * 1000)
+
+    # EXPENSEWISE
+    def center_window(self):
+        """Centers the window on the screen."""
+        self.update_idletasks()
+        width = self.winfo_width()
+        height = self.winfo_height()
+        x_pos = (self.winfo_screenwidth() // 2) - (width // 2)
+        y_pos = (self.winfo_screenheight() // 2) - (height // 2)
+        self.geometry(f'{width}x{height}+{x_pos}+{y_pos}')
+        self.attributes('-alpha', 1.0) # Ensure fully opaque
+
+    # EXPENSEWISE
+    def _on_window_close(self):
+        """Window close button: ends an open session, or exits from the picker."""
+        if isinstance(self.current_view, ECOHUBApp) and self.current_view.winfo_exists():
+            self.current_view.on_closing()
+        else:
+            self.exit_app()
+
+    # EXPENSEWISE
+    def exit_app(self):
+        """Stops all queued UI work and destroys the root, ending mainloop."""
+        logging.info("Exiting ECOHUB.")
+        self.scheduler.shutdown()
+        self.watchdog.stop()
+        self.destroy()
+
+# --- Profile Search Index ---
+class ProfilePrefixIndex:
+    """Sorted (word, position) keys over profile names, for incremental prefix search.
+
+    Each profile is indexed under its full lower-cased name and under every word in it,
+    so "sm" finds both "Smith Family" and "Anna Smith". A query is one bisect plus a scan
+    over the matching keys only.
+    """
+
+    def __init__(self, sorted_profiles):
+        self.sorted_profiles = sorted_profiles # [(user_id, details)] in display order
+        keys = []
+        for position, (user_id, details) in enumerate(sorted_profiles):
+            name = str(details.get('name', '')).lower()
+            for token in {name, *name.split()}:
+                if token:
+                    keys.append((token, position))
+        keys.sort()
+        self._keys = keys
+
+    def search(self, query):
+        """Returns the profiles whose name (or a word in it) starts with query, in display order."""
+        query = query.strip().lower()
+        if not query:
+            return self.sorted_profiles
+        positions = set()
+        i = bisect.bisect_left(self._keys, (query,))
+        while i < len(self._keys) and self._keys[i][0].startswith(query):
+            positions.add(self._keys[i][1])
+            i += 1
+        return [self.sorted_profiles[position] for position in sorted(positions)]
+
+# --- Accounts Page Class (Profile Selection) ---
+class AccountsPage(tk.Frame):
+    """Profile picker view: select or create a user profile.
+
+    The grid is virtualized: only tiles inside the visible canvas area exist, drawn from
+    a small pool of tile widgets that are recycled as the grid scrolls or the search changes.
+    """
+    TILE_WIDTH = 150 # Grid cell size of one profile tile (px)
+    TILE_HEIGHT = 190
+
+    # EXPENSEWISE
+    def __init__(self, root_window):
+        # Apply theme directly (Accounts page always uses dark theme)
+        super().__init__(root_window, bg=THEME_ECO_DARK[BG])
+        self.root_window = root_window
+        self.selected_user_id = None # Store the ID of the selected user
+        self.scheduler = root_window.scheduler
+        self.profile_index = ProfilePrefixIndex([])
+        self.visible_profiles = [] # Profiles matching the current search, in display order
+        self.profile_summaries = {} # {user_id: summary or None}, read when a tile is first shown
+        self._shown_tiles = {} # {grid index: tile} currently placed on the canvas
+        self._free_tiles = [] # Hidden tiles ready for reuse
+        self._scrollregion = None
+
+        # --- Layout ---
+        self.grid_rowconfigure(2, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        # Title
+        title_label = tk.Label(self, text="Who's Tracking?", font=FONT_XLARGE, bg=THEME_ECO_DARK[BG], fg=THEME_ECO_DARK[FG])
+        title_label.grid(row=0, column=0, pady=(30, 10)) # Adjusted padding
+
+        # Search box (filters as you type)
+        search_frame = tk.Frame(self, bg=THEME_ECO_DARK[BG])
+        search_frame.grid(row=1, column=0, pady=(0, 10))
+        tk.Label(search_frame, text="Search:", font=FONT_NORMAL, bg=THEME_ECO_DARK[BG], fg=THEME_ECO_DARK[DISABLED]).pack(side=tk.LEFT, padx=(0, 8))
+        self.search_var = tk.StringVar()
+        search_entry = tk.Entry(search_frame, textvariable=self.search_var, font=FONT_NORMAL, width=30, relief=tk.FLAT,
+                                bg=THEME_ECO_DARK[CARD], fg=THEME_ECO_DARK[FG], insertbackground=THEME_ECO_DARK[FG])
+        search_entry.pack(side=tk.LEFT, ipady=4)
+        self.search_var.trace_add("write", self._apply_search)
+
+        # Accounts grid (canvas holding only the visible tiles)
+        grid_frame = tk.Frame(self, bg=THEME_ECO_DARK[BG])
+        grid_frame.grid(row=2, column=0, sticky="nsew", padx=20, pady=(0, 60)) # Leave room for the exit button
+        grid_frame.grid_rowconfigure(0, weight=1)
+        grid_frame.grid_columnconfigure(0, weight=1)
+        self.canvas = tk.Canvas(grid_frame, bg=THEME_ECO_DARK[BG], highlightthickness=0)
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar = ttk.Scrollbar(grid_frame, orient="vertical", command=self.canvas.yview)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        # Every scroll (bar, wheel or relayout) reports here, so tiles follow the viewport
+        self.canvas.configure(yscrollcommand=self._on_canvas_scrolled)
+        self.canvas.bind("<Configure>", lambda e: self._layout_tiles())
+        self.bind_all("<MouseWheel>", self._on_mousewheel)
+        self.bind_all("<Button-4>", self._on_mousewheel)
+        self.bind_all("<Button-5>", self._on_mousewheel)
+
+        self._create_add_tile()
+        self.display_user_profiles()
+
+        # Exit Button
+        exit_button = ttk.Button(self, text="Exit Application", command=self.exit_app, style="Exit.TButton", width=15)
+        exit_button.place(relx=0.98, rely=0.98, anchor='se', x=-15, y=-15) # Adjusted position
+        search_entry.focus_set()
+
+    # EXPENSEWISE
+    def _create_add_tile(self):
+        """Creates the "+" tile for new profiles (placed after the last matching profile)."""
+        add_container = tk.Frame(self.canvas, bg=THEME_ECO_DARK[BG], width=self.TILE_WIDTH, height=self.TILE_HEIGHT)
+        add_container.pack_propagate(False)
+
+        # Use a Frame with border for the add icon visual
+        add_icon_frame = tk.Frame(add_container, bg=THEME_ECO_DARK[BG], width=100, height=100, cursor="hand2",
+                                  relief=tk.SOLID, borderwidth=2,
+                                  highlightbackground=THEME_ECO_DARK[DISABLED], # Use highlight for border
+                                  highlightthickness=2, highlightcolor=THEME_ECO_DARK[DISABLED]) # Fallback color
+        add_icon_frame.pack(pady=(15, 8))
+        add_icon_frame.pack_propagate(False)
+
+        add_label = tk.Label(add_icon_frame, text="+", font=FONT_XXLARGE, bg=THEME_ECO_DARK[BG], fg=THEME_ECO_DARK[DISABLED])
+        add_label.place(relx=0.5, rely=0.5, anchor="center")
+        add_label.bind("<Enter>", lambda e: add_label.config(fg=THEME_ECO_DARK[FG])) # Hover effect
+        add_label.bind("<Leave>", lambda e: add_label.config(fg=THEME_ECO_DARK[DISABLED]))
+
+        add_name_label = tk.Label(add_container, text="Add Profile", font=FONT_ACCOUNT_NAME, bg=THEME_ECO_DARK[BG], fg=THEME_ECO_DARK[DISABLED])
+        add_name_label.pack()
+
+        # Bind click event to add profile elements
+        for widget in [add_container, add_icon_frame, add_label, add_name_label]:
+            widget.bind("<Button-1>", self.add_user_profile_dialog)
+        self._add_tile_window = self.canvas.create_window(0, 0, window=add_container, anchor="nw", state="hidden")
+
+    # EXPENSEWISE
+    def _create_profile_tile(self):
+        """Creates one reusable profile tile; its contents are filled in by _fill_profile_tile."""
+        tile = {"user_id": None}
+        container = tk.Frame(self.canvas, bg=THEME_ECO_DARK[BG], width=self.TILE_WIDTH, height=self.TILE_HEIGHT)
+        container.pack_propagate(False)
+
+        # Clickable Frame for Icon
+        icon_frame = tk.Frame(container, width=100, height=100, cursor="hand2")
+        icon_frame.pack(pady=(15, 8)) # Space between icon and name
+        icon_frame.pack_propagate(False) # Prevent label from shrinking frame
+
+        initial_label = tk.Label(icon_frame, font=FONT_XXLARGE, fg=THEME_ECO_DARK[BTN_FG])
+        initial_label.place(relx=0.5, rely=0.5, anchor="center")
+
+        name_label = tk.Label(container, font=FONT_ACCOUNT_NAME, bg=THEME_ECO_DARK[BG], fg=THEME_ECO_DARK[FG], wraplength=130) # Wrap long names
+        name_label.pack()
+
+        summary_label = tk.Label(container, font=FONT_SMALL, bg=THEME_ECO_DARK[BG], fg=THEME_ECO_DARK[DISABLED], justify=tk.CENTER)
+        summary_label.pack()
+
+        # Bind click event to the container, icon frame, and labels
+        # The tile is recycled, so the handler reads whichever profile it currently shows
+        for widget in [container, icon_frame, initial_label, name_label, summary_label]:
+            widget.bind("<Button-1>", lambda e, t=tile: self.select_user(t["user_id"]))
+
+        tile.update(icon=icon_frame, initial=initial_label, name=name_label, summary=summary_label,
+                    window=self.canvas.create_window(0, 0, window=container, anchor="nw", state="hidden"))
+        return tile
+
+    # EXPENSEWISE
+    def _fill_profile_tile(self, tile, user_id, details):
+        """Points a (possibly recycled) tile at a profile."""
+        if tile["user_id"] == user_id:
+            return # Already showing this profile
+        tile["user_id"] = user_id
+        name = details.get('name', 'Unknown')
+        icon_color = details.get('icon_color') or ACCOUNT_ICON_COLORS[0]
+        tile["icon"].configure(bg=icon_color)
+        tile["initial"].configure(text=name[0].upper() if name else "?", bg=icon_color)
+        tile["name"].configure(text=name)
+        tile["summary"].configure(text=self._format_profile_summary(user_id))
+
+    # EXPENSEWISE
+    def display_user_profiles(self):
+        """Rebuilds the search index from app_state and redraws the grid."""
+        profiles = app_state.get("user_profiles", {})
+        # Sort profiles alphabetically by name for consistent order
+        sorted_profiles = sorted(profiles.items(), key=lambda item: item[1].get('name', '').lower())
+        self.profile_index = ProfilePrefixIndex(sorted_profiles)
+        self.profile_summaries.clear() # Re-read lazily (a session may have changed them)
+        self._apply_search()
+
+    # EXPENSEWISE
+    def _apply_search(self, *args):
+        """Filters the grid to profiles matching the search box and scrolls back to the top."""
+        self.visible_profiles = self.profile_index.search(self.search_var.get())
+        self._release_tiles(list(self._shown_tiles))
+        self.canvas.yview_moveto(0)
+        self._layout_tiles()
+
+    # EXPENSEWISE
+    def _release_tiles(self, indices):
+        """Hides the tiles at the given grid indices and returns them to the pool."""
+        for index in indices:
+            tile = self._shown_tiles.pop(index)
+            self.canvas.itemconfigure(tile["window"], state="hidden")
+            self._free_tiles.append(tile)
+
+    # EXPENSEWISE
+    def _layout_tiles(self):
+        """Places tiles for the grid cells inside the viewport (plus one row either side)."""
+        width = max(self.canvas.winfo_width(), self.TILE_WIDTH)
+        cols = max(1, width // self.TILE_WIDTH)
+        item_count = len(self.visible_profiles) + 1 # Last cell is the "Add Profile" tile
+        rows = -(-item_count // cols)
+        x_offset = (width - cols * self.TILE_WIDTH) // 2 # Center the grid horizontally
+
+        scrollregion = (0, 0, width, rows * self.TILE_HEIGHT)
+        if scrollregion != self._scrollregion: # Only on change, or Tk reports a scroll again
+            self._scrollregion = scrollregion
+            self.canvas.configure(scrollregion=scrollregion)
+
+        top = self.canvas.canvasy(0)
+        first_row = max(0, int(top // self.TILE_HEIGHT) - 1)
+        last_row = min(rows - 1, int((top + self.canvas.winfo_height()) // self.TILE_HEIGHT) + 1)
+        wanted = range(first_row * cols, min(item_count, (last_row + 1) * cols))
+
+        self._release_tiles([index for index in self._shown_tiles if index not in wanted])
+        for index in wanted:
+            x = x_offset + (index % cols) * self.TILE_WIDTH
+            y = (index // cols) * self.TILE_HEIGHT
+            if index == item_count - 1:
+                self.canvas.coords(self._add_tile_window, x, y)
+                self.canvas.itemconfigure(self._add_tile_window, state="normal")
+                continue
+            tile = self._shown_tiles.get(index)
+            if tile is None:
+                tile = self._free_tiles.pop() if self._free_tiles else self._create_profile_tile()
+                self._shown_tiles[index] = tile
+            user_id, details = self.visible_profiles[index]
+            self._fill_profile_tile(tile, user_id, details)
+            self.canvas.coords(tile["window"], x, y)
+            self.canvas.itemconfigure(tile["window"], state="normal")
+        if item_count - 1 not in wanted:
+            self.canvas.itemconfigure(self._add_tile_window, state="hidden")
+
+    # EXPENSEWISE
+    def _on_canvas_scrolled(self, first, last):
+        """yscrollcommand: keeps the scrollbar in sync and materializes newly visible tiles."""
+        self.scrollbar.set(first, last)
+        self._layout_tiles()
+
+    # EXPENSEWISE
+    def _on_mousewheel(self, event):
+        """Scrolls the profile grid (Windows/macOS delta or X11 buttons 4/5)."""
+        if event.num == 4 or getattr(event, 'delta', 0) > 0:
+            self.canvas.yview_scroll(-1, "units")
+        elif event.num == 5 or getattr(event, 'delta', 0) < 0:
+            self.canvas.yview_scroll(1, "units")
+
+    # IVO-ONLY
+    def _format_profile_summary(self, user_id):
+        """Returns the footprint lines shown under a profile name."""
+        if user_id not in self.profile_summaries: # Read only for profiles that get a tile
+            self.profile_summaries[user_id] = load_profile_summaries([user_id]).get(user_id)
+        summary = self.profile_summaries[user_id]
+        if not summary:
+            return "No data yet"
+        return (f"Total: {format_carbon_emission(summary['lifetime_kg'])}\n"
+                f"Last {SUMMARY_WINDOW_DAYS} days: {format_carbon_emission(summary['recent_kg'])}")
+
+    # EXPENSEWISE
+    def add_user_profile_dialog(self, event=None):
+        """Opens a dialog to get the new profile name."""
+        # Configuration for the simple dialog
+        fields = {"name": {"label": "Profile Name:", "required": True}}
+        dialog = SimpleEntryDialog(self, "Create New Profile", fields)
+        result = dialog.result # This blocks until the dialog is closed
+
+        if result and isinstance(result, dict):
+            name = result.get("name", "").strip()
+            if not name:
+                 messagebox.showerror("Invalid Input", "Profile name cannot be empty.", parent=self)
+                 return
+
+            # Check for duplicate names (case-insensitive)
+            current_profiles = app_state.get("user_profiles", {})
+            if any(prof.get('name', '').lower() == name.lower() for prof in current_profiles.values() if isinstance(prof, dict)):
+                 messagebox.showerror("Duplicate Profile", f"A profile named '{name}' already exists.", parent=self)
+                 return
+
+            try:
+                new_id = get_unique_id("user")
+                new_profile = {"name": name, "icon_color": random.choice(ACCOUNT_ICON_COLORS)}
+                # Update in-memory state
+                app_state["user_profiles"][new_id] = new_profile
+                # Save to CSV
+                if save_user_profiles_to_csv():
+                    logging.info("Created and saved new profile: %s (%s)", name, new_id)
+                    self.display_user_profiles() # Refresh the display
+                else:
+                    # If save failed, revert the change in memory
+                    app_state["user_profiles"].pop(new_id, None)
+                    messagebox.showerror("Save Error", "Could not save the new profile. Please try again.", parent=self)
+
+            except Exception as e:
+                logging.exception("Error creating profile")
                 messagebox.showerror("Error", f"Could not create profile.\n{e}", parent=self)
 
     # EXPENSEWISE
@@ -840,10 +4099,10 @@ class AccountsPage(tk.Tk):
         profiles = app_state.get("user_profiles", {})
         if user_id in profiles:
             self.selected_user_id = user_id
-            logging.info(f"Selected profile: {profiles[user_id].get('name', user_id)} ({user_id})")
-            self.destroy() # Close the AccountsPage window
+            logging.info("Selected profile: %s (%s)", profiles[user_id].get('name', user_id), user_id)
+            self.root_window.open_session(user_id) # Swaps this view out for the main app
         else:
-            logging.error(f"Attempted select non-existent user ID: {user_id}")
+            logging.error("Attempted select non-existent user ID: %s", user_id)
             messagebox.showerror("Error", "Selected profile not found. Reloading profiles.", parent=self)
             # Reload profiles from disk in case of inconsistency and refresh display
             load_user_profiles_from_csv()
@@ -854,31 +4113,52 @@ class AccountsPage(tk.Tk):
         """Handles exit request from the Accounts Page."""
         logging.info("Exiting ECOHUB from Accounts Page.")
         self.selected_user_id = None # Ensure no user is selected if exiting
-        self.destroy() # Close the window
+        self.root_window.exit_app()
+
+    # EXPENSEWISE
+    def destroy(self):
+        """Stops any work still queued for this view and releases the global wheel bindings."""
+        self.scheduler.cancel_owner(self)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.unbind_all(sequence)
+        super().destroy()
 
 # --- Main Application Class (ECOHUBApp) ---
-class ECOHUBApp(tk.Tk):
-    """The main application window after profile selection."""
+class ECOHUBApp(tk.Frame):
+    """The main application view after profile selection (hosted by ECOHUBRoot)."""
 
     # IVO+GPT
-    def __init__(self, user_id):
-        super().__init__()
+    def __init__(self, root_window, user_id):
+        super().__init__(root_window)
+        self.root_window = root_window
         self.current_user_id = user_id
         self._page_creation_lock = False # Prevent race conditions during page/theme switch
         self._full_exit_requested = False # Flag set by Settings->Exit Application
 
-        # Load user data and apply initial theme
-        load_user_data(self.current_user_id)
-        self.current_theme = app_state.get("settings", {}).get("theme", "eco_dark")
-        self._apply_theme_colors() # Sets the global theme_colors var
+        # Background activities load state (see _start_activity_load)
+        self.activities_loading = False
+        self.loading_activities = [] # Records streamed in so far (grows on the worker thread)
+        self.loaded_activity_count = 0 # How many of those the UI has been told about
+        self._activity_load_queue = None
+        self._activity_load_after_id = None
 
-        self.title(f"ECOHUB - {app_state['user_profiles'].get(user_id, {}).get('name', 'Eco-User')}")
-        self.geometry("1250x750") # Default size
-        self.configure(bg=theme_colors[BG])
+        # Emission factor / exchange rate hot reload state (see _poll_factor_file)
+        self._factor_watch_after_id = None
+        self._factor_recompute = None # (result queue, activities list, started, kind) while a recompute runs
+        self._factor_recompute_after_id = None
+
+        # Load settings/log now (activities follow in the background unless cached) and apply initial theme
+        activities_ready = load_user_data(self.current_user_id, defer_activities=True)
+        self.current_theme = app_state.get("settings", {}).get("theme", "eco_dark")
 
         # --- Styling ---
-        self.style = ttk.Style(self)
-        self._configure_styles() # Apply theme-dependent ttk styles
+        # Sets the global theme_colors var; ttk styles are cached per theme on the root
+        self.style = root_window.style
+        root_window.apply_theme(self.current_theme)
+        theme_registry.register(self, bg=BG)
+
+        # Time-sliced UI work (history trees etc.), cancelled per page on destroy
+        self.scheduler = root_window.scheduler
 
         # --- Layout ---
         self.grid_rowconfigure(0, weight=1)
@@ -889,7 +4169,7 @@ class ECOHUBApp(tk.Tk):
         self.sidebar.grid(row=0, column=0, sticky="nsw")
 
         # Main Content Frame
-        self.main_frame = tk.Frame(self, bg=theme_colors[BG])
+        self.main_frame = theme_registry.register(tk.Frame(self), bg=BG)
         self.main_frame.grid(row=0, column=1, sticky="nsew", padx=20, pady=20)
         self.main_frame.grid_rowconfigure(0, weight=1)
         self.main_frame.grid_columnconfigure(0, weight=1)
@@ -899,181 +4179,277 @@ class ECOHUBApp(tk.Tk):
         self.fab = create_stylish_button(self, "+", self.open_add_activity_dialog, style="FAB.TButton")
         self.fab.place(relx=0.98, rely=0.95, anchor='se') # Place in bottom-right
 
+        # Progress indicator for the background activities load (shown only while it runs)
+        self.load_progress_frame = ttk.Frame(self)
+        self.load_progress_label = ttk.Label(self.load_progress_frame, text="Loading activity history...")
+        self.load_progress_label.pack(side=tk.LEFT, padx=(0, 8))
+        self.load_progressbar = ttk.Progressbar(self.load_progress_frame, mode="determinate", maximum=1.0, length=160)
+        self.load_progressbar.pack(side=tk.LEFT)
+
         # --- Initial State ---
+        if not activities_ready:
+            self._start_activity_load() # Before the first page, so it streams rows from the start
         self._show_page("CarbonDashboardPage") # Show dashboard initially
         # Ensure the sidebar highlights the correct button
         if self.sidebar and self.sidebar.winfo_exists():
             self.sidebar.highlight_button("CarbonDashboardPage")
+        self._factor_watch_after_id = self.after(FACTOR_WATCH_POLL_MS, self._poll_factor_file)
 
-        self.protocol("WM_DELETE_WINDOW", self.on_closing) # Handle window close button
-        logging.info(f"ECOHUBApp initialized for user {user_id}.")
+        logging.info("ECOHUBApp initialized for user %s.", user_id)
 
-    # EXPENSEWISE
-    def _apply_theme_colors(self):
-        """Updates the global theme_colors dict based on current_theme."""
-        global theme_colors
-        if self.current_theme == "eco_light":
-            theme_colors.update(THEME_ECO_LIGHT)
-        else:
-            theme_colors.update(THEME_ECO_DARK)
+    # IVO+GPT
+    def _start_activity_load(self):
+        """Streams the activities file on a worker thread; results come back through a queue polled on the Tk loop."""
+        self.activities_loading = True
+        self.loading_activities = []
+        self.loaded_activity_count = 0
+        result_queue = self._activity_load_queue = queue.SimpleQueue()
+        user_id = self.current_user_id
+        file_path = get_user_data_file_path(user_id, "activities")
+        started = time.perf_counter()
+
+        def on_progress(activities, fraction):
+            result_queue.put(("progress", activities, len(activities), fraction))
+
+        def worker(): # No Tk calls here
+            try:
+                activities = load_activity_records(user_id, file_path, on_progress)
+                if perf_monitor.enabled:
+                    perf_monitor.record("background_activity_load", (time.perf_counter() - started) * 1000.0)
+                result_queue.put(("done", activities))
+            except Exception as e:
+                logging.exception("Background activities load failed for %s", user_id)
+                result_queue.put(("failed", e))
+
+        threading.Thread(target=worker, name=f"load-activities-{user_id}", daemon=True).start()
+        self.load_progressbar["value"] = 0.0
+        self.load_progress_frame.place(relx=0.5, rely=0.99, anchor="s")
+        self._activity_load_after_id = self.after(ACTIVITY_LOAD_POLL_MS, self._poll_activity_load)
 
     # IVO+GPT
-    def _configure_styles(self):
-        """Configures all ttk styles based on the current theme."""
-        self.style.theme_use('clam') # Base theme
+    def _poll_activity_load(self):
+        """Drains worker messages: progress streams rows into the page, done installs the activities."""
+        self._activity_load_after_id = None
+        if not self.activities_loading:
+            return
+        try:
+            while True:
+                message = self._activity_load_queue.get_nowait()
+                if message[0] == "progress":
+                    _, activities, count, fraction = message
+                    self._on_activity_load_progress(activities, count, fraction)
+                elif message[0] == "done":
+                    self._on_activity_load_finished(message[1])
+                    return
+                else:
+                    self._end_activity_load()
+                    messagebox.showerror("Load Error", f"Could not load your activity history:\n{message[1]}", parent=self)
+                    return
+        except queue.Empty:
+            pass
+        self._activity_load_after_id = self.after(ACTIVITY_LOAD_POLL_MS, self._poll_activity_load)
 
-        # General Widget Styling
-        self.style.configure('.', background=theme_colors[BG], foreground=theme_colors[FG], font=FONT_NORMAL)
-        self.style.configure('TFrame', background=theme_colors[BG])
-        self.style.configure('TLabel', background=theme_colors[BG], foreground=theme_colors[FG], font=FONT_NORMAL)
+    # IVO+GPT
+    def _on_activity_load_progress(self, activities, count, fraction):
+        self.loading_activities = activities
+        start, self.loaded_activity_count = self.loaded_activity_count, count
+        self.load_progressbar["value"] = fraction
+        self.load_progress_label.configure(text=f"Loading activity history... {count:,}")
+        page = self.current_page_frame
+        if count > start and page is not None and hasattr(page, "stream_activities"):
+            page.stream_activities(activities, start, count)
 
-        # Specific Label Styles
-        self.style.configure('Sidebar.TLabel', background=theme_colors[SIDEBAR], foreground=theme_colors[FG])
-        self.style.configure('Card.TLabel', background=theme_colors[CARD], foreground=theme_colors[FG])
-        self.style.configure('Desc.TLabel', background=theme_colors[BG], foreground=theme_colors[LBL_DESC_FG], font=FONT_DESC)
-        self.style.configure('CardDesc.TLabel', background=theme_colors[CARD], foreground=theme_colors[LBL_DESC_FG], font=FONT_DESC)
-        self.style.configure('DialogDesc.TLabel', background=theme_colors[DLG_CARD], foreground=theme_colors[LBL_DESC_FG], font=FONT_DESC)
-        self.style.configure('Title.TLabel', background=theme_colors[BG], foreground=theme_colors[FG], font=FONT_LARGE)
-        self.style.configure('CardTitle.TLabel', background=theme_colors[CARD], foreground=theme_colors[FG], font=FONT_BOLD)
-        self.style.configure('Accent.TLabel', background=theme_colors[CARD], foreground=theme_colors[ACCENT], font=FONT_BOLD)
-        self.style.configure('Error.TLabel', background=theme_colors[BG], foreground=theme_colors[RED], font=FONT_BOLD)
-        date_time_fg = theme_colors[DISABLED] if self.current_theme == 'eco_dark' else theme_colors[ACCENT_DARKER]
-        self.style.configure('DateTime.TLabel', background=theme_colors[SIDEBAR], foreground=date_time_fg, font=FONT_SMALL)
+    # IVO+GPT
+    def _on_activity_load_finished(self, activities):
+        self._on_activity_load_progress(activities, len(activities), 1.0) # Rows after the last progress tick
+        self._end_activity_load()
+        finish_activity_load(self.current_user_id, activities)
+        logging.info("Background load finished for %s. Activities: %s", self.current_user_id, len(activities))
+        page = self.current_page_frame
+        if page is not None and hasattr(page, "on_activities_loaded"):
+            page.on_activities_loaded()
 
-        # Button Styling
-        self.style.configure('TButton', background=theme_colors[ACCENT], foreground=theme_colors[BTN_FG], font=FONT_BOLD, padding=6, borderwidth=0, relief=tk.FLAT)
-        self.style.map('TButton', background=[('active', theme_colors[ACCENT_DARKER])], foreground=[('active', theme_colors[BTN_FG])])
-        self.style.configure('Sidebar.TButton', background=theme_colors[SIDEBAR], foreground=theme_colors[FG], font=FONT_BOLD, anchor='w', padding=(15, 8), borderwidth=0, relief=tk.FLAT)
-        self.style.map('Sidebar.TButton', background=[('active', theme_colors[ACCENT]), ('selected', theme_colors[ACCENT])], foreground=[('active', theme_colors[BTN_FG]), ('selected', theme_colors[BTN_FG])])
-        self.style.configure('FAB.TButton', background=theme_colors[ACCENT], foreground=theme_colors[BTN_FG], font=(FONT_FAMILY, 18, "bold"), padding=10, borderwidth=0, relief=tk.FLAT)
-        self.style.map('FAB.TButton', background=[('active', theme_colors[ACCENT_DARKER])])
+    # IVO+GPT
+    def _end_activity_load(self):
+        self.activities_loading = False
+        self._activity_load_queue = None
+        if self._activity_load_after_id:
+            try: self.after_cancel(self._activity_load_after_id)
+            except tk.TclError: pass
+            self._activity_load_after_id = None
+        self.load_progress_frame.place_forget()
 
-        # Treeview Styling
-        self.style.configure("Treeview", background=theme_colors[CARD], foreground=theme_colors[FG], fieldbackground=theme_colors[CARD], rowheight=28, borderwidth=0, relief=tk.FLAT)
-        self.style.configure("Treeview.Heading", background=theme_colors[TV_HEAD_BG], foreground=theme_colors[FG], font=FONT_BOLD, relief="flat", padding=(5, 5))
-        self.style.map("Treeview.Heading", background=[('active', theme_colors[ACCENT])])
-        self.style.layout("Treeview", [('Treeview.treearea', {'sticky': 'nswe'})])
+    # IVO+GPT
+    def discard_activity_load(self):
+        """Abandons a running background load (its result is dropped), e.g. before resetting data."""
+        if self.activities_loading:
+            logging.info("Discarding background activities load for %s.", self.current_user_id)
+            self._end_activity_load()
+            app_state["activities_loading"] = False
 
-        # Progressbar Styling
-        self.style.configure("TProgressbar", thickness=10, background=theme_colors[ACCENT], troughcolor=theme_colors[CARD])
+    # IVO-ONLY
+    def _poll_factor_file(self):
+        """Stat-polls emission_factors.csv (through the catalog's stamp check), exchange_rates.csv and the grid profiles, hot-reloading edits."""
+        self._factor_watch_after_id = None
+        try:
+            # Edits made while a load or recompute runs are picked up on a later tick
+            if self._factor_recompute is None and not self.activities_loading:
+                if load_factor_catalog().get("version") != app_state.get("factor_set_version"):
+                    self._reload_emission_factors()
+                elif exchange_rates_changed(current_exchange_rates()):
+                    self._reload_exchange_rates()
+                elif grid_profiles_changed(current_grid_profiles()):
+                    self._reload_grid_profiles()
+        except Exception:
+            logging.exception("Emission factor file check failed")
+        self._factor_watch_after_id = self.after(FACTOR_WATCH_POLL_MS, self._poll_factor_file)
 
-        # Combobox Styling (Listbox part)
-        # Use option_add for listbox customization (standard Tk practice)
-        self.option_add('*TCombobox*Listbox*Background', theme_colors[CB_LIST_BG])
-        self.option_add('*TCombobox*Listbox*Foreground', theme_colors[CB_LIST_FG])
-        self.option_add('*TCombobox*Listbox*selectBackground', theme_colors[CB_LIST_SEL_BG])
-        self.option_add('*TCombobox*Listbox*selectForeground', theme_colors[CB_LIST_SEL_FG])
-        # Combobox widget itself
-        self.style.configure('TCombobox', background=theme_colors[CARD], foreground=theme_colors[FG], fieldbackground=theme_colors[CARD], selectbackground=theme_colors[CARD], selectforeground=theme_colors[FG], arrowcolor=theme_colors[FG], borderwidth=1, padding=5, relief=tk.FLAT, bordercolor=theme_colors[DISABLED]) # Add subtle border
-        self.style.map('TCombobox', fieldbackground=[('readonly', theme_colors[CARD])], bordercolor=[('focus', theme_colors[ACCENT])]) # Highlight border on focus
+    # IVO-ONLY
+    def _reload_emission_factors(self):
+        """Installs the edited factors, then recomputes the affected activities on a worker thread."""
+        old_factors, old_version = app_state.get("emission_factors") or {}, app_state.get("factor_set_version")
+        load_emission_factors() # New submissions use the new factors from here on
+        new_version = app_state["factor_set_version"]
+        changed_ids = diff_factor_sets(old_factors, app_state["emission_factors"])
+        logging.info("Emission factors reloaded: factor set %s -> %s, %s factors changed.", old_version, new_version, len(changed_ids))
+        activities = app_state.get("activities")
+        if not changed_ids or not activities or old_version is None:
+            return
 
-        # Entry Styling
-        self.style.configure('TEntry', background=theme_colors[CARD], foreground=theme_colors[FG], fieldbackground=theme_colors[CARD], insertcolor=theme_colors[FG], borderwidth=1, padding=5, relief=tk.FLAT, bordercolor=theme_colors[DISABLED]) # Add subtle border
-        self.style.map('TEntry', fieldbackground=[('focus', theme_colors[CARD])], bordercolor=[('focus', theme_colors[ACCENT])]) # Highlight border on focus
+        snapshot, factors, rates, grid_profiles = list(activities), get_factor_set(new_version), current_exchange_rates(), current_grid_profiles()
+        self._start_recompute("factor", lambda: plan_factor_change(snapshot, old_version, new_version, changed_ids, factors, rates, grid_profiles))
 
-        # Notebook Styling
-        self.style.configure('TNotebook', background=theme_colors[BG], borderwidth=0)
-        self.style.configure('TNotebook.Tab', font=FONT_BOLD, padding=[10, 5], background=theme_colors[CARD], foreground=theme_colors[FG], borderwidth=0)
-        self.style.map('TNotebook.Tab', background=[('selected', theme_colors[ACCENT])], foreground=[('selected', theme_colors[BTN_FG])])
+    # IVO-ONLY
+    def _reload_exchange_rates(self):
+        """Installs the edited rate table, then recomputes shopping activities in the changed date span."""
+        old_rates = current_exchange_rates()
+        new_rates = load_exchange_rates() # New submissions use the new rates from here on
+        logging.info("Exchange rates reloaded: %s rates (%s -> %s), changed span %s.",
+                     len(new_rates.dates), old_rates.version, new_rates.version, old_rates.changed_span(new_rates))
+        activities = app_state.get("activities")
+        if old_rates.version == new_rates.version or not activities:
+            return
+        snapshot = list(activities)
+        self._start_recompute("rate", lambda: plan_rate_change(snapshot, old_rates, new_rates))
 
-        # Scrollbar Styling
-        self.style.configure("Vertical.TScrollbar", background=theme_colors[SB_BG], troughcolor=theme_colors[SB_TROUGH], borderwidth=0, arrowcolor=theme_colors[FG], relief=tk.FLAT)
-        self.style.map("Vertical.TScrollbar", background=[('active', theme_colors[ACCENT])])
+    # IVO-ONLY
+    def _reload_grid_profiles(self):
+        """Installs the edited grid profiles, then recomputes the activities that read them."""
+        old_version = current_grid_profiles().version
+        new_profiles = load_grid_profiles() # New submissions use the new profiles from here on
+        logging.info("Grid profiles reloaded: %s -> %s.", old_version, new_profiles.version)
+        activities = app_state.get("activities")
+        if old_version == new_profiles.version or not activities:
+            return
+        snapshot, rates = list(activities), current_exchange_rates()
+        self._start_recompute("grid", lambda: plan_grid_change(snapshot, new_profiles, rates))
 
-        # Checkbutton/Radiobutton Styling
-        # Base style matching background
-        self.style.configure("TCheckbutton", background=theme_colors[BG], foreground=theme_colors[FG], font=FONT_NORMAL)
-        self.style.map("TCheckbutton", indicatorcolor=[('selected', theme_colors[ACCENT])])
-        self.style.configure("TRadiobutton", background=theme_colors[BG], foreground=theme_colors[FG], font=FONT_NORMAL)
-        self.style.map("TRadiobutton", indicatorcolor=[('selected', theme_colors[ACCENT])])
-        # Variations for placing on cards/dialog cards
-        self.style.configure("Card.TRadiobutton", background=theme_colors[CARD], foreground=theme_colors[FG])
-        self.style.map("Card.TRadiobutton", background=[('active', theme_colors[CARD])], indicatorcolor=[('selected', theme_colors[ACCENT])])
-        self.style.configure("Dialog.TRadiobutton", background=theme_colors[DLG_CARD], foreground=theme_colors[DLG_FG])
-        self.style.map("Dialog.TRadiobutton", background=[('active', theme_colors[DLG_CARD])], indicatorcolor=[('selected', theme_colors[ACCENT])])
-        self.style.configure("Card.TCheckbutton", background=theme_colors[CARD], foreground=theme_colors[FG])
-        self.style.map("Card.TCheckbutton", background=[('active', theme_colors[CARD])], indicatorcolor=[('selected', theme_colors[ACCENT])])
-        self.style.configure("Dialog.TCheckbutton", background=theme_colors[DLG_CARD], foreground=theme_colors[DLG_FG])
-        self.style.map("Dialog.TCheckbutton", background=[('active', theme_colors[DLG_CARD])], indicatorcolor=[('selected', theme_colors[ACCENT])])
+    # IVO-ONLY
+    def _start_recompute(self, kind, plan):
+        """Runs plan() -> (replacements, changed) on a worker thread; _poll_factor_recompute applies the result."""
+        result_queue = queue.SimpleQueue()
 
-        # Toolbutton (if used later)
-        self.style.configure("Toolbutton", anchor="center", padding=5, font=FONT_NORMAL, background=theme_colors[CARD], foreground=theme_colors[FG], borderwidth=1, relief="raised")
-        self.style.map("Toolbutton", relief=[('selected', 'sunken'), ('active', 'raised')], background=[('selected', theme_colors[ACCENT]), ('active', theme_colors[CARD])], foreground=[('selected', theme_colors[BTN_FG]), ('active', theme_colors[FG])])
+        def worker(): # No Tk calls here
+            try:
+                result_queue.put(plan())
+            except Exception:
+                logging.exception("Hot reload recompute (%s) failed for %s", kind, self.current_user_id)
+                result_queue.put(None)
 
-        # --- Update non-ttk widget backgrounds ---
-        self.configure(bg=theme_colors[BG])
-        # Check existence before configuring existing widgets
-        if hasattr(self, 'main_frame') and self.main_frame and self.main_frame.winfo_exists():
-            self.main_frame.configure(bg=theme_colors[BG])
-        if hasattr(self, 'sidebar') and self.sidebar and self.sidebar.winfo_exists():
-            self.sidebar.configure(bg=theme_colors[SIDEBAR])
-            # Re-apply styles to sidebar widgets if needed (e.g., labels)
-            self.sidebar.update_styles()
-        if hasattr(self, 'fab') and self.fab and self.fab.winfo_exists():
-            self.fab.configure(style="FAB.TButton") # Re-apply style
+        self._factor_recompute = (result_queue, app_state.get("activities"), time.perf_counter(), kind)
+        threading.Thread(target=worker, name=f"{kind}-recompute-{self.current_user_id}", daemon=True).start()
+        self._factor_recompute_after_id = self.after(ACTIVITY_LOAD_POLL_MS, self._poll_factor_recompute)
+
+    # IVO-ONLY
+    def _poll_factor_recompute(self):
+        """Applies a finished hot reload recompute, saves, and refreshes the visible page in place."""
+        self._factor_recompute_after_id = None
+        if self._factor_recompute is None:
+            return
+        result_queue, activities, started, kind = self._factor_recompute
+        try:
+            result = result_queue.get_nowait()
+        except queue.Empty:
+            self._factor_recompute_after_id = self.after(ACTIVITY_LOAD_POLL_MS, self._poll_factor_recompute)
+            return
+        self._factor_recompute = None
+        if result is None:
+            return
+        if app_state.get("activities") is not activities: # e.g. data reset meanwhile
+            logging.info("Activities were replaced during the %s recompute. Result dropped.", kind)
+            return
+
+        replacements, changed = result
+        applied = set()
+        for index, old_record, new_record in replacements:
+            # Records edited since the snapshot (e.g. Recalculate Footprints) are left alone
+            if index < len(activities) and activities[index] is old_record:
+                activities[index] = new_record
+                applied.add(index)
+        changed = [index for index in changed if index in applied]
+        if perf_monitor.enabled:
+            perf_monitor.record(f"{kind}_hot_reload", (time.perf_counter() - started) * 1000.0)
+        logging.info("Hot reload (%s): %s activities replaced, %s footprints changed.", kind, len(applied), len(changed))
+        if not applied:
+            return
+
+        what = {"factor": "Emission factors", "rate": "Exchange rates", "grid": "Grid profiles"}[kind]
+        log_activity(f"{what} reloaded ({len(changed)} footprints updated)")
+        save_user_data(self.current_user_id, keys=("activities", "activity_log"))
+        page = self.current_page_frame
+        if changed and page is not None and hasattr(page, "on_activities_recomputed"):
+            page.on_activities_recomputed(changed)
+
+    # IVO-ONLY
+    def _stop_factor_watch(self):
+        for attr in ("_factor_watch_after_id", "_factor_recompute_after_id"):
+            after_id = getattr(self, attr)
+            if after_id:
+                try: self.after_cancel(after_id)
+                except tk.TclError: pass
+                setattr(self, attr, None)
+        self._factor_recompute = None # A running worker's result is never read
 
     # EXPENSEWISE
     def switch_theme(self, theme_name):
-        """Switches the application theme and redraws UI elements."""
+        """Switches the application theme, restyling existing widgets in place."""
         if theme_name == self.current_theme or self._page_creation_lock:
             return # Avoid unnecessary switches or race conditions
-        logging.info(f"Switching theme to: {theme_name}")
+        logging.info("Switching theme to: %s", theme_name)
+        previous_theme = self.current_theme
         self.current_theme = theme_name
         app_state["settings"]["theme"] = theme_name # Update setting in memory
-        # Save the updated setting immediately
+        # Save only the settings file immediately
         # Do not proceed with UI changes if save fails
-        if not save_user_data(self.current_user_id):
+        if not save_user_data(self.current_user_id, keys=("settings",)):
             # Error message shown by save_user_data
             # Revert theme choice in memory
-            self.current_theme = "eco_light" if theme_name == "eco_dark" else "eco_dark"
-            app_state["settings"]["theme"] = self.current_theme
+            self.current_theme = previous_theme
+            app_state["settings"]["theme"] = previous_theme
             return
 
-        self._apply_theme_colors() # Update global colors
-
         try:
-            # Reconfigure all styles
-            self._configure_styles()
-
-            # Recreate Sidebar (simplest way to ensure all its styles update)
-            current_page_name = "CarbonDashboardPage" # Default
+            # Update global colors, switch ttk styles (cached per theme) and recolour raw Tk widgets in one pass
+            self.root_window.apply_theme(theme_name)
+            theme_registry.apply(theme_colors)
             if hasattr(self, 'sidebar') and self.sidebar and self.sidebar.winfo_exists():
-                current_page_name = self.sidebar.get_current_page_name() or "CarbonDashboardPage"
-                self.sidebar.stop_timer() # Essential before destroying
-                self.sidebar.destroy()
-
-            self.sidebar = Sidebar(self, self._show_page)
-            self.sidebar.grid(row=0, column=0, sticky="nsw")
-
-            # Recreate the current page with the new theme
-            self._page_creation_lock = True # Prevent recursive calls
-            try:
-                self._show_page(current_page_name)
-            finally:
-                self._page_creation_lock = False # Release lock
-
-            # Re-apply FAB style just in case
-            if hasattr(self, 'fab') and self.fab and self.fab.winfo_exists():
-                self.fab.configure(style="FAB.TButton")
-
+                self.sidebar.update_styles() # Re-apply styles to sidebar labels
             log_activity(f"Theme switched to {theme_name}")
         except Exception as e:
             logging.exception("Unexpected error during theme switch")
             messagebox.showerror("Theme Switch Error", f"Error switching theme:\n{e}", parent=self)
-            # Attempt recovery by forcing dashboard display
+            # Attempt recovery by rebuilding the current page
             try:
-                self._page_creation_lock = True
-                self._show_page("CarbonDashboardPage")
+                self.refresh_current_page()
             except Exception as recovery_e:
-                 logging.error(f"Failed to recover after theme switch error: {recovery_e}")
-            finally:
-                self._page_creation_lock = False
+                 logging.error("Failed to recover after theme switch error: %s", recovery_e)
 
     # IVO+GPT
+    @perf_monitor.instrument("show_page")
     def _show_page(self, page_name):
         """Destroys the current page and displays the requested one."""
         if self._page_creation_lock: return # Prevent recursive calls during theme switch
-        logging.info(f"Showing page: {page_name}")
+        logging.info("Showing page: %s", page_name)
 
         # Safely destroy the previous page frame
         if self.current_page_frame and self.current_page_frame.winfo_exists():
@@ -1081,7 +4457,7 @@ class ECOHUBApp(tk.Tk):
                 # BasePage handles mousewheel unbinding in its destroy method
                 self.current_page_frame.destroy()
             except Exception as e:
-                logging.warning(f"Error destroying previous page frame '{type(self.current_page_frame).__name__}': {e}")
+                logging.warning("Error destroying previous page frame '%s': %s", type(self.current_page_frame).__name__, e)
             finally:
                  self.current_page_frame = None
 
@@ -1095,6 +4471,7 @@ class ECOHUBApp(tk.Tk):
             "ServicesPage": ServicesPage,
             "DigitalPage": DigitalPage,
             "User History": UserHistoryPage,
+            "Performance": PerformancePage,
             "Settings": SettingsPage
         }
 
@@ -1106,13 +4483,13 @@ class ECOHUBApp(tk.Tk):
                 self.current_page_frame = page_class(self.main_frame, self) # Pass app instance
                 self.current_page_frame.grid(row=0, column=0, sticky="nsew")
             except Exception as e:
-                logging.exception(f"Error creating page '{page_name}'")
+                logging.exception("Error creating page '%s'", page_name)
                 messagebox.showerror("Page Load Error", f"Could not load page '{page_name}':\n{e}", parent=self)
                 # Show a placeholder on error
                 self.current_page_frame = PlaceholderPage(self.main_frame, f"Error loading {page_name}", self)
                 self.current_page_frame.grid(row=0, column=0, sticky="nsew")
         else:
-            logging.warning(f"Page class not found for '{page_name}'. Showing placeholder.")
+            logging.warning("Page class not found for '%s'. Showing placeholder.", page_name)
             self.current_page_frame = PlaceholderPage(self.main_frame, page_name, self)
             self.current_page_frame.grid(row=0, column=0, sticky="nsew")
 
@@ -1124,35 +4501,46 @@ class ECOHUBApp(tk.Tk):
     # IVO+GPT
     def open_add_activity_dialog(self):
         """Opens the modal dialog to add a new carbon activity."""
+        if self.activities_loading: # Saving now would write the partial history
+            messagebox.showinfo("Please Wait", "Your activity history is still loading. Try again in a moment.", parent=self)
+            return
         # Dialog handles its own lifecycle (waits until closed)
         dialog = AddCarbonFootprintActivityDialog(self)
         # No return value needed here, dialog updates app_state directly
 
     # IVO+GPT
+    @perf_monitor.instrument("refresh_current_page")
     def refresh_current_page(self):
         """Reloads the currently displayed page."""
         current_page_name = "CarbonDashboardPage" # Default
         if hasattr(self, 'sidebar') and self.sidebar and self.sidebar.winfo_exists():
             current_page_name = self.sidebar.get_current_page_name() or "CarbonDashboardPage"
 
-        logging.debug(f"Refreshing page: {current_page_name}")
+        logging.debug("Refreshing page: %s", current_page_name)
         # Showing the page handles destroying the old and creating the new
         self._show_page(current_page_name)
 
     # IVO-ONLY
-    def on_closing(self):
-        """Handles window close event (WM_DELETE_WINDOW or explicit close)."""
-        logging.info(f"ECOHUBApp closing sequence initiated for user {self.current_user_id}...")
+    def on_closing(self, save_data=True):
+        """Ends the session (window close or explicit close) and returns to profile selection.
+
+        After perform_full_exit() the whole application exits instead.
+        """
+        logging.info("ECOHUBApp closing sequence initiated for user %s...", self.current_user_id)
 
         # --- Pre-destroy actions ---
         # Save data ONLY if a full exit wasn't requested and we have a user ID.
-        if not self._full_exit_requested and self.current_user_id:
-            logging.info(f"Saving user data for {self.current_user_id} before closing.")
+        if not save_data:
+             logging.info("Skipping final data save (session data discarded).")
+        elif not self._full_exit_requested and self.current_user_id:
+            logging.info("Saving user data for %s before closing.", self.current_user_id)
             save_user_data(self.current_user_id) # Handle potential errors internally
         elif self._full_exit_requested:
              logging.info("Full exit requested, skipping final data save.")
         else:
              logging.warning("Skipping data save on closing (no user ID).")
+        self.discard_activity_load() # After the save, which skips the still-loading activities
+        self._stop_factor_watch()
 
         # Stop sidebar timer safely
         try:
@@ -1161,20 +4549,24 @@ class ECOHUBApp(tk.Tk):
             else:
                 logging.debug("Sidebar timer stop skipped (sidebar invalid or destroyed).")
         except Exception as sidebar_e:
-             logging.warning(f"Error stopping sidebar timer during on_closing: {sidebar_e}")
+             logging.warning("Error stopping sidebar timer during on_closing: %s", sidebar_e)
 
-        # --- Initiate destruction ---
-        # Call destroy() to close the Tkinter window and end mainloop
-        logging.info("Initiating self.destroy().")
+        # --- Swap the view ---
+        # The root destroys this frame (pages cancel their queued UI work on destroy)
         try:
-            self.destroy()
+            if self._full_exit_requested:
+                logging.info("Full exit requested. Terminating.")
+                self.root_window.exit_app()
+            else:
+                logging.info("Main app closed. Returning to accounts.")
+                self.root_window.show_accounts()
         except Exception as destroy_e:
-             logging.error(f"Error during self.destroy(): {destroy_e}")
+             logging.error("Error while closing the session view: %s", destroy_e)
 
     # EXPENSEWISE
     def perform_full_exit(self):
         """Sets flag for full exit and starts the closing process."""
-        logging.info(f"Full application exit requested by user {self.current_user_id}.")
+        logging.info("Full application exit requested by user %s.", self.current_user_id)
         self._full_exit_requested = True
         # Trigger the standard closing procedure, which will handle destroy()
         self.on_closing()
@@ -1191,6 +4583,7 @@ class Sidebar(tk.Frame):
         self.buttons = {} # Stores {page_name: button_widget}
         self.current_page_name = None # Tracks the highlighted page
         self._timer_id = None # For the datetime update schedule
+        self._datetime_text = None # Last text shown in datetime_label
 
         self._build_sidebar_ui()
         self.update_datetime() # Start the clock update
@@ -1219,6 +4612,7 @@ class Sidebar(tk.Frame):
         sidebar_items.extend([
             {"type": "separator"},
             {"name": "User History", "text": "📜 History", "type": "page"},
+            {"name": "Performance", "text": "⏱️ Performance", "type": "page"},
             {"name": "Settings", "text": "⚙️ Settings", "type": "page"},
         ])
 
@@ -1247,12 +4641,12 @@ class Sidebar(tk.Frame):
                 self.buttons[page_name] = btn # Store reference
 
         # Spacer to push elements up
-        tk.Frame(self, bg=theme_colors[SIDEBAR]).pack(expand=True, fill="y")
+        theme_registry.register(tk.Frame(self), bg=SIDEBAR).pack(expand=True, fill="y")
 
     # EXPENSEWISE
     def update_styles(self):
         """Updates styles of non-ttk elements or elements needing manual refresh."""
-        # Called after theme switch by ECOHUBApp._configure_styles
+        # Called after theme switch by ECOHUBApp.switch_theme
         self.configure(bg=theme_colors[SIDEBAR])
         if hasattr(self, 'title_label') and self.title_label.winfo_exists():
              self.title_label.configure(style="Sidebar.TLabel") # Re-apply style
@@ -1268,18 +4662,22 @@ class Sidebar(tk.Frame):
         datetime_str = now.strftime("%a, %d %b %Y | %H:%M:%S")
         try:
             if self.datetime_label and self.datetime_label.winfo_exists():
-                self.datetime_label.configure(text=datetime_str)
-                # Schedule the next update using self.after
-                self._timer_id = self.after(1000, self.update_datetime)
+                # Skip the Tk reconfigure when the text hasn't changed
+                if datetime_str != self._datetime_text:
+                    self.datetime_label.configure(text=datetime_str)
+                    self._datetime_text = datetime_str
+                # Schedule the next update just after the next whole second (no drift, one redraw per tick)
+                ms_to_next_second = 1000 - now.microsecond // 1000 + 5
+                self._timer_id = self.after(ms_to_next_second, self.update_datetime)
             else:
                 # Label was destroyed (e.g., during theme switch before recreation)
                 self._timer_id = None
                 logging.debug("Sidebar datetime_label destroyed, stopping timer.")
         except tk.TclError as e:
-            logging.warning(f"TclError updating sidebar time (widget likely destroyed): {e}")
+            logging.warning("TclError updating sidebar time (widget likely destroyed): %s", e)
             self._timer_id = None
         except Exception as e:
-            logging.exception(f"Error in sidebar update_datetime: {e}")
+            logging.exception("Error in sidebar update_datetime: %s", e)
             self._timer_id = None # Stop timer on error
 
     # EXPENSEWISE
@@ -1290,7 +4688,7 @@ class Sidebar(tk.Frame):
                 self.after_cancel(self._timer_id)
                 logging.debug("Sidebar datetime timer cancelled.")
             except tk.TclError: pass # Ignore error if timer ID is invalid (already cancelled/run)
-            except Exception as e: logging.exception(f"Error cancelling sidebar timer: {e}")
+            except Exception as e: logging.exception("Error cancelling sidebar timer: %s", e)
             finally: self._timer_id = None
 
     # EXPENSEWISE
@@ -1298,14 +4696,14 @@ class Sidebar(tk.Frame):
         """Sets the 'selected' state for the corresponding sidebar button."""
         if not page_name: return
         self.current_page_name = page_name
-        logging.debug(f"Highlighting sidebar button for: {page_name}")
+        logging.debug("Highlighting sidebar button for: %s", page_name)
         for name, button in self.buttons.items():
             if button and button.winfo_exists():
                 try:
                     # Use 'selected' state for the active button, '!selected' for others
                     button.state(['selected'] if name == page_name else ['!selected'])
                 except tk.TclError as e:
-                    logging.warning(f"TclError setting state for sidebar button '{name}': {e}")
+                    logging.warning("TclError setting state for sidebar button '%s': %s", name, e)
 
     # EXPENSEWISE
     def get_current_page_name(self):
@@ -1330,6 +4728,7 @@ class BasePage(tk.Frame):
     # IVO+GPT
     def __init__(self, parent, app):
         super().__init__(parent, bg=theme_colors[BG])
+        theme_registry.register(self, bg=BG)
         self.app = app # Reference to the main ECOHUBApp instance
         self.app_data = app_state # Direct access to the shared data dictionary (using renamed var)
         self._mousewheel_bound_widgets = set() # Track widgets with mousewheel bound
@@ -1338,11 +4737,11 @@ class BasePage(tk.Frame):
     def _setup_scrollable_frame(self):
         """Creates the canvas, scrollbar, and scrollable content frame."""
         # Main canvas for scrolling
-        self.canvas = tk.Canvas(self, bg=theme_colors[BG], highlightthickness=0, yscrollincrement=1)
+        self.canvas = theme_registry.register(tk.Canvas(self, highlightthickness=0, yscrollincrement=1), bg=BG)
         # Scrollbar linked to the canvas
         self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.canvas.yview, style="Vertical.TScrollbar")
         # Frame inside the canvas to hold the actual page content
-        self.scrollable_frame = tk.Frame(self.canvas, bg=theme_colors[BG])
+        self.scrollable_frame = theme_registry.register(tk.Frame(self.canvas), bg=BG)
 
         # Link canvas scrollbar
         self.canvas.configure(yscrollcommand=self.scrollbar.set)
@@ -1406,7 +4805,7 @@ class BasePage(tk.Frame):
                      self._mousewheel_bound_widgets.discard(widget)
                      # logging.debug(f"Mousewheel unbound from {widget}")
                  except tk.TclError: pass # Ignore errors if widget destroyed concurrently
-                 except Exception as e: logging.error(f"Error unbinding mousewheel from {widget}: {e}")
+                 except Exception as e: logging.error("Error unbinding mousewheel from %s: %s", widget, e)
         self._mousewheel_bound_widgets.clear() # Ensure set is empty
 
     # IVO+GPT
@@ -1433,13 +4832,16 @@ class BasePage(tk.Frame):
                 if can_scroll_up or can_scroll_down:
                     self.canvas.yview_scroll(delta, "units")
             except tk.TclError as e:
-                logging.warning(f"TclError during canvas scroll: {e}") # May happen if widget destroyed during scroll
+                logging.warning("TclError during canvas scroll: %s", e) # May happen if widget destroyed during scroll
 
     # IVO-ONLY
     def destroy(self):
         """Overrides destroy to ensure mousewheel events are unbound."""
-        logging.debug(f"Destroying {type(self).__name__}, unbinding mousewheel events.")
+        logging.debug("Destroying %s, unbinding mousewheel events.", type(self).__name__)
         self._unbind_all_mousewheel()
+        # Cancel chunked work (e.g. history population) still targeting this page
+        scheduler = getattr(self.app, 'scheduler', None)
+        if scheduler: scheduler.cancel_owner(self)
         super().destroy()
 
     # IVO-ONLY
@@ -1511,7 +4913,7 @@ class CarbonDashboardPage(BasePage):
         # --- Page Content (inside content_frame) ---
         user_name = self.app_data['user_profiles'].get(self.app.current_user_id, {}).get('name', 'User')
         ttk.Label(content_frame, text=f"Welcome, {user_name}!", style="Title.TLabel").grid(row=0, column=0, sticky="w", pady=(10, 5), padx=10)
-        ttk.Label(content_frame, text="Your carbon footprint overview and activity history.", style="Desc.TLabel", background=theme_colors[BG]).grid(row=1, column=0, sticky="w", pady=(0, 15), padx=10)
+        theme_registry.register(ttk.Label(content_frame, text="Your carbon footprint overview and activity history.", style="Desc.TLabel"), background=BG).grid(row=1, column=0, sticky="w", pady=(0, 15), padx=10)
 
         # Summary Cards Section
         self.create_carbon_summary_section(content_frame, row=2)
@@ -1526,30 +4928,26 @@ class CarbonDashboardPage(BasePage):
     # IVO+GPT
     def create_carbon_summary_section(self, parent_frame, row):
         """Creates the summary cards for each category."""
-        summary_outer_frame = tk.Frame(parent_frame, bg=theme_colors[BG])
+        summary_outer_frame = theme_registry.register(tk.Frame(parent_frame), bg=BG)
         summary_outer_frame.grid(row=row, column=0, sticky="ew", pady=(10, 15), padx=10)
         summary_outer_frame.grid_columnconfigure(0, weight=1)
 
-        ttk.Label(summary_outer_frame, text="Category Summary", style="CardTitle.TLabel", background=theme_colors[BG]).pack(anchor="w", pady=(0, 10))
+        theme_registry.register(ttk.Label(summary_outer_frame, text="Category Summary", style="CardTitle.TLabel"), background=BG).pack(anchor="w", pady=(0, 10))
 
         # Grid frame for the cards
-        summary_grid_frame = tk.Frame(summary_outer_frame, bg=theme_colors[BG])
+        summary_grid_frame = theme_registry.register(tk.Frame(summary_outer_frame), bg=BG)
         summary_grid_frame.pack(fill="x")
 
-        # Calculate category totals
+        # Calculate category totals (while activities load in the background, use the saved summary's)
         all_activities = self.app_data.get("activities", [])
         conversion_unit = self.app_data.get("settings", {}).get("conversion", "CO2e")
-        category_totals = {cat_key: 0.0 for cat_key in BASE_CATEGORIES}
-
-        if all_activities:
-            for activity in all_activities:
-                cat = activity.get("category")
-                fp_raw = activity.get("carbon_footprint")
-                if cat in category_totals and fp_raw is not None:
-                    try: category_totals[cat] += float(fp_raw)
-                    except (ValueError, TypeError): pass # Ignore invalid values
+        if self.app.activities_loading:
+            category_totals = (load_profile_summary(self.app.current_user_id) or {}).get("category_kg") or {}
         else:
-             logging.info("No activities for summary.")
+            category_totals = aggregate_category_totals(all_activities)
+            if not all_activities:
+                 logging.info("No activities for summary.")
+        self.summary_value_labels = {} # category_key -> emission label, updated when loading finishes
 
         # Configure grid columns based on number of categories
         num_categories = len(BASE_CATEGORIES)
@@ -1566,14 +4964,16 @@ class CarbonDashboardPage(BasePage):
              return
 
         for category_key, category_info in sorted_categories:
-            emission_value = category_totals.get(category_key, 0.0)
+            emission_value = category_totals.get(category_key)
             card = create_card_frame(summary_grid_frame)
             card.grid(row=grid_row_card, column=grid_col_card, sticky="nsew", padx=5, pady=5)
             card.grid_columnconfigure(0, weight=1) # Allow labels inside card to align
 
             ttk.Label(card, text=f"{category_info['icon']} {category_info['name']}", style="CardTitle.TLabel").grid(row=0, column=0, sticky="w", padx=10, pady=(10, 0))
-            emission_label = ttk.Label(card, text=format_carbon_emission(emission_value, conversion_unit), style="Card.TLabel", font=FONT_LARGE)
+            emission_text = format_carbon_emission(emission_value or 0.0, conversion_unit) if emission_value is not None or not self.app.activities_loading else "Loading..."
+            emission_label = ttk.Label(card, text=emission_text, style="Card.TLabel", font=FONT_LARGE)
             emission_label.grid(row=1, column=0, sticky="w", padx=10, pady=(5, 10))
+            self.summary_value_labels[category_key] = emission_label
 
             grid_col_card += 1
             if grid_col_card >= cols:
@@ -1583,16 +4983,16 @@ class CarbonDashboardPage(BasePage):
     # IVO+GPT
     def create_activity_history_section(self, parent_frame, row):
         """Creates the Treeview displaying all recorded activities."""
-        history_outer_frame = tk.Frame(parent_frame, bg=theme_colors[BG])
+        history_outer_frame = theme_registry.register(tk.Frame(parent_frame), bg=BG)
         parent_frame.grid_rowconfigure(row, weight=1) # Allow this row to expand vertically
         history_outer_frame.grid(row=row, column=0, sticky="nsew", pady=(10, 10), padx=10)
         history_outer_frame.grid_columnconfigure(0, weight=1)
         history_outer_frame.grid_rowconfigure(1, weight=1) # Tree container expands vertically
 
-        ttk.Label(history_outer_frame, text="Full Activity History", style="CardTitle.TLabel", background=theme_colors[BG]).grid(row=0, column=0, sticky="w", pady=(0, 5))
+        theme_registry.register(ttk.Label(history_outer_frame, text="Full Activity History", style="CardTitle.TLabel"), background=BG).grid(row=0, column=0, sticky="w", pady=(0, 5))
 
         # Container for Treeview + Scrollbar
-        tree_container = tk.Frame(history_outer_frame, bg=theme_colors[CARD])
+        tree_container = theme_registry.register(tk.Frame(history_outer_frame), bg=CARD)
         tree_container.grid(row=1, column=0, sticky="nsew")
         tree_container.grid_columnconfigure(0, weight=1)
         tree_container.grid_rowconfigure(0, weight=1)
@@ -1603,9 +5003,8 @@ class CarbonDashboardPage(BasePage):
         tree_scrollbar = ttk.Scrollbar(tree_container, orient="vertical", command=tree.yview, style="Vertical.TScrollbar")
         tree.configure(yscrollcommand=tree_scrollbar.set)
 
-        # Configure tags for alternating row colors ON THE TREEVIEW INSTANCE
-        tree.tag_configure('oddrow', background=theme_colors[TV_ODD], foreground=theme_colors[FG])
-        tree.tag_configure('evenrow', background=theme_colors[TV_EVEN], foreground=theme_colors[FG])
+        # Configure tags for alternating row colors ON THE TREEVIEW INSTANCE (kept themed)
+        theme_registry.register_tree(tree)
 
         # Headings and Columns
         tree.heading("timestamp", text="Date & Time", anchor=tk.W)
@@ -1625,43 +5024,115 @@ class CarbonDashboardPage(BasePage):
 
         # --- Populate Treeview ---
         all_activities = self.app_data.get("activities", [])
-        logging.debug(f"Populating dashboard history with {len(all_activities)} activities.")
+        logging.debug("Populating dashboard history with %s activities.", len(all_activities))
 
         # Clear existing items safely
         try:
              for item in tree.get_children(): tree.delete(item)
         except tk.TclError: pass # Ignore if tree already gone
 
+        if self.app.activities_loading:
+            # Rows stream in as the background load reports progress; catch up on those already read
+            if self.app.loaded_activity_count:
+                self.stream_activities(self.app.loading_activities, 0, self.app.loaded_activity_count)
+            return
+
         if not all_activities:
             # Insert message directly without tags
             tree.insert("", tk.END, values=("", "No activities recorded yet.", "", ""))
             return
 
-        # Insert data, newest first, apply tags
-        try:
-            # Use enumerate starting from 0 for modulo check
-            for i, activity in enumerate(reversed(all_activities)):
-                ts = activity.get("timestamp", "N/A")
-                cat_key = activity.get("category", "unknown")
-                cat_info = BASE_CATEGORIES.get(cat_key, {"icon": "?", "name": cat_key.title()})
-                cat_display = f"{cat_info['icon']} {cat_info['name']}"
+        # Insert data progressively (newest first) so large histories don't block the UI
+        self.app.scheduler.submit(self._iter_history_rows(tree, list(all_activities)), owner=self)
 
-                details_dict = activity.get("activity_details", {})
-                # Use the static BasePage method for formatting
-                details_str = BasePage.format_activity_details(details_dict)
+    # IVO+GPT
+    @staticmethod
+    def _history_row_values(activity):
+        """(timestamp, category, details, kg) column values for one activity."""
+        ts = activity.get("timestamp", "N/A")
+        cat_key = activity.get("category", "unknown")
+        cat_info = BASE_CATEGORIES.get(cat_key, {"icon": "?", "name": cat_key.title()})
+        cat_display = f"{cat_info['icon']} {cat_info['name']}"
 
-                fp_raw = activity.get("carbon_footprint")
-                fp_formatted_kg = f"{float(fp_raw):,.2f}" if fp_raw is not None else "N/A"
+        details_dict = activity.get("activity_details", {})
+        # Use the static BasePage method for formatting
+        details_str = BasePage.format_activity_details(details_dict)
+
+        fp_raw = activity.get("carbon_footprint")
+        fp_formatted_kg = f"{float(fp_raw):,.2f}" if fp_raw is not None else "N/A"
+        return (ts, cat_display, details_str, fp_formatted_kg)
 
+    # IVO+GPT
+    def _iter_history_rows(self, tree, activities):
+        """Inserts one history row per step, newest first (run through the UI scheduler)."""
+        fill_start = time.perf_counter() if perf_monitor.enabled else None
+        try:
+            # Use enumerate starting from 0 for modulo check
+            for i, activity in enumerate(reversed(activities)):
                 # Determine tag based on index (even/odd)
                 tag = 'evenrow' if i % 2 == 0 else 'oddrow'
                 # Insert item and immediately apply the tag
-                iid = tree.insert("", tk.END, values=(ts, cat_display, details_str, fp_formatted_kg), tags=(tag,))
+                tree.insert("", tk.END, values=self._history_row_values(activity), tags=(tag,))
+                yield
+
+            if fill_start is not None: # Whole fill, across scheduler slices
+                perf_monitor.record("dashboard_history_fill", (time.perf_counter() - fill_start) * 1000.0)
 
+        except tk.TclError:
+            raise # Tree destroyed; the scheduler drops the job
         except Exception as e:
             logging.exception("Error populating dashboard history treeview")
             tree.insert("", tk.END, values=("Error", "Could not load history", str(e), ""))
 
+    # IVO+GPT
+    def stream_activities(self, activities, start, end):
+        """Queues rows for activities[start:end] while the history loads in the background.
+
+        Records arrive oldest first, so each is inserted at the top; the finished tree is
+        newest first as usual. Batches run in submission order on the UI scheduler.
+        """
+        self.app.scheduler.submit(self._iter_streamed_rows(self.history_tree, activities, start, end), owner=self)
+
+    # IVO+GPT
+    def _iter_streamed_rows(self, tree, activities, start, end):
+        for i in range(start, end):
+            tag = 'evenrow' if i % 2 == 0 else 'oddrow' # By record position, so stripes stay consistent
+            tree.insert("", 0, values=self._history_row_values(activities[i]), tags=(tag,))
+            yield
+
+    # IVO+GPT
+    def on_activities_loaded(self):
+        """Called by the app once a background activities load completes: exact card totals."""
+        self._update_summary_cards()
+        if not self.app_data.get("activities"):
+            self.history_tree.insert("", tk.END, values=("", "No activities recorded yet.", "", ""))
+
+    # IVO-ONLY
+    def on_activities_recomputed(self, indices):
+        """Called by the app after a factor hot reload: new card totals, changed rows patched in place."""
+        self._update_summary_cards()
+        activities = self.app_data.get("activities", [])
+        rows = self.history_tree.get_children()
+        if len(rows) != len(activities): # Still filling from the old records
+            self.app.refresh_current_page()
+            return
+        self.app.scheduler.submit(self._iter_patched_rows(self.history_tree, rows, activities, indices), owner=self)
+
+    # IVO-ONLY
+    def _iter_patched_rows(self, tree, rows, activities, indices):
+        last = len(activities) - 1 # Rows are newest first
+        for index in indices:
+            tree.item(rows[last - index], values=self._history_row_values(activities[index]))
+            yield
+
+    # IVO+GPT
+    def _update_summary_cards(self):
+        all_activities = self.app_data.get("activities", [])
+        conversion_unit = self.app_data.get("settings", {}).get("conversion", "CO2e")
+        category_totals = aggregate_category_totals(all_activities)
+        for category_key, label in self.summary_value_labels.items():
+            label.configure(text=format_carbon_emission(category_totals.get(category_key, 0.0), conversion_unit))
+
 # --- Base Class for Category Pages ---
 class BaseCategoryPage(BasePage):
     """Base class for pages dedicated to a specific emission category."""
@@ -1692,10 +5163,10 @@ class BaseCategoryPage(BasePage):
         self.avg_fp_label.grid(row=2, column=0, padx=10, pady=(0, 10), sticky="w")
 
         # History Section
-        ttk.Label(content_frame, text="Activity History", style="CardTitle.TLabel", background=theme_colors[BG]).grid(row=2, column=0, sticky="w", pady=(10, 5), padx=10)
+        theme_registry.register(ttk.Label(content_frame, text="Activity History", style="CardTitle.TLabel"), background=BG).grid(row=2, column=0, sticky="w", pady=(10, 5), padx=10)
 
         # History Treeview Container
-        tree_container = tk.Frame(content_frame, bg=theme_colors[CARD])
+        tree_container = theme_registry.register(tk.Frame(content_frame), bg=CARD)
         tree_container.grid(row=3, column=0, sticky="nsew", padx=10, pady=(0, 10))
         tree_container.grid_columnconfigure(0, weight=1)
         tree_container.grid_rowconfigure(0, weight=1)
@@ -1706,9 +5177,8 @@ class BaseCategoryPage(BasePage):
         self.tree_scrollbar = ttk.Scrollbar(tree_container, orient="vertical", command=self.tree.yview, style="Vertical.TScrollbar")
         self.tree.configure(yscrollcommand=self.tree_scrollbar.set)
 
-        # Configure row tags on the treeview instance
-        self.tree.tag_configure('oddrow', background=theme_colors[TV_ODD], foreground=theme_colors[FG])
-        self.tree.tag_configure('evenrow', background=theme_colors[TV_EVEN], foreground=theme_colors[FG])
+        # Configure row tags on the treeview instance (kept themed)
+        theme_registry.register_tree(self.tree)
 
         # Headings and Columns
         self.tree.heading("timestamp", text="Date & Time", anchor=tk.W)
@@ -1733,7 +5203,7 @@ class BaseCategoryPage(BasePage):
         """Filters all activities for the current category."""
         all_activities = self.app_data.get("activities", [])
         # List comprehension for concise filtering
-        return [act for act in all_activities if isinstance(act, dict) and act.get("category") == self.category_key]
+        return [act for act in all_activities if isinstance(act, Mapping) and act.get("category") == self.category_key]
 
     # IVO+GPT
     def load_activity_history(self):
@@ -1754,14 +5224,22 @@ class BaseCategoryPage(BasePage):
         elif "Cars" in conversion_unit: unit_suffix = "Cars/yr"
         self.tree.heading("footprint", text=f"Footprint ({unit_suffix})", anchor=tk.E)
 
-        logging.debug(f"{self.category_key}Page: Loading {len(category_activities)} history items. Unit: {conversion_unit}")
+        logging.debug("%sPage: Loading %s history items. Unit: %s", self.category_key, len(category_activities), conversion_unit)
 
         if not category_activities:
-             self.tree.insert("", tk.END, values=("", f"No {self.category_key} activities recorded yet.", ""))
+             message = "Loading activity history..." if self.app.activities_loading else f"No {self.category_key} activities recorded yet."
+             self.tree.insert("", tk.END, values=("", message, ""))
              return
 
         # IVO-ONLY
-        # Insert data, newest first, applying tags
+        # Insert data progressively (newest first), replacing any population still running
+        self.app.scheduler.cancel(getattr(self, '_history_job', None))
+        self._history_job = self.app.scheduler.submit(self._iter_history_rows(category_activities, conversion_unit), owner=self)
+
+    # IVO-ONLY
+    def _iter_history_rows(self, category_activities, conversion_unit):
+        """Inserts one history row per step, newest first (run through the UI scheduler)."""
+        fill_start = time.perf_counter() if perf_monitor.enabled else None
         try:
             for i, activity in enumerate(reversed(category_activities)):
                 ts = activity.get("timestamp", "N/A")
@@ -1772,10 +5250,16 @@ class BaseCategoryPage(BasePage):
 
                 tag = 'evenrow' if i % 2 == 0 else 'oddrow'
                 # Insert with tag
-                iid = self.tree.insert("", tk.END, values=(ts, details_str, fp_formatted), tags=(tag,))
+                self.tree.insert("", tk.END, values=(ts, details_str, fp_formatted), tags=(tag,))
+                yield
+
+            if fill_start is not None: # Whole fill, across scheduler slices
+                perf_monitor.record("category_history_fill", (time.perf_counter() - fill_start) * 1000.0)
 
+        except tk.TclError:
+            raise # Tree destroyed; the scheduler drops the job
         except Exception as e:
-            logging.exception(f"Error populating history for {self.category_key}")
+            logging.exception("Error populating history for %s", self.category_key)
             try: # Clear tree before inserting error message
                 for item in self.tree.get_children(): self.tree.delete(item)
             except tk.TclError: pass
@@ -1787,7 +5271,7 @@ class BaseCategoryPage(BasePage):
         # Check if widgets exist before updating
         required_widgets = ['analytics_frame', 'total_fp_label', 'avg_fp_label']
         if not all(hasattr(self, attr) and getattr(self, attr) and getattr(self, attr).winfo_exists() for attr in required_widgets):
-            logging.warning(f"{self.category_key}Page: Analytics widgets missing, cannot update.")
+            logging.warning("%sPage: Analytics widgets missing, cannot update.", self.category_key)
             return
 
         try:
@@ -1809,20 +5293,32 @@ class BaseCategoryPage(BasePage):
             self.total_fp_label.configure(text=f"Total: {formatted_total}")
             self.avg_fp_label.configure(text=f"Average / Entry: {formatted_avg} ({activity_count} entries)")
 
-            logging.debug(f"{self.category_key}Page: Analytics updated - Total={formatted_total}, Avg={formatted_avg}")
+            logging.debug("%sPage: Analytics updated - Total=%s, Avg=%s", self.category_key, formatted_total, formatted_avg)
 
         except Exception as e:
-            logging.exception(f"Error updating analytics for {self.category_key}")
+            logging.exception("Error updating analytics for %s", self.category_key)
             # Update labels to show error state
             if hasattr(self, 'total_fp_label') and self.total_fp_label.winfo_exists():
                 self.total_fp_label.configure(text="Total: Error")
             if hasattr(self, 'avg_fp_label') and self.avg_fp_label.winfo_exists():
                  self.avg_fp_label.configure(text="Average: Error")
 
+    # IVO+GPT
+    def on_activities_loaded(self):
+        """Called by the app once a background activities load completes."""
+        self.refresh_data()
+
+    # IVO-ONLY
+    def on_activities_recomputed(self, indices):
+        """Called by the app after a factor hot reload; refreshes only if this category changed."""
+        activities = self.app_data.get("activities", [])
+        if any(activities[index].get("category") == self.category_key for index in indices):
+            self.refresh_data()
+
     # IVO+GPT
     def refresh_data(self):
         """Reloads and recalculates data for the page."""
-        logging.debug(f"Refreshing data for {self.category_key} page.")
+        logging.debug("Refreshing data for %s page.", self.category_key)
         # Update analytics based on current data
         self.update_analytics()
         # Reload history using current conversion setting
@@ -1874,7 +5370,7 @@ class UserHistoryPage(BasePage):
         ttk.Label(self, text="User Action History", style="Title.TLabel").grid(row=0, column=0, sticky="w", pady=(10, 15), padx=10)
 
         # Treeview Container
-        tree_container = tk.Frame(self, bg=theme_colors[CARD])
+        tree_container = theme_registry.register(tk.Frame(self), bg=CARD)
         tree_container.grid(row=1, column=0, sticky="nsew", padx=10, pady=(0, 10))
         tree_container.grid_columnconfigure(0, weight=1)
         tree_container.grid_rowconfigure(0, weight=1)
@@ -1891,9 +5387,8 @@ class UserHistoryPage(BasePage):
         scrollbar = ttk.Scrollbar(tree_container, orient="vertical", command=tree.yview, style="Vertical.TScrollbar")
         tree.configure(yscrollcommand=scrollbar.set)
 
-        # Configure row tags on the instance
-        tree.tag_configure('oddrow', background=theme_colors[TV_ODD], foreground=theme_colors[FG])
-        tree.tag_configure('evenrow', background=theme_colors[TV_EVEN], foreground=theme_colors[FG])
+        # Configure row tags on the instance (kept themed)
+        theme_registry.register_tree(tree)
 
         tree.grid(row=0, column=0, sticky="nsew")
         scrollbar.grid(row=0, column=1, sticky="ns")
@@ -1905,7 +5400,7 @@ class UserHistoryPage(BasePage):
             activity_log = []
             self.app_data["activity_log"] = activity_log # Fix in memory
 
-        logging.debug(f"Populating user history page with {len(activity_log)} entries.")
+        logging.debug("Populating user history page with %s entries.", len(activity_log))
 
         # Clear existing items safely
         try:
@@ -1932,6 +5427,107 @@ class UserHistoryPage(BasePage):
                 except tk.TclError: pass
                 tree.insert("", tk.END, values=("Error", f"Could not load log: {e}"))
 
+# --- PerformancePage Class ---
+class PerformancePage(BasePage):
+    """Shows recent latency percentiles and save sizes recorded by perf_monitor."""
+    REFRESH_MS = 1000 # Auto-refresh interval while the page is shown
+
+    # IVO+GPT
+    def __init__(self, parent, app):
+        super().__init__(parent, app)
+        self._refresh_after_id = None
+        self.grid_rowconfigure(3, weight=1) # Treeview container expands
+        self.grid_columnconfigure(0, weight=1)
+
+        ttk.Label(self, text="Performance", style="Title.TLabel").grid(row=0, column=0, sticky="w", pady=(10, 5), padx=10)
+        ttk.Label(self, text=f"Latency percentiles over the last {perf_monitor.capacity} samples of each operation (ms), and bytes written per save.",
+                  style="Desc.TLabel").grid(row=1, column=0, sticky="w", padx=10, pady=(0, 10))
+
+        # Controls
+        controls = ttk.Frame(self)
+        controls.grid(row=2, column=0, sticky="ew", padx=10, pady=(0, 10))
+        self.enabled_var = tk.BooleanVar(value=perf_monitor.enabled)
+        ttk.Checkbutton(controls, text="Record timings", variable=self.enabled_var, command=self._toggle_recording).pack(side=tk.LEFT, padx=(0, 15))
+        create_stylish_button(controls, "Refresh", self.refresh_data).pack(side=tk.LEFT, padx=5)
+        create_stylish_button(controls, "Reset", self._reset).pack(side=tk.LEFT, padx=5)
+        create_stylish_button(controls, "Export JSON...", self._export).pack(side=tk.LEFT, padx=5)
+
+        # Treeview Container
+        tree_container = theme_registry.register(tk.Frame(self), bg=CARD)
+        tree_container.grid(row=3, column=0, sticky="nsew", padx=10, pady=(0, 10))
+        tree_container.grid_columnconfigure(0, weight=1)
+        tree_container.grid_rowconfigure(0, weight=1)
+
+        columns = ("operation", "count", "p50", "p95", "p99", "max")
+        headings = {"operation": "Operation", "count": "Samples", "p50": "p50", "p95": "p95", "p99": "p99", "max": "Max"}
+        self.tree = ttk.Treeview(tree_container, columns=columns, show="headings", style="Treeview", height=15)
+        for col in columns:
+            self.tree.heading(col, text=headings[col], anchor=tk.W if col == "operation" else tk.E)
+            self.tree.column(col, width=260 if col == "operation" else 100, anchor=tk.W if col == "operation" else tk.E,
+                             stretch=tk.YES if col == "operation" else tk.NO)
+        scrollbar = ttk.Scrollbar(tree_container, orient="vertical", command=self.tree.yview, style="Vertical.TScrollbar")
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        theme_registry.register_tree(self.tree)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        scrollbar.grid(row=0, column=1, sticky="ns")
+
+        self.refresh_data()
+
+    # IVO+GPT
+    @staticmethod
+    def _format_stat(value, unit):
+        if unit == "bytes":
+            return f"{value / 1024:,.1f} KB"
+        return f"{value:,.2f}"
+
+    # IVO+GPT
+    def refresh_data(self):
+        """Redraws the table from a fresh snapshot and schedules the next refresh."""
+        if self._refresh_after_id:
+            self.after_cancel(self._refresh_after_id)
+        snapshot = perf_monitor.snapshot()
+        self.tree.delete(*self.tree.get_children())
+        if not snapshot["series"]:
+            self.tree.insert("", tk.END, values=("No samples recorded yet.", "", "", "", "", ""))
+        for i, (name, stats) in enumerate(snapshot["series"].items()):
+            unit = stats["unit"]
+            label = f"{name} ({unit})"
+            values = (label, f"{stats['count']:,}") + tuple(self._format_stat(stats[key], unit) for key in ("p50", "p95", "p99", "max"))
+            self.tree.insert("", tk.END, values=values, tags=('evenrow' if i % 2 == 0 else 'oddrow',))
+        self._refresh_after_id = self.after(self.REFRESH_MS, self.refresh_data)
+
+    # IVO+GPT
+    def _toggle_recording(self):
+        perf_monitor.enabled = self.enabled_var.get()
+        logging.info("Performance recording %s.", 'enabled' if perf_monitor.enabled else 'disabled')
+
+    # IVO+GPT
+    def _reset(self):
+        perf_monitor.reset()
+        self.refresh_data()
+
+    # IVO+GPT
+    def _export(self):
+        """Asks for a destination and writes the current snapshot as JSON."""
+        default_name = f"ecohub_perf_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        file_path = filedialog.asksaveasfilename(parent=self, title="Export Performance Data", initialdir=DATA_DIR,
+                                                 initialfile=default_name, defaultextension=".json",
+                                                 filetypes=[("JSON files", "*.json"), ("All files", "*.*")])
+        if not file_path:
+            return # Cancelled
+        if perf_monitor.export_json(file_path):
+            messagebox.showinfo("Export Complete", f"Performance data saved to:\n{file_path}", parent=self)
+        else:
+            messagebox.showerror("Export Failed", "Could not write the performance data. Please check logs.", parent=self)
+
+    # IVO+GPT
+    def destroy(self):
+        if self._refresh_after_id:
+            try: self.after_cancel(self._refresh_after_id)
+            except tk.TclError: pass
+            self._refresh_after_id = None
+        super().destroy()
+
 # --- SettingsPage Class ---
 class SettingsPage(BasePage):
     """Allows user to change theme, units, and manage profile/data."""
@@ -1990,7 +5586,7 @@ class SettingsPage(BasePage):
         action_frame.grid(row=current_row, column=0, sticky="ew", padx=10, pady=10); current_row += 1
         ttk.Label(action_frame, text="Profile & Application Actions", style="CardTitle.TLabel").pack(padx=10, pady=(10, 5), anchor='w')
         # Frame to hold the buttons, allowing them to flow or be arranged
-        buttons_frame = tk.Frame(action_frame, bg=theme_colors[CARD])
+        buttons_frame = theme_registry.register(tk.Frame(action_frame), bg=CARD)
         buttons_frame.pack(fill="x", padx=10, pady=(5, 10))
 
         # Create buttons with standard style
@@ -1998,6 +5594,8 @@ class SettingsPage(BasePage):
         switch_button.pack(side=tk.LEFT, padx=(0, 5), pady=2)
         reset_button = create_stylish_button(buttons_frame, "Reset Data", self._reset_data)
         reset_button.pack(side=tk.LEFT, padx=5, pady=2)
+        recalc_button = create_stylish_button(buttons_frame, "Recalculate Footprints", self._recalculate_footprints)
+        recalc_button.pack(side=tk.LEFT, padx=5, pady=2)
         delete_button = create_stylish_button(buttons_frame, "Delete Profile", self._delete_user)
         delete_button.pack(side=tk.LEFT, padx=5, pady=2)
         exit_button = create_stylish_button(buttons_frame, "Exit Application", self._exit_application)
@@ -2006,10 +5604,11 @@ class SettingsPage(BasePage):
     # EXPENSEWISE
     def _change_theme(self):
         new_theme = self.theme_var.get()
-        logging.info(f"Theme selection changed to: {new_theme}")
+        logging.info("Theme selection changed to: %s", new_theme)
+        # Widgets are restyled in place by the app; no rebuild needed here
         self.app.switch_theme(new_theme)
-        self._create_ui_elements(self)
-        self.configure(bg=theme_colors["background"])
+        # Keep the radio buttons in sync if the switch was rejected (e.g. save failed)
+        self.theme_var.set(self.app.current_theme)
 
     # GUTIERREZ+KATSUYA
     def _change_conversion_unit(self, event=None):
@@ -2023,7 +5622,7 @@ class SettingsPage(BasePage):
         new_unit = self.conversion_var.get()
         valid_units = ["CO2e", "Trees (Absorbed CO2 per Year)", "Cars (Emitted CO2 per Year)"]
         if new_unit not in valid_units:
-            logging.warning(f"Invalid conversion unit selected: {new_unit}")
+            logging.warning("Invalid conversion unit selected: %s", new_unit)
             # Optionally reset var to previous value
             self.conversion_var.set(self.app_data["settings"].get("conversion", "CO2e"))
             return
@@ -2031,15 +5630,15 @@ class SettingsPage(BasePage):
         # Update setting in memory
         self.app_data["settings"]["conversion"] = new_unit
         # Save the setting immediately
-        if save_user_data(user_id):
-            logging.info(f"Conversion unit changed to: {new_unit} and saved.")
+        if save_user_data(user_id, keys=("settings",)):
+            logging.info("Conversion unit changed to: %s and saved.", new_unit)
             log_activity(f"Display unit changed to {new_unit}")
             # Refresh current page to reflect the new unit ONLY if save successful
             self.app.refresh_current_page()
         else:
             # Save failed (error shown by save_user_data), revert change in memory
             # A bit complex, might need to reload settings? For now, just log.
-            logging.error(f"Failed to save conversion unit '{new_unit}'. Reverting might be needed.")
+            logging.error("Failed to save conversion unit '%s'. Reverting might be needed.", new_unit)
             # Optionally revert the Combobox selection visually?
 
     # EXPENSEWISE
@@ -2054,6 +5653,44 @@ class SettingsPage(BasePage):
             logging.error("Settings: Cannot switch user, main app instance missing.")
             messagebox.showerror("Error", "Application state error. Cannot switch user.", parent=self)
 
+    # IVO-ONLY
+    def _recalculate_footprints(self):
+        """Recomputes activities calculated under older factor sets, rates or grid profiles with the current ones."""
+        if not self.app or not self.app.winfo_exists(): return
+        user_id = self.app.current_user_id
+        current_version = app_state.get("factor_set_version")
+        if not user_id or not current_version:
+            messagebox.showerror("Error", "Cannot determine current user or emission factors.", parent=self)
+            return
+        if self.app.activities_loading:
+            messagebox.showinfo("Please Wait", "Activity history is still loading. Try again in a moment.", parent=self)
+            return
+
+        activities = self.app_data.get("activities") or []
+        stamps = input_stamps()
+        stale = Counter(act.get("factor_set") for act in activities
+                        if isinstance(act, Mapping) and (act.get("factor_set") != current_version or _inputs_stale(act, stamps)))
+        if not stale:
+            messagebox.showinfo("Recalculate Footprints",
+                                f"All {len(activities)} activities already use the current emission factors ({current_version}), "
+                                "exchange rates and grid profiles.", parent=self)
+            return
+        sources = ", ".join(f"{'current factors, other rates or grid profiles' if version == current_version else version or 'unversioned'}: {count}"
+                            for version, count in stale.most_common())
+        if not messagebox.askyesno("Recalculate Footprints",
+                                   f"{sum(stale.values())} activities were calculated with other emission factors, exchange rates "
+                                   f"or grid profiles ({sources}).\n\n"
+                                   f"Recalculate them with the current factor set {current_version}?", parent=self):
+            return
+
+        updated = 0
+        for version in stale:
+            updated += recompute_activities(activities, version, current_version)
+        logging.info("Recalculated %s activities with factor set %s.", updated, current_version)
+        log_activity(f"Recalculated {updated} activity footprints")
+        if save_user_data(user_id, keys=("activities", "activity_log")):
+            self.app.refresh_current_page()
+
     # EXPENSEWISE
     def _reset_data(self):
         """Resets activity and log data for the current user after confirmation."""
@@ -2069,7 +5706,8 @@ class SettingsPage(BasePage):
                                "This cannot be undone. Proceed?",
                                icon='warning', parent=self):
             try:
-                logging.warning(f"Resetting activity and log data for user {user_id}")
+                logging.warning("Resetting activity and log data for user %s", user_id)
+                self.app.discard_activity_load() # Its result would bring the old activities back
                 # Clear data in memory
                 self.app_data["activities"] = []
                 self.app_data["activity_log"] = []
@@ -2080,6 +5718,7 @@ class SettingsPage(BasePage):
                 log_file = get_user_data_file_path(user_id, "activity_log")
                 save_act_ok = _save_json_data(activity_file, [])
                 save_log_ok = _save_json_data(log_file, [])
+                save_profile_summary(user_id, [])
 
                 if not save_act_ok or not save_log_ok:
                     # Error message handled by _save_json_data indirectly via save_user_data
@@ -2094,6 +5733,8 @@ class SettingsPage(BasePage):
                 log_activity("Reset user activity and log data")
                 # Save the activity log *again* to include the reset action
                 _save_json_data(log_file, self.app_data["activity_log"]) # Ignore error here?
+                # Our own writes: later saves check against these stamps
+                self.app_data["user_file_stamps"].update(activities=_file_stamp(activity_file), activity_log=_file_stamp(log_file))
 
                 messagebox.showinfo("Data Reset", "User activity and log data reset successfully.", parent=self)
                 # Refresh the current page (e.g., dashboard) to show empty state
@@ -2120,14 +5761,14 @@ class SettingsPage(BasePage):
                                "This cannot be undone. Are you absolutely sure?",
                                icon='warning', parent=self):
             try:
-                logging.warning(f"Attempting deletion of user: {user_name} (ID: {user_id})")
+                logging.warning("Attempting deletion of user: %s (ID: %s)", user_name, user_id)
 
                 # 1. Remove from profiles dictionary in memory
                 profiles = self.app_data.get("user_profiles", {})
                 if user_id in profiles:
                     del profiles[user_id]
                 else:
-                     logging.warning(f"User ID {user_id} not found in profiles dictionary during delete.")
+                     logging.warning("User ID %s not found in profiles dictionary during delete.", user_id)
 
                 # 2. Save updated profiles list
                 if not save_user_profiles_to_csv():
@@ -2138,15 +5779,16 @@ class SettingsPage(BasePage):
                     return
 
                 # 3. Delete associated user data files
-                data_files_to_delete = [get_user_data_file_path(user_id, dt) for dt in ["settings", "activities", "activity_log"]]
+                user_data_cache.invalidate(user_id)
+                data_files_to_delete = [get_user_data_file_path(user_id, dt) for dt in USER_DATA_KEYS + ("summary",)]
                 deletion_errors = []
                 for file_path in data_files_to_delete:
                     if os.path.exists(file_path):
                         try:
                             os.remove(file_path)
-                            logging.info(f"Deleted user data file: {file_path}")
+                            logging.info("Deleted user data file: %s", file_path)
                         except OSError as e:
-                            logging.error(f"Could not delete file {file_path}: {e}")
+                            logging.error("Could not delete file %s: %s", file_path, e)
                             deletion_errors.append(os.path.basename(file_path))
 
                 # 4. Show result message
@@ -2158,13 +5800,12 @@ class SettingsPage(BasePage):
                 else:
                     messagebox.showinfo("User Deleted", f"Profile '{user_name}' and data deleted successfully.", parent=self)
 
-                # 5. Close the app window to return to account selection
-                # Set the flag to prevent final save on closing
-                self.app._full_exit_requested = True # Treat deletion like a switch/exit
-                self.app.on_closing()
+                # 5. Close the session to return to account selection
+                # Skip the final save so the deleted files are not written back
+                self.app.on_closing(save_data=False)
 
             except Exception as e:
-                logging.exception(f"Error deleting user {user_id}")
+                logging.exception("Error deleting user %s", user_id)
                 messagebox.showerror("Error", f"An error occurred deleting the profile:\n{e}", parent=self)
                  # Attempt to reload profiles if something went wrong mid-process
                 try: load_user_profiles_from_csv()
@@ -2191,58 +5832,50 @@ class AddCarbonFootprintActivityDialog(tk.Toplevel):
         super().__init__(parent_app)
         self.app = parent_app
         self.app_data = app_state # Use renamed global state dict
-        self.factors = self.app_data.get("emission_factors", DEFAULT_EMISSION_FACTORS)
+        # Values in force today (some factors may carry effective dates)
+        today = datetime.date.today().isoformat()
+        self.factors = factors_at(self.app_data.get("emission_factors", DEFAULT_EMISSION_FACTORS), today)
+        self.factor_set_version = self.app_data.get("factor_set_version") # Stamped on the record: a hot reload may land while open
+        self.php_per_usd = current_exchange_rates().rate_at(today)
+        self.grid = current_grid_profiles().for_month(datetime.date.today().month)
+        self.input_stamps = input_stamps() # Versions of the rates and grid profiles above, for the new record
 
         # Dialog config
         self.configure(bg=theme_colors[DLG_BG])
         self.title("Add Carbon Footprint Activity")
         self.geometry("750x780") # Can adjust size as needed
         self.resizable(True, True)
-        self.transient(parent_app)
+        self.transient(parent_app.winfo_toplevel())
         self.grab_set() # Make modal
 
         # Dialog-specific styles
+        # (Styles are added to the app's active ttk theme; calling theme_use here would replace it)
         self.dialog_style = ttk.Style(self)
-        self.dialog_style.theme_use('clam')
         self._configure_dialog_styles()
 
         # Store references to scrollable components for cleanup
         self._scroll_widgets_by_tab = {}
         # Store input variable dicts per category
         self.activity_vars = {cat_key: {} for cat_key in BASE_CATEGORIES}
+        # Category of each variable dict (by identity); pooled sub-form dicts are added as they are built
+        self._var_dict_categories = {id(var_dict): cat_key for cat_key, var_dict in self.activity_vars.items()}
+        # Live footprint preview labels per category, the categories edited since the last refresh and the pending debounce callback
+        self.preview_labels = {}
+        self._preview_pending = set()
+        self._preview_after_id = None
         # Store specific widget references for dynamic UI changes
         self.travel_widgets = {}
         self.res_heat_widgets = {}
         self.res_water_widgets = {}
-        # Store food/spending mappings as instance attributes
-        self._food_inputs_map = {
-            "beef_kg": ("food_prod_beef_kg_kg", "food_prod_lamb_kg_kg"), # Tuple for averaging
-            "pork_kg": "food_prod_pork_kg_kg",
-            "poultry_kg": "food_prod_poultry_kg_kg",
-            "seafood_kg": "food_prod_seafood_kg_kg",
-            "dairy_kg": "food_prod_dairy_kg_kg",
-            "eggs_kg": "food_prod_eggs_kg_kg",
-            # Combine Veg/Fruits/Grains/Legumes for simplicity if desired, or keep separate
-            "veg_fruit_kg": ("food_prod_vegetables_kg_kg", "food_prod_fruits_kg_kg"),
-            "grains_legumes_kg": ("food_prod_grains_kg_kg", "food_prod_legumes_kg_kg")
-        }
-        self._food_inputs_labels = { # For validation messages
-            "beef_kg": "Beef / Lamb", "pork_kg": "Pork", "poultry_kg": "Poultry",
-            "seafood_kg": "Fish & Seafood", "dairy_kg": "Dairy", "eggs_kg": "Eggs",
-            "veg_fruit_kg": "Vegetables & Fruits", "grains_legumes_kg": "Grains & Legumes"
-        }
-        self._spending_cats_map = {
-            "clothing_spending": "spending_clothing_usd",
-            "electronics_spending": "spending_electronics_usd",
-            "appliances_spending": "spending_appliances_usd",
-            "furniture_spending": "spending_furniture_usd",
-            "other_spending": "spending_other_goods_usd"
-        }
-        self._spending_cats_labels = { # For validation messages
-             "clothing_spending": "Clothing Spending", "electronics_spending": "Electronics Spending",
-             "appliances_spending": "Appliances Spending", "furniture_spending": "Furniture Spending",
-             "other_spending": "Other Goods Spending"
-        }
+        # Pools of pre-built conditional sub-forms: {option: {"frame", "vars", "widgets"}}
+        self._res_heat_pool = {}
+        self._res_water_pool = {}
+        self._travel_pool = {}
+        # Store food/spending mappings as instance attributes (shared with the calculation engine)
+        self._food_inputs_map = FOOD_INPUTS_MAP
+        self._food_inputs_labels = FOOD_INPUTS_LABELS
+        self._spending_cats_map = SPENDING_CATS_MAP
+        self._spending_cats_labels = SPENDING_CATS_LABELS
 
         # Main container for padding
         main_container = tk.Frame(self, bg=theme_colors[DLG_BG], padx=15, pady=15)
@@ -2268,6 +5901,11 @@ class AddCarbonFootprintActivityDialog(tk.Toplevel):
             self._scroll_widgets_by_tab[scrollable_content_frame] = {'canvas': canvas, 'scrollbar': scrollbar}
             self.tabs[cat_key] = scrollable_content_frame # Store content frame ref
 
+            # Live preview below the scrollable form (kept visible while scrolling)
+            preview_label = ttk.Label(tab_container_frame, text="", style='Preview.TLabel', anchor='w', wraplength=680)
+            preview_label.grid(row=1, column=0, columnspan=2, sticky="ew")
+            self.preview_labels[cat_key] = preview_label
+
             # Add container to notebook
             self.notebook.add(tab_container_frame, text=f" {cat_info['icon']} {cat_info['name']} ")
 
@@ -2278,7 +5916,7 @@ class AddCarbonFootprintActivityDialog(tk.Toplevel):
             if create_func and callable(create_func):
                 create_func(scrollable_content_frame) # Pass the inner frame as parent
             else:
-                logging.warning(f"Widget creation function for category '{cat_key}' not found.")
+                logging.warning("Widget creation function for category '%s' not found.", cat_key)
                 ttk.Label(scrollable_content_frame, text=f"Input form for {cat_info['name']} not implemented.", style="Dialog.TLabel").grid(row=0, column=0, pady=10, padx=10)
 
         # Action Buttons Frame
@@ -2295,6 +5933,7 @@ class AddCarbonFootprintActivityDialog(tk.Toplevel):
         self.update_idletasks()
         self.notebook.bind("<<NotebookTabChanged>>", self._on_tab_change) # Bind after creation
         self._set_initial_focus() # Focus first field in active tab
+        self._update_previews() # Show initial estimates
         self._center_dialog(parent_app)
 
         self.bind("<Escape>", lambda e: self.destroy())
@@ -2316,6 +5955,7 @@ class AddCarbonFootprintActivityDialog(tk.Toplevel):
         self.dialog_style.configure('DialogDesc.TLabel', background=card_bg, foreground=desc_fg, font=FONT_DESC)
         self.dialog_style.configure('Unit.TLabel', background=card_bg, foreground=desc_fg, font=FONT_SMALL)
         self.dialog_style.configure('SectionHeader.TLabel', background=card_bg, foreground=fg, font=FONT_BOLD)
+        self.dialog_style.configure('Preview.TLabel', background=bg, foreground=accent, font=FONT_BOLD, padding=(10, 6))
 
         self.dialog_style.configure('Dialog.TEntry', fieldbackground=card_bg, foreground=fg, insertcolor=fg, borderwidth=1, relief=tk.SOLID, bordercolor=disabled, padding=5)
         self.dialog_style.map('Dialog.TEntry', bordercolor=[('focus', accent)])
@@ -2346,7 +5986,7 @@ class AddCarbonFootprintActivityDialog(tk.Toplevel):
                       self._on_frame_configure(canvas=info['canvas']) # Update scroll region
                       break
         except Exception as e:
-            logging.warning(f"Error handling tab change: {e}")
+            logging.warning("Error handling tab change: %s", e)
 
     # EXPENSEWISE
     def _set_initial_focus(self, event=None):
@@ -2366,7 +6006,7 @@ class AddCarbonFootprintActivityDialog(tk.Toplevel):
                       break
 
             if not scrollable_content_frame or not scrollable_content_frame.winfo_exists():
-                logging.warning(f"Cannot find active scrollable frame for tab '{selected_tab_widget_name}' to set focus.")
+                logging.warning("Cannot find active scrollable frame for tab '%s' to set focus.", selected_tab_widget_name)
                 self.notebook.focus_set() # Fallback focus
                 return
 
@@ -2385,7 +6025,7 @@ class AddCarbonFootprintActivityDialog(tk.Toplevel):
                 self.notebook.focus_set() # Fallback if no inputs found
 
         except Exception as e:
-            logging.warning(f"Could not set initial focus in dialog: {e}", exc_info=True)
+            logging.warning("Could not set initial focus in dialog: %s", e, exc_info=True)
             try: self.notebook.focus_set() # Final fallback attempt
             except Exception: pass
 
@@ -2441,7 +6081,7 @@ class AddCarbonFootprintActivityDialog(tk.Toplevel):
                 canvas.yview_moveto(target_fraction)
 
         except (tk.TclError, ValueError, IndexError, AttributeError, TypeError) as e:
-             logging.warning(f"Error scrolling widget {widget} into view: {e}")
+             logging.warning("Error scrolling widget %s into view: %s", widget, e)
 
     # EXPENSEWISE
     def _center_dialog(self, parent):
@@ -2462,7 +6102,7 @@ class AddCarbonFootprintActivityDialog(tk.Toplevel):
 
             self.geometry(f"+{x}+{y}")
         except Exception as e:
-             logging.error(f"Error centering dialog: {e}")
+             logging.error("Error centering dialog: %s", e)
 
     # IVO+GPT
     # --- Scrolling Setup ---
@@ -2544,7 +6184,7 @@ class AddCarbonFootprintActivityDialog(tk.Toplevel):
                      widget.unbind("<Button-4>")
                      widget.unbind("<Button-5>")
                  except tk.TclError: pass
-                 except Exception as e: logging.error(f"Error unbinding mousewheel from {widget}: {e}")
+                 except Exception as e: logging.error("Error unbinding mousewheel from %s: %s", widget, e)
         self._mousewheel_bound_widgets.clear()
 
     # IVO+GPT
@@ -2563,7 +6203,7 @@ class AddCarbonFootprintActivityDialog(tk.Toplevel):
                 scroll_info = canvas.yview()
                 if (delta < 0 and scroll_info[0] > 0.0) or (delta > 0 and scroll_info[1] < 1.0):
                     canvas.yview_scroll(delta, "units")
-            except tk.TclError as e: logging.warning(f"TclError during dialog canvas scroll: {e}")
+            except tk.TclError as e: logging.warning("TclError during dialog canvas scroll: %s", e)
 
     # IVO+GPT
     # --- Input Row Helper ---
@@ -2583,6 +6223,8 @@ class AddCarbonFootprintActivityDialog(tk.Toplevel):
         else:
             var = tk.StringVar(value=str(initial_value) if initial_value is not None else "")
         var_dict[var_key] = var
+        category = self._var_dict_categories.get(id(var_dict))
+        var.trace_add("write", lambda *args: self._schedule_preview_update(category)) # Keep this tab's live preview current
 
         # Label
         label_full_text = label_text + (" *" if required else "")
@@ -2630,6 +6272,35 @@ class AddCarbonFootprintActivityDialog(tk.Toplevel):
 
         return widget, next_row
 
+    # IVO+GPT
+    # --- Pooled Conditional Sub-Forms ---
+    def _show_pooled_subform(self, pool, parent_frame, option, builder, var_dict):
+        """Grids the pooled sub-form for `option` (building it once) and ungrids the others.
+
+        Sub-forms keep their widgets and tk variables between selections, so switching options
+        only re-grids existing widgets. Only the visible sub-form's variables are kept in
+        var_dict, which keeps hidden inputs out of the submitted activity_details.
+        """
+        for pooled_option, entry in pool.items():
+            if pooled_option == option: continue
+            if entry["frame"].winfo_exists(): entry["frame"].grid_remove()
+            for var_key in entry["vars"]: var_dict.pop(var_key, None)
+
+        if builder is None: return None # Option has no sub-form
+
+        entry = pool.get(option)
+        if entry is None or not entry["frame"].winfo_exists():
+            frame = tk.Frame(parent_frame, bg=theme_colors[DLG_CARD])
+            frame.grid_columnconfigure(1, weight=1)
+            sub_vars = {}
+            self._var_dict_categories[id(sub_vars)] = self._var_dict_categories.get(id(var_dict)) # Edits preview var_dict's category
+            widgets = builder(frame, sub_vars)
+            entry = pool[option] = {"frame": frame, "vars": sub_vars, "widgets": widgets}
+
+        entry["frame"].grid(row=0, column=0, columnspan=2, sticky='nsew')
+        var_dict.update(entry["vars"])
+        return entry
+
 
     # --- Tab Widget Creation Functions ---
     # (Residential, Travel, Food, GoodsWaste, Services, Digital)
@@ -2643,12 +6314,13 @@ class AddCarbonFootprintActivityDialog(tk.Toplevel):
         # --- Electricity Usage ---
         ttk.Label(parent, text="Grid Electricity", style='SectionHeader.TLabel').grid(row=current_row, column=0, columnspan=2, sticky='w', pady=(0, 5)); current_row += 1
         _, current_row = self._add_input_row(parent, current_row, "Electricity Used:", vars_res, "elec_kwh", unit="kWh", desc="Grid electricity consumption for the period.", required=True)
-        _, current_row = self._add_input_row(parent, current_row, "Billing Period:", vars_res, "elec_period", "combobox", ["Monthly", "Bi-monthly", "Quarterly", "Annually"], desc="Duration covered by the electricity usage.", required=True, initial="Monthly")
+        _, current_row = self._add_input_row(parent, current_row, "Billing Period:", vars_res, "elec_period", "combobox", ACTIVITY_FORM_OPTIONS["residential"]["elec_period"], desc="Duration covered by the electricity usage.", required=True, initial="Monthly")
+        _, current_row = self._add_input_row(parent, current_row, "Main Usage Hours:", vars_res, "elec_window", unit="e.g. 18-23", desc=USAGE_WINDOW_DESC)
 
         # --- Heating & Cooling ---
         ttk.Separator(parent, orient='horizontal').grid(row=current_row, column=0, columnspan=2, sticky='ew', pady=15); current_row += 1
         ttk.Label(parent, text="Heating & Cooling", style='SectionHeader.TLabel').grid(row=current_row, column=0, columnspan=2, sticky='w', pady=(0, 5)); current_row += 1
-        heat_fuel_types = ["None", "Natural Gas", "Heating Oil", "Propane", "Wood"]
+        heat_fuel_types = ACTIVITY_FORM_OPTIONS["residential"]["heat_fuel_type"]
         fuel_combo, current_row = self._add_input_row(parent, current_row, "Primary Fuel:", vars_res, "heat_fuel_type", "combobox", heat_fuel_types, desc="Main fuel used for heating/cooling (if any).", initial="None")
 
         # Conditional Fuel Frame (Spans 2 cols, placed below combo)
@@ -2658,17 +6330,18 @@ class AddCarbonFootprintActivityDialog(tk.Toplevel):
         current_row += 1 # Next row in main parent
 
         self.res_heat_widgets = {} # Reset container
+        self._res_heat_pool = {}
         if fuel_combo: fuel_combo.bind("<<ComboboxSelected>>", self._on_res_heat_fuel_change)
         self._on_res_heat_fuel_change() # Initial population
 
         # Heating Period (Now below the conditional frame)
-        _, current_row = self._add_input_row(parent, current_row, "Fuel Period:", vars_res, "heat_fuel_period", "combobox", ["Monthly", "Quarterly", "Annually"], desc="Period for fuel amount (if entered).", initial="Monthly")
+        _, current_row = self._add_input_row(parent, current_row, "Fuel Period:", vars_res, "heat_fuel_period", "combobox", ACTIVITY_FORM_OPTIONS["residential"]["heat_fuel_period"], desc="Period for fuel amount (if entered).", initial="Monthly")
 
 
         # --- Water Heating ---
         ttk.Separator(parent, orient='horizontal').grid(row=current_row, column=0, columnspan=2, sticky='ew', pady=15); current_row += 1
         ttk.Label(parent, text="Water Heating", style='SectionHeader.TLabel').grid(row=current_row, column=0, columnspan=2, sticky='w', pady=(0, 5)); current_row += 1
-        water_heater_types = ["Electric", "Natural Gas", "Solar Thermal", "None"]
+        water_heater_types = ACTIVITY_FORM_OPTIONS["residential"]["water_heater_type"]
         water_type_combo, current_row = self._add_input_row(parent, current_row, "Heater Type:", vars_res, "water_heater_type", "combobox", water_heater_types, desc="Type of water heater used (if any).", initial="Electric")
 
         # Conditional Water Frame
@@ -2678,71 +6351,68 @@ class AddCarbonFootprintActivityDialog(tk.Toplevel):
         current_row += 1
 
         self.res_water_widgets = {} # Reset container
+        self._res_water_pool = {}
         if water_type_combo: water_type_combo.bind("<<ComboboxSelected>>", self._on_res_water_type_change)
         self._on_res_water_type_change()
 
         # Water Period (Now below conditional frame)
-        _, current_row = self._add_input_row(parent, current_row, "Usage Period:", vars_res, "water_usage_period", "combobox", ["Monthly", "Quarterly", "Annually"], desc="Period for usage amount (if entered).", initial="Monthly")
+        _, current_row = self._add_input_row(parent, current_row, "Usage Period:", vars_res, "water_usage_period", "combobox", ACTIVITY_FORM_OPTIONS["residential"]["water_usage_period"], desc="Period for usage amount (if entered).", initial="Monthly")
 
 
         # --- On-Site Renewables ---
         ttk.Separator(parent, orient='horizontal').grid(row=current_row, column=0, columnspan=2, sticky='ew', pady=15); current_row += 1
         ttk.Label(parent, text="On-Site Renewables (Optional)", style='SectionHeader.TLabel').grid(row=current_row, column=0, columnspan=2, sticky='w', pady=(0, 5)); current_row += 1
-        renew_types = ["None", "Solar Panels", "Wind Turbines"]
+        renew_types = ACTIVITY_FORM_OPTIONS["residential"]["renew_type"]
         _, current_row = self._add_input_row(parent, current_row, "Installation Type:", vars_res, "renew_type", "combobox", renew_types, initial="None")
         _, current_row = self._add_input_row(parent, current_row, "kWh Generated:", vars_res, "renew_kwh_gen", unit="kWh", desc="Energy generated by system (offsets emissions).")
-        _, current_row = self._add_input_row(parent, current_row, "Generation Period:", vars_res, "renew_period", "combobox", ["Monthly", "Quarterly", "Annually"], desc="Period for kWh generated.", initial="Monthly")
+        _, current_row = self._add_input_row(parent, current_row, "Generation Period:", vars_res, "renew_period", "combobox", ACTIVITY_FORM_OPTIONS["residential"]["renew_period"], desc="Period for kWh generated.", initial="Monthly")
 
     # IVO+GPT
     def _on_res_heat_fuel_change(self, event=None):
-        """Shows/hides heating fuel amount/type widgets based on selection."""
+        """Shows the pooled heating fuel amount/type sub-form for the selected fuel."""
         # Ensure instance vars are ready
         if not hasattr(self, 'activity_vars') or "residential" not in self.activity_vars or not hasattr(self, 'res_heat_details_frame'): return
         vars_res = self.activity_vars["residential"]
         selected_fuel = vars_res.get("heat_fuel_type").get() # Safely get var and its value
-        parent_frame = self.res_heat_details_frame
-        widgets = self.res_heat_widgets # Use instance attribute
 
-        # Clear existing conditional widgets and associated variables
-        for widget in list(parent_frame.winfo_children()): widget.destroy()
-        widgets.clear()
-        vars_res.pop("heat_fuel_amount", None)
-        vars_res.pop("heat_wood_type", None)
-
-        cond_row = 0
         unit_map = {"Natural Gas": "therms", "Heating Oil": "gallons", "Propane": "gallons", "Wood": "cords"}
         unit = unit_map.get(selected_fuel)
+        builder = (lambda frame, sub_vars: self._build_res_heat_subform(frame, sub_vars, selected_fuel, unit)) if unit else None
 
-        if unit: # If a fuel requiring an amount is selected
-            amount_label = "Wood Amount:" if selected_fuel == "Wood" else "Fuel Amount:"
-            amount_widget, cond_row = self._add_input_row(parent_frame, cond_row, amount_label, vars_res, "heat_fuel_amount", unit=unit, desc=f"Amount of {selected_fuel.lower()} used.")
-            widgets["amount"] = amount_widget
+        entry = self._show_pooled_subform(self._res_heat_pool, self.res_heat_details_frame, selected_fuel, builder, vars_res)
+        self.res_heat_widgets.clear()
+        if entry: self.res_heat_widgets.update(entry["widgets"])
 
-            if selected_fuel == "Wood":
-                wood_widget, cond_row = self._add_input_row(parent_frame, cond_row, "Wood Type:", vars_res, "heat_wood_type", "combobox", ["Hardwood", "Softwood"], initial="Hardwood")
-                widgets["wood_type"] = wood_widget
+    # IVO+GPT
+    def _build_res_heat_subform(self, parent_frame, sub_vars, fuel, unit):
+        """Builds the heating sub-form for one fuel type; returns its widget references."""
+        widgets = {}
+        amount_label = "Wood Amount:" if fuel == "Wood" else "Fuel Amount:"
+        widgets["amount"], cond_row = self._add_input_row(parent_frame, 0, amount_label, sub_vars, "heat_fuel_amount", unit=unit, desc=f"Amount of {fuel.lower()} used.")
+        if fuel == "Wood":
+            widgets["wood_type"], cond_row = self._add_input_row(parent_frame, cond_row, "Wood Type:", sub_vars, "heat_wood_type", "combobox", ACTIVITY_FORM_OPTIONS["residential"]["heat_wood_type"], initial="Hardwood")
+        return widgets
 
     # IVO+GPT
     def _on_res_water_type_change(self, event=None):
-        """Shows/hides water heating usage widgets based on type."""
+        """Shows the pooled water heating usage sub-form for the selected type."""
         if not hasattr(self, 'activity_vars') or "residential" not in self.activity_vars or not hasattr(self, 'res_water_details_frame'): return
         vars_res = self.activity_vars["residential"]
         selected_type = vars_res.get("water_heater_type").get()
-        parent_frame = self.res_water_details_frame
-        widgets = self.res_water_widgets # Use instance attribute
 
-        for widget in list(parent_frame.winfo_children()): widget.destroy()
-        widgets.clear()
-        vars_res.pop("water_usage_amount", None)
-
-        cond_row = 0
         unit_map = {"Electric": "kWh", "Natural Gas": "therms", "Solar Thermal": "kWh"}
         unit = unit_map.get(selected_type)
+        builder = (lambda frame, sub_vars: self._build_res_water_subform(frame, sub_vars, selected_type, unit)) if unit else None
+
+        entry = self._show_pooled_subform(self._res_water_pool, self.res_water_details_frame, selected_type, builder, vars_res)
+        self.res_water_widgets.clear()
+        if entry: self.res_water_widgets.update(entry["widgets"])
 
-        if unit: # If type requires usage input
-            usage_label = "Energy Used:"
-            usage_widget, cond_row = self._add_input_row(parent_frame, cond_row, usage_label, vars_res, "water_usage_amount", unit=unit, desc=f"Energy used by {selected_type.lower()} heater.")
-            widgets["usage"] = usage_widget
+    # IVO+GPT
+    def _build_res_water_subform(self, parent_frame, sub_vars, heater_type, unit):
+        """Builds the water heating usage sub-form for one heater type; returns its widget references."""
+        usage_widget, _ = self._add_input_row(parent_frame, 0, "Energy Used:", sub_vars, "water_usage_amount", unit=unit, desc=f"Energy used by {heater_type.lower()} heater.")
+        return {"usage": usage_widget}
 
     # IVO+GPT
     def create_travel_tab_widgets(self, scrollable_content_frame):
@@ -2750,12 +6420,12 @@ class AddCarbonFootprintActivityDialog(tk.Toplevel):
         current_row = 0
         parent = scrollable_content_frame
 
-        modes = ["Car", "Motorcycle", "Bus", "Train", "Subway", "Jeepney", "Air Travel", "Rideshare"]
+        modes = ACTIVITY_FORM_OPTIONS["travel"]["mode"]
         mode_combo, current_row = self._add_input_row(parent, current_row, "Mode:", vars_travel, "mode", "combobox", modes, required=True, initial="Car")
         self.travel_widgets["mode_combo"] = mode_combo
 
         _, current_row = self._add_input_row(parent, current_row, "Distance:", vars_travel, "distance", unit="km", desc="Total distance for the specified period.", required=True)
-        period_options = ["Per Trip", "Daily Total", "Weekly Total", "Monthly Total"]
+        period_options = ACTIVITY_FORM_OPTIONS["travel"]["period"]
         _, current_row = self._add_input_row(parent, current_row, "Period/Frequency:", vars_travel, "period", "combobox", period_options, desc="Timeframe this distance represents.", required=True, initial="Per Trip")
 
         ttk.Separator(parent, orient='horizontal').grid(row=current_row, column=0, columnspan=2, sticky='ew', pady=15); current_row += 1
@@ -2766,68 +6436,50 @@ class AddCarbonFootprintActivityDialog(tk.Toplevel):
         self.travel_widgets["conditional_frame"].grid(row=base_details_end_row, column=0, columnspan=2, sticky='nsew')
         self.travel_widgets["conditional_frame"].grid_columnconfigure(1, weight=1)
 
-        # --- Define Sub-Frames (don't grid yet) ---
-        self.travel_widgets["car_details"] = tk.Frame(self.travel_widgets["conditional_frame"], bg=theme_colors[DLG_CARD])
-        self.travel_widgets["car_details"].grid_columnconfigure(1, weight=1)
-        self.travel_widgets["rideshare_details"] = tk.Frame(self.travel_widgets["conditional_frame"], bg=theme_colors[DLG_CARD])
-        self.travel_widgets["rideshare_details"].grid_columnconfigure(1, weight=1)
-        self.travel_widgets["air_details"] = tk.Frame(self.travel_widgets["conditional_frame"], bg=theme_colors[DLG_CARD])
-        self.travel_widgets["air_details"].grid_columnconfigure(1, weight=1)
+        # Mode sub-forms (Car, Rideshare, Air Travel) are built on first use and pooled
+        self._travel_pool = {}
 
         if mode_combo: mode_combo.bind("<<ComboboxSelected>>", self._on_travel_mode_change)
         self._on_travel_mode_change() # Initial call
 
     # IVO+GPT
     def _on_travel_mode_change(self, event=None):
-        """Shows/hides relevant travel detail frames."""
+        """Shows the pooled travel detail sub-form for the selected mode."""
         # Ensure instance vars are ready
         if not hasattr(self, 'activity_vars') or "travel" not in self.activity_vars or not hasattr(self, 'travel_widgets'): return
         selected_mode = self.activity_vars["travel"].get("mode").get()
-        logging.debug(f"Travel mode changed to: {selected_mode}")
+        logging.debug("Travel mode changed to: %s", selected_mode)
 
         conditional_frame = self.travel_widgets.get("conditional_frame")
-        car_details = self.travel_widgets.get("car_details")
-        rideshare_details = self.travel_widgets.get("rideshare_details")
-        air_details = self.travel_widgets.get("air_details")
+        if not conditional_frame or not conditional_frame.winfo_exists(): return
+
+        builders = {
+            "Car": self._build_travel_car_subform,
+            "Rideshare": self._build_travel_rideshare_subform,
+            "Air Travel": self._build_travel_air_subform,
+        }
+        entry = self._show_pooled_subform(self._travel_pool, conditional_frame, selected_mode, builders.get(selected_mode), self.activity_vars["travel"])
+        if entry: logging.debug("Showing details for %s.", selected_mode)
+        else: logging.debug("No specific details for %s.", selected_mode)
 
-        # Clear conditional frame content (ungrid sub-frames)
-        if conditional_frame and conditional_frame.winfo_exists():
-             for widget in list(conditional_frame.winfo_children()):
-                  widget.grid_forget()
+    # IVO+GPT
+    def _build_travel_car_subform(self, parent_frame, sub_vars):
+        fuel_widget, _ = self._add_input_row(parent_frame, 0, "Fuel Type:", sub_vars, "car_fuel_type", "combobox", ACTIVITY_FORM_OPTIONS["travel"]["car_fuel_type"], desc="Fuel type of your car.", initial="Gasoline", required=True)
+        return {"fuel": fuel_widget}
 
-        # Clear previously relevant variables
-        vars_travel = self.activity_vars["travel"]
-        conditional_keys = ["car_fuel_type", "rideshare_fuel_type", "rideshare_passengers", "flight_type", "flight_cabin"]
-        for key in conditional_keys: vars_travel.pop(key, None)
-
-        # Show and populate the relevant sub-frame
-        sub_frame_to_show = None
-        if selected_mode == "Car":
-            sub_frame_to_show = car_details
-            if sub_frame_to_show:
-                 for w in list(sub_frame_to_show.winfo_children()): w.destroy() # Clear previous
-                 self._add_input_row(sub_frame_to_show, 0, "Fuel Type:", vars_travel, "car_fuel_type", "combobox", ["Gasoline", "Diesel", "Electric"], desc="Fuel type of your car.", initial="Gasoline", required=True)
-        elif selected_mode == "Rideshare":
-            sub_frame_to_show = rideshare_details
-            if sub_frame_to_show:
-                 for w in list(sub_frame_to_show.winfo_children()): w.destroy()
-                 _, next_row = self._add_input_row(sub_frame_to_show, 0, "Fuel Type:", vars_travel, "rideshare_fuel_type", "combobox", ["Gasoline", "Diesel", "Electric"], desc="Fuel type of the vehicle.", initial="Gasoline", required=True)
-                 self._add_input_row(sub_frame_to_show, next_row, "Passengers:", vars_travel, "rideshare_passengers", unit="# (incl. driver)", desc="Total people in vehicle.", required=True, initial="1")
-        elif selected_mode == "Air Travel":
-            sub_frame_to_show = air_details
-            if sub_frame_to_show:
-                 for w in list(sub_frame_to_show.winfo_children()): w.destroy()
-                 flight_types = ["Short (<1500km)", "Medium (1500-6000km)", "Long (>6000km)"] # Simplified labels
-                 _, next_row = self._add_input_row(sub_frame_to_show, 0, "Flight Type:", vars_travel, "flight_type", "combobox", flight_types, desc="One-way distance estimate.", initial="Short (<1500km)", required=True)
-                 cabin_classes = ["Economy", "Business", "First"]
-                 self._add_input_row(sub_frame_to_show, next_row, "Cabin Class:", vars_travel, "flight_cabin", "combobox", cabin_classes, desc="Your ticket class.", initial="Economy", required=True)
-
-        # Grid the selected sub-frame inside the conditional frame
-        if sub_frame_to_show and sub_frame_to_show.winfo_exists():
-            sub_frame_to_show.grid(row=0, column=0, columnspan=2, sticky='nsew')
-            logging.debug(f"Showing details for {selected_mode}.")
-        else:
-            logging.debug(f"No specific details for {selected_mode}.")
+    # IVO+GPT
+    def _build_travel_rideshare_subform(self, parent_frame, sub_vars):
+        fuel_widget, next_row = self._add_input_row(parent_frame, 0, "Fuel Type:", sub_vars, "rideshare_fuel_type", "combobox", ACTIVITY_FORM_OPTIONS["travel"]["rideshare_fuel_type"], desc="Fuel type of the vehicle.", initial="Gasoline", required=True)
+        passengers_widget, _ = self._add_input_row(parent_frame, next_row, "Passengers:", sub_vars, "rideshare_passengers", unit="# (incl. driver)", desc="Total people in vehicle.", required=True, initial="1")
+        return {"fuel": fuel_widget, "passengers": passengers_widget}
+
+    # IVO+GPT
+    def _build_travel_air_subform(self, parent_frame, sub_vars):
+        flight_types = ACTIVITY_FORM_OPTIONS["travel"]["flight_type"]
+        flight_widget, next_row = self._add_input_row(parent_frame, 0, "Flight Type:", sub_vars, "flight_type", "combobox", flight_types, desc="One-way distance estimate.", initial="Short (<1500km)", required=True)
+        cabin_classes = ACTIVITY_FORM_OPTIONS["travel"]["flight_cabin"]
+        cabin_widget, _ = self._add_input_row(parent_frame, next_row, "Cabin Class:", sub_vars, "flight_cabin", "combobox", cabin_classes, desc="Your ticket class.", initial="Economy", required=True)
+        return {"flight_type": flight_widget, "cabin": cabin_widget}
 
     # IVO+GPT
     def create_food_tab_widgets(self, scrollable_content_frame):
@@ -2841,17 +6493,17 @@ class AddCarbonFootprintActivityDialog(tk.Toplevel):
         for key, label in self._food_inputs_labels.items():
              _, current_row = self._add_input_row(parent, current_row, f"{label}:", vars_food, key, unit="kg", desc="Estimated amount consumed.")
 
-        _, current_row = self._add_input_row(parent, current_row, "Consumption Period:", vars_food, "consumption_period", "combobox", ["Per Week", "Per Month"], desc="Timeframe for the amounts above.", required=True, initial="Per Week")
+        _, current_row = self._add_input_row(parent, current_row, "Consumption Period:", vars_food, "consumption_period", "combobox", ACTIVITY_FORM_OPTIONS["food"]["consumption_period"], desc="Timeframe for the amounts above.", required=True, initial="Per Week")
 
         ttk.Separator(parent, orient='horizontal').grid(row=current_row, column=0, columnspan=2, sticky='ew', pady=15); current_row += 1
         ttk.Label(parent, text="Food Habits (Optional Adjustments)", style='SectionHeader.TLabel').grid(row=current_row, column=0, columnspan=2, sticky='w', pady=(0, 5)); current_row += 1
 
-        local_options = ["Low (<25% Local)", "Medium (25-75% Local)", "High (>75% Local)"]
+        local_options = ACTIVITY_FORM_OPTIONS["food"]["local_sourcing"]
         _, current_row = self._add_input_row(parent, current_row, "Locally Sourced:", vars_food, "local_sourcing", "combobox", local_options, desc="Estimate % of food sourced locally.", initial="Medium (25-75% Local)")
         _, current_row = self._add_input_row(parent, current_row, "Primarily Organic:", vars_food, "organic_preference", "checkbutton", desc="Check if majority of relevant foods bought are organic.")
-        package_options = ["Minimal (Bulk, Loose)", "Average Mix", "Mostly Packaged"]
+        package_options = ACTIVITY_FORM_OPTIONS["food"]["packaging_level"]
         _, current_row = self._add_input_row(parent, current_row, "Packaging Level:", vars_food, "packaging_level", "combobox", package_options, desc="Typical packaging of groceries.", initial="Average Mix")
-        regions = ["Luzon", "Visayas", "Mindanao", "Unknown/Other"]
+        regions = ACTIVITY_FORM_OPTIONS["food"]["region"]
         _, current_row = self._add_input_row(parent, current_row, "Region:", vars_food, "region", "combobox", regions, desc="Primary region (for potential adjustments).", initial="Luzon")
 
         ttk.Label(parent, text="Note: Food footprint is complex. This provides an estimate based on consumption and habits.", style='DialogDesc.TLabel', wraplength=400).grid(row=current_row, column=0, columnspan=2, sticky='nw', pady=(15, 0)); current_row += 1
@@ -2870,8 +6522,8 @@ class AddCarbonFootprintActivityDialog(tk.Toplevel):
         for key, label in self._spending_cats_labels.items():
             _, current_row = self._add_input_row(parent, current_row, label.replace(" Spending", ":"), vars_gw, key, unit="PHP", desc="Amount spent this period.")
 
-        _, current_row = self._add_input_row(parent, current_row, "Spending Period:", vars_gw, "spending_period", "combobox", ["Monthly", "Quarterly", "Annually", "One-off Purchase"], desc="Timeframe spending covers.", initial="Monthly")
-        regions_retail = ["Urban", "Rural", "Unknown"]
+        _, current_row = self._add_input_row(parent, current_row, "Spending Period:", vars_gw, "spending_period", "combobox", ACTIVITY_FORM_OPTIONS["shopping"]["spending_period"], desc="Timeframe spending covers.", initial="Monthly")
+        regions_retail = ACTIVITY_FORM_OPTIONS["shopping"]["area_type_retail"]
         _, current_row = self._add_input_row(parent, current_row, "Area Type:", vars_gw, "area_type_retail", "combobox", regions_retail, desc="Affects retail & waste factors.", initial="Urban", required=True)
 
         # Waste Management
@@ -2879,8 +6531,8 @@ class AddCarbonFootprintActivityDialog(tk.Toplevel):
         ttk.Label(parent, text="Waste Management", style='SectionHeader.TLabel').grid(row=current_row, column=0, columnspan=2, sticky='w', pady=(0, 5)); current_row += 1
 
         _, current_row = self._add_input_row(parent, current_row, "Waste Amount:", vars_gw, "waste_kg", unit="kg", desc="Estimated total household waste generated.")
-        _, current_row = self._add_input_row(parent, current_row, "Waste Period:", vars_gw, "waste_period", "combobox", ["Per Week", "Per Month"], desc="Timeframe for waste amount.", initial="Per Week")
-        disposal_methods = ["Landfill (Unknown Methane)", "Landfill (Low Methane)", "Landfill (Medium Methane)", "Landfill (High Methane)", "Incineration", "Mixed Recycling & Waste"]
+        _, current_row = self._add_input_row(parent, current_row, "Waste Period:", vars_gw, "waste_period", "combobox", ACTIVITY_FORM_OPTIONS["shopping"]["waste_period"], desc="Timeframe for waste amount.", initial="Per Week")
+        disposal_methods = ACTIVITY_FORM_OPTIONS["shopping"]["waste_disposal"]
         _, current_row = self._add_input_row(parent, current_row, "Primary Disposal:", vars_gw, "waste_disposal", "combobox", disposal_methods, desc="How most waste is handled.", initial="Landfill (Unknown Methane)")
 
     # IVO+GPT
@@ -2892,10 +6544,10 @@ class AddCarbonFootprintActivityDialog(tk.Toplevel):
         ttk.Label(parent, text="Service Usage Estimates", style='SectionHeader.TLabel').grid(row=current_row, column=0, columnspan=2, sticky='w', pady=(0, 5)); current_row += 1
 
         _, current_row = self._add_input_row(parent, current_row, "Dry Cleaning:", vars_serv, "dry_cleaning_kg", unit="kg", desc="Approx. weight of garments dry cleaned.")
-        _, current_row = self._add_input_row(parent, current_row, "Dry Cleaning Period:", vars_serv, "dry_cleaning_period", "combobox", ["Per Month", "Per Year"], initial="Per Month")
+        _, current_row = self._add_input_row(parent, current_row, "Dry Cleaning Period:", vars_serv, "dry_cleaning_period", "combobox", ACTIVITY_FORM_OPTIONS["services"]["dry_cleaning_period"], initial="Per Month")
         _, current_row = self._add_input_row(parent, current_row, "Landscaping Area:", vars_serv, "landscaping_m2", unit="m²", desc="Area serviced by landscaping.")
-        _, current_row = self._add_input_row(parent, current_row, "Landscaping Period:", vars_serv, "landscaping_period", "combobox", ["Per Month", "Per Year"], initial="Per Month")
-        regions_serv = ["Urban", "Rural", "Unknown"]
+        _, current_row = self._add_input_row(parent, current_row, "Landscaping Period:", vars_serv, "landscaping_period", "combobox", ACTIVITY_FORM_OPTIONS["services"]["landscaping_period"], initial="Per Month")
+        regions_serv = ACTIVITY_FORM_OPTIONS["services"]["area_type_services"]
         _, current_row = self._add_input_row(parent, current_row, "Area Type:", vars_serv, "area_type_services", "combobox", regions_serv, desc="Affects service emission factors.", initial="Urban", required=True)
 
     # IVO+GPT
@@ -2909,358 +6561,107 @@ class AddCarbonFootprintActivityDialog(tk.Toplevel):
         _, current_row = self._add_input_row(parent, current_row, "Laptop Use:", vars_digital, "laptop_hours", unit="hours/day", desc="Avg. daily active use.")
         _, current_row = self._add_input_row(parent, current_row, "Mobile Use:", vars_digital, "mobile_hours", unit="hours/day", desc="Avg. daily active use.")
         _, current_row = self._add_input_row(parent, current_row, "Tablet Use:", vars_digital, "tablet_hours", unit="hours/day", desc="Avg. daily active use.")
+        _, current_row = self._add_input_row(parent, current_row, "Device Hours:", vars_digital, "device_window", unit="e.g. 9-17", desc=USAGE_WINDOW_DESC)
 
         # Streaming / Gaming
         ttk.Separator(parent, orient='horizontal').grid(row=current_row, column=0, columnspan=2, sticky='ew', pady=15); current_row += 1
         ttk.Label(parent, text="Streaming & Gaming (Avg. Daily)", style='SectionHeader.TLabel').grid(row=current_row, column=0, columnspan=2, sticky='w', pady=(0, 5)); current_row += 1
-        stream_quality = ["Low (SD)", "Medium (HD)", "High (4K)"]
+        stream_quality = ACTIVITY_FORM_OPTIONS["digital"]["streaming_quality"]
         _, current_row = self._add_input_row(parent, current_row, "Streaming Quality:", vars_digital, "streaming_quality", "combobox", stream_quality, initial="Medium (HD)")
         _, current_row = self._add_input_row(parent, current_row, "Streaming Hours:", vars_digital, "streaming_hours", unit="hours/day")
-        gaming_type = ["Low Demand", "High Demand"] # Simplified labels
+        _, current_row = self._add_input_row(parent, current_row, "Streaming Time:", vars_digital, "streaming_window", unit="e.g. 20-23", desc=USAGE_WINDOW_DESC)
+        gaming_type = ACTIVITY_FORM_OPTIONS["digital"]["gaming_type"]
         _, current_row = self._add_input_row(parent, current_row, "Gaming Type:", vars_digital, "gaming_type", "combobox", gaming_type, initial="Low Demand")
         _, current_row = self._add_input_row(parent, current_row, "Gaming Hours:", vars_digital, "gaming_hours", unit="hours/day")
+        _, current_row = self._add_input_row(parent, current_row, "Gaming Time:", vars_digital, "gaming_window", unit="e.g. 22-2", desc=USAGE_WINDOW_DESC)
 
         # Data Usage
         ttk.Separator(parent, orient='horizontal').grid(row=current_row, column=0, columnspan=2, sticky='ew', pady=15); current_row += 1
         ttk.Label(parent, text="Internet Data Usage", style='SectionHeader.TLabel').grid(row=current_row, column=0, columnspan=2, sticky='w', pady=(0, 5)); current_row += 1
         _, current_row = self._add_input_row(parent, current_row, "Total Data:", vars_digital, "data_usage_gb", unit="GB", desc="Estimate total monthly data (WiFi & Mobile).")
-        _, current_row = self._add_input_row(parent, current_row, "Data Period:", vars_digital, "data_period", "combobox", ["Per Month", "Per Day"], desc="Timeframe for data usage.", initial="Per Month", required=True)
+        _, current_row = self._add_input_row(parent, current_row, "Data Period:", vars_digital, "data_period", "combobox", ACTIVITY_FORM_OPTIONS["digital"]["data_period"], desc="Timeframe for data usage.", initial="Per Month", required=True)
 
         # Regional Grid Factor
         ttk.Separator(parent, orient='horizontal').grid(row=current_row, column=0, columnspan=2, sticky='ew', pady=15); current_row += 1
-        regions_grid = ["Luzon", "Visayas", "Mindanao", "Unknown/Default"]
+        regions_grid = ACTIVITY_FORM_OPTIONS["digital"]["region_grid"]
         _, current_row = self._add_input_row(parent, current_row, "Region (Grid):", vars_digital, "region_grid", "combobox", regions_grid, desc="Select grid for electricity emission factor.", initial="Luzon", required=True)
 
     # IVO-ONLY
     # --- Input Conversion/Validation Helpers ---
     def _get_float_or_zero(self, value_str):
         """Safely convert string to float, returning 0.0 on failure or empty."""
-        if value_str is None: return 0.0
-        try:
-            cleaned_str = str(value_str).strip()
-            return float(cleaned_str) if cleaned_str else 0.0
-        except (ValueError, TypeError):
-            return 0.0
+        return get_float_or_zero(value_str)
 
     # IVO-ONLY
     def _get_int_or_zero(self, value_str):
         """Safely convert string to int, returning 0 on failure or empty."""
-        if value_str is None: return 0
-        try:
-             cleaned_str = str(value_str).strip()
-             return int(float(cleaned_str)) if cleaned_str else 0
-        except (ValueError, TypeError):
-             return 0
+        return get_int_or_zero(value_str)
 
     # IVO-ONLY
     # --- Carbon Calculation Logic ---
     def _calculate_carbon_footprint(self, category, details):
         """Calculates CO2e based on validated and cleaned input details."""
-        # Use factors loaded into instance attribute
-        factors = self.factors
-        total_co2e = 0.0
-        calculation_steps = [] # For logging/debugging
-
-        # Pre-calculate average days/weeks per month
-        DAYS_PER_MONTH = 30.4375 # More precise average
-        WEEKS_PER_MONTH = DAYS_PER_MONTH / 7.0
-
-        # IVO-ONLY
-        # Helper to get monthly amount from period total
-        def get_monthly_average(amount, period, months_map=None):
-             # Treat "Per Trip" as a one-off contribution for this period's calculation
-             # Treat "One-off Purchase" as averaged over a year
-             if months_map is None:
-                 months_map = {"Monthly": 1, "Bi-monthly": 2, "Quarterly": 3, "Annually": 12,
-                               "Per Week": 1 / WEEKS_PER_MONTH, "Per Day": 1 / DAYS_PER_MONTH, "Per Trip": 1,
-                               "One-off Purchase": 12}
-             if period == "Monthly": return amount
-             if period == "Per Week": return amount * WEEKS_PER_MONTH
-             if period == "Daily Total": return amount * DAYS_PER_MONTH
-             if period == "Annually": return amount / 12.0
-             if period == "Quarterly": return amount / 3.0
-             if period == "Bi-monthly": return amount / 2.0
-             if period == "One-off Purchase": return amount / 12.0 # Average one-off over a year
-             if period == "Per Trip": return amount # Treat trip as its own contribution
-
-             # Fallback for unknown periods
-             logging.warning(f"Unknown period '{period}' encountered in calculation. Using raw amount.")
-             return amount
-
-
         try:
-            # IVO-ONLY
-            # --- Residential ---
-            if category == "residential":
-                # Elec
-                elec_kwh = self._get_float_or_zero(details.get("elec_kwh"))
-                elec_period = details.get("elec_period", "Monthly") # Should be validated
-                monthly_elec = get_monthly_average(elec_kwh, elec_period)
-                elec_fp = monthly_elec * factors.get("res_elec_usage_ph_nat_avg_kwh", 0)
-                if monthly_elec > 0: calculation_steps.append(f"Elec: {monthly_elec:.1f}kWh/mo -> {elec_fp:.2f}")
-                total_co2e += elec_fp
-
-                # Heat
-                heat_fuel = details.get("heat_fuel_type")
-                heat_amount = self._get_float_or_zero(details.get("heat_fuel_amount"))
-                heat_period = details.get("heat_fuel_period", "Monthly")
-                monthly_heat = get_monthly_average(heat_amount, heat_period)
-                heat_fp = 0.0
-                if monthly_heat > 0 and heat_fuel != "None":
-                    factor_key = None
-                    if heat_fuel == "Natural Gas": factor_key = "res_heat_nat_gas_therm"
-                    elif heat_fuel == "Heating Oil": factor_key = "res_heat_heating_oil_gallon"
-                    elif heat_fuel == "Propane": factor_key = "res_heat_propane_gallon"
-                    elif heat_fuel == "Wood":
-                         wood_type = details.get("heat_wood_type", "Hardwood")
-                         factor_key = "res_heat_wood_softwood_cord" if wood_type == "Softwood" else "res_heat_wood_hardwood_cord"
-                    if factor_key: heat_fp = monthly_heat * factors.get(factor_key, 0)
-                    calculation_steps.append(f"Heat ({heat_fuel}): {monthly_heat:.2f} units/mo -> {heat_fp:.2f}")
-                total_co2e += heat_fp
-
-                # Water Heat
-                water_type = details.get("water_heater_type")
-                water_usage = self._get_float_or_zero(details.get("water_usage_amount"))
-                water_period = details.get("water_usage_period", "Monthly")
-                monthly_water = get_monthly_average(water_usage, water_period)
-                water_fp = 0.0
-                if monthly_water > 0 and water_type != "None":
-                    factor_key = None
-                    if water_type == "Electric": factor_key = "res_water_elec_kwh"
-                    elif water_type == "Natural Gas": factor_key = "res_water_gas_therm"
-                    elif water_type == "Solar Thermal": factor_key = "res_water_solar_thermal_kwh"
-                    if factor_key: water_fp = monthly_water * factors.get(factor_key, 0)
-                    calculation_steps.append(f"Water ({water_type}): {monthly_water:.2f} units/mo -> {water_fp:.2f}")
-                total_co2e += water_fp
-
-                # Renewables (Savings)
-                renew_type = details.get("renew_type")
-                renew_gen = self._get_float_or_zero(details.get("renew_kwh_gen"))
-                renew_period = details.get("renew_period", "Monthly")
-                monthly_renew = get_monthly_average(renew_gen, renew_period)
-                renew_fp = 0.0
-                if monthly_renew > 0 and renew_type != "None":
-                     factor_key = "res_renew_solar_panels_kwh" if renew_type == "Solar Panels" else "res_renew_wind_turbines_kwh"
-                     renew_fp = monthly_renew * factors.get(factor_key, 0) # Factor is negative
-                     calculation_steps.append(f"Renew ({renew_type}): {monthly_renew:.1f} kWh/mo -> {renew_fp:.2f}")
-                total_co2e += renew_fp
-
-                calculation_steps.append("Residential Result: Avg Monthly")
-
-            # IVO-ONLY
-            # --- Transportation ---
-            elif category == "travel":
-                mode = details.get("mode")
-                distance_km = self._get_float_or_zero(details.get("distance"))
-                period = details.get("period", "Per Trip") # Already validated
-
-                # Get base factor (per km or pkm) and multipliers
-                factor_val, is_pkm, multiplier, occupancy = 0.0, False, 1.0, 1
-                if mode == "Car":
-                    fuel = details.get("car_fuel_type"); f_key = {"Gasoline": "trans_pv_gasoline_km", "Diesel": "trans_pv_diesel_km", "Electric": "trans_pv_electric_km"}.get(fuel); factor_val = factors.get(f_key, 0); is_pkm = False
-                elif mode == "Motorcycle": factor_val = factors.get("trans_pub_motorcycle_pkm", 0); is_pkm = True
-                elif mode == "Bus": factor_val = factors.get("trans_pub_bus_pkm", 0); is_pkm = True
-                elif mode == "Train": factor_val = factors.get("trans_pub_train_pkm", 0); is_pkm = True
-                elif mode == "Subway": factor_val = factors.get("trans_pub_subway_pkm", 0); is_pkm = True
-                elif mode == "Jeepney": factor_val = factors.get("trans_pub_jeepney_pkm", 0); is_pkm = True
-                elif mode == "Air Travel":
-                    flight_type = details.get("flight_type"); cabin = details.get("flight_cabin")
-                    f_key = {"Short": "trans_air_short_pkm", "Medium": "trans_air_medium_pkm", "Long": "trans_air_long_pkm"}.get(flight_type.split()[0], "trans_air_medium_pkm") # Approx match
-                    factor_val = factors.get(f_key, 0); is_pkm = True
-                    m_key = {"Economy": "trans_air_cabin_economy", "Business": "trans_air_cabin_business", "First": "trans_air_cabin_first"}.get(cabin, "trans_air_cabin_economy")
-                    multiplier = factors.get(m_key, 1.0)
-                elif mode == "Rideshare":
-                    fuel = details.get("rideshare_fuel_type"); passengers = self._get_int_or_zero(details.get("rideshare_passengers")); occupancy = max(1, passengers)
-                    f_key = {"Gasoline": "trans_pv_gasoline_km", "Diesel": "trans_pv_diesel_km", "Electric": "trans_pv_electric_km"}.get(fuel); factor_val = factors.get(f_key, 0); is_pkm = False
-
-
-                # Calculate footprint for the distance
-                trip_fp = 0
-                if is_pkm: trip_fp = distance_km * factor_val * multiplier
-                else: trip_fp = (distance_km * factor_val * multiplier) / occupancy
-                calculation_steps.append(f"Trip FP ({mode}): {trip_fp:.2f} (for {distance_km} km)")
-
-                # Convert trip footprint to monthly average based on period
-                total_co2e = get_monthly_average(trip_fp, period)
-                calculation_steps.append(f"Travel Result: Avg Monthly (based on {period})")
-
-            # IVO-ONLY
-            # --- Food ---
-            elif category == "food":
-                consumption_period = details.get("consumption_period", "Per Week")
-                monthly_prod_fp = 0.0
-                total_monthly_kg = 0 # Track total kg for regional adjustments
-
-                # Use instance attributes for mapping
-                for input_key, factor_info in self._food_inputs_map.items():
-                    amount_kg = self._get_float_or_zero(details.get(input_key))
-                    if amount_kg <= 0: continue
-
-                    monthly_kg = get_monthly_average(amount_kg, consumption_period)
-                    total_monthly_kg += monthly_kg # Accumulate total for regional adjustment later
-
-                    factor_val = 0
-                    if isinstance(factor_info, tuple): # Average factors if tuple provided
-                         f_vals = [factors.get(f_key, 0) for f_key in factor_info]
-                         factor_val = sum(f_vals) / len(f_vals) if f_vals else 0
-                    else: # Single factor key
-                         factor_val = factors.get(factor_info, 0)
-
-                    monthly_prod_fp += monthly_kg * factor_val
-                calculation_steps.append(f"Production FP (Monthly Avg): {monthly_prod_fp:.2f}")
-
-                # Apply Multipliers
-                local = details.get("local_sourcing", "Medium"); organic = details.get("organic_preference", False); packaging = details.get("packaging_level", "Average")
-                local_mult = {"Low": 1.05, "Medium": 1.0, "High": 0.90}.get(local.split()[0], 1.0)
-                fert_conv = factors.get("food_farm_fertilizer_conventional_kgN", 1.0); fert_org = factors.get("food_farm_fertilizer_organic_kgN", 1.0); base_fert = (fert_conv + fert_org) / 2.0
-                fert_mult = (fert_org / base_fert) if organic and base_fert > 0 else ((fert_conv / base_fert) if base_fert > 0 else 1.0)
-                pkg_mult = {"Minimal": 0.95, "Average": 1.0, "Mostly": 1.10}.get(packaging.split()[0], 1.0)
-                adjusted_fp = monthly_prod_fp * local_mult * fert_mult * pkg_mult
-                calculation_steps.append(f"Adjusted FP (Qual: Loc*{local_mult:.2f}, Org*{fert_mult:.2f}, Pkg*{pkg_mult:.2f}): {adjusted_fp:.2f}")
-
-                # Regional Additive Adjustment
-                region_adj_fp = 0.0
-                region = details.get("region", "Luzon")
-                region_factor = 0.0
-                if total_monthly_kg > 0:
-                    region_map = {"Luzon": "food_region_luzon_kg_crop", "Visayas": "food_region_visayas_kg_crop", "Mindanao": "food_region_mindanao_kg_crop"}
-                    region_factor = factors.get(region_map.get(region), 0)
-                    if region_factor != 0:
-                         region_adj_fp = total_monthly_kg * region_factor
-                         calculation_steps.append(f"Region Adj ({region}): {total_monthly_kg:.1f}kg total/mo * {region_factor:.3f} = +{region_adj_fp:.2f}")
-
-                total_co2e = adjusted_fp + region_adj_fp
-                calculation_steps.append("Food Result: Avg Monthly")
-
-            # IVO-ONLY
-            # --- Goods & Waste (Was Shopping Before Waste Research was Unavailable) ---
-            elif category == "shopping":
-                # Spending
-                spending_period = details.get("spending_period", "Monthly")
-                area_type = details.get("area_type_retail", "Urban")
-                period_spending_fp = 0.0
-                usd_conv = 1.0 / PHP_TO_USD_RATE if PHP_TO_USD_RATE > 0 else 0
-
-                # Use instance attributes for mapping
-                for input_key, factor_key in self._spending_cats_map.items():
-                     php_amount = self._get_float_or_zero(details.get(input_key))
-                     if php_amount > 0 and usd_conv > 0:
-                          usd_amount = php_amount * usd_conv
-                          base_factor = factors.get(factor_key, 0)
-                          period_spending_fp += usd_amount * base_factor
-
-                region_mult = factors.get(f"goods_region_{area_type.lower()}_retail_mult", 1.0) if area_type != "Unknown" else 1.0
-                period_spending_fp *= region_mult
-                monthly_spending_fp = get_monthly_average(period_spending_fp, spending_period)
-                calculation_steps.append(f"Spending FP (Monthly Avg, Region: {area_type}): {monthly_spending_fp:.2f}")
-
-                # Waste
-                waste_kg = self._get_float_or_zero(details.get("waste_kg"))
-                monthly_waste_fp = 0.0
-                if waste_kg > 0:
-                    waste_period = details.get("waste_period", "Per Week")
-                    disposal = details.get("waste_disposal", "Unknown")
-                    monthly_waste_kg = get_monthly_average(waste_kg, waste_period)
-
-                    waste_factor = 0.0
-                    if "Recycling" in disposal: waste_factor = factors.get("waste_recycle_avg_mix_kg_kg", 0)
-                    elif "Incineration" in disposal: waste_factor = factors.get("waste_incineration_kg_kg", 0)
-                    else: # Landfill
-                         lf_base_map = {"Low": "waste_landfill_low_ch4_kg_kg", "Medium": "waste_landfill_med_ch4_kg_kg", "High": "waste_landfill_high_ch4_kg_kg"}
-                         lf_key = next((k for k in lf_base_map if k in disposal), "Medium") # Default Medium/Unknown
-                         base_lf = factors.get(lf_base_map[lf_key], 0)
-                         # Regional override
-                         waste_factor = factors.get(f"waste_region_{area_type.lower()}_landfill_kg_kg", base_lf) if area_type != "Unknown" else base_lf
-                    monthly_waste_fp = monthly_waste_kg * waste_factor
-                    calculation_steps.append(f"Waste FP (Monthly Avg, Disposal: {disposal}): {monthly_waste_fp:.2f}")
-
-                total_co2e = monthly_spending_fp + monthly_waste_fp
-                calculation_steps.append("Goods & Waste Result: Avg Monthly")
-
-            # IVO-ONLY
-            # --- Services ---
-            elif category == "services":
-                area_type = details.get("area_type_services", "Urban")
-                dc_kg = self._get_float_or_zero(details.get("dry_cleaning_kg"))
-                ls_m2 = self._get_float_or_zero(details.get("landscaping_m2"))
-                dc_period = details.get("dry_cleaning_period", "Per Month")
-                ls_period = details.get("landscaping_period", "Per Month")
-
-                # Dry Cleaning
-                monthly_dc_fp = 0.0
-                if dc_kg > 0:
-                    monthly_dc_kg = get_monthly_average(dc_kg, dc_period)
-                    f_key = f"serv_drycleaning_region_{area_type.lower()}_kg_garment"
-                    dc_factor = factors.get(f_key, factors.get("serv_drycleaning_base_kg_garment", 0))
-                    monthly_dc_fp = monthly_dc_kg * dc_factor
-                    calculation_steps.append(f"Dry Cleaning ({area_type}): {monthly_dc_kg:.1f}kg/mo -> {monthly_dc_fp:.2f}")
-
-                # Landscaping
-                monthly_ls_fp = 0.0
-                if ls_m2 > 0:
-                    monthly_ls_m2 = get_monthly_average(ls_m2, ls_period)
-                    f_key = f"serv_landscaping_region_{area_type.lower()}_m2"
-                    ls_factor = factors.get(f_key, factors.get("serv_landscaping_base_m2", 0))
-                    monthly_ls_fp = monthly_ls_m2 * ls_factor
-                    calculation_steps.append(f"Landscaping ({area_type}): {monthly_ls_m2:.1f}m2/mo -> {monthly_ls_fp:.2f}")
-
-                total_co2e = monthly_dc_fp + monthly_ls_fp
-                calculation_steps.append("Services Result: Avg Monthly")
+            # Use factors loaded into instance attribute
+            total_co2e, components = calculate_footprint_components(category, details, self.factors, self.php_per_usd, self.grid)
 
-            # IVO-ONLY
-            # --- Digital ---
-            elif category == "digital":
-                region = details.get("region_grid", "Luzon")
-                grid_f_key = f"digital_grid_{region.lower()}_kwh"
-                grid_factor = factors.get(grid_f_key, factors.get("digital_grid_default_kwh", 0))
-
-                # Device energy (kWh/day)
-                dev_kwh = (self._get_float_or_zero(details.get("laptop_hours")) * factors.get("digital_laptop_kwh_hour",0) +
-                           self._get_float_or_zero(details.get("mobile_hours")) * factors.get("digital_mobile_kwh_hour",0) +
-                           self._get_float_or_zero(details.get("tablet_hours")) * factors.get("digital_tablet_kwh_hour",0))
-
-                # Stream/Game energy (kWh/day)
-                sq = details.get("streaming_quality", "Medium"); sh = self._get_float_or_zero(details.get("streaming_hours"))
-                gt = details.get("gaming_type", "Low"); gh = self._get_float_or_zero(details.get("gaming_hours"))
-                stream_f = factors.get({"Low": "digital_stream_low_kwh_hour", "High": "digital_stream_high_kwh_hour"}.get(sq.split()[0], "digital_stream_medium_kwh_hour"), 0)
-                game_f = factors.get({"Low": "digital_game_low_kwh_hour", "High": "digital_game_high_kwh_hour"}.get(gt.split()[0], "digital_game_low_kwh_hour"), 0)
-                sg_kwh = (sh * stream_f) + (gh * game_f)
-
-                # Data energy (kWh/day)
-                data_gb = self._get_float_or_zero(details.get("data_usage_gb"))
-                data_period = details.get("data_period", "Per Month")
-                daily_data_gb = get_monthly_average(data_gb, data_period) / DAYS_PER_MONTH # Convert monthly avg GB to daily avg GB
-                data_kwh_f = factors.get("digital_datacenter_kwh_gb", 0) + factors.get("digital_network_kwh_gb", 0)
-                data_kwh = daily_data_gb * data_kwh_f
-
-                # Total daily kWh and monthly CO2e
-                total_kwh_day = dev_kwh + sg_kwh + data_kwh
-                daily_co2e = total_kwh_day * grid_factor
-                total_co2e = daily_co2e * DAYS_PER_MONTH
-                calculation_steps.append(f"Digital: {total_kwh_day:.3f} kWh/day -> {daily_co2e:.3f} kgCO2e/day -> {total_co2e:.2f} kgCO2e/mo")
-                calculation_steps.append("Digital Result: Avg Monthly")
-
-            # Log calculation steps for debugging
-            logging.debug(f"Calculation Steps for {category}:")
-            for step in calculation_steps: logging.debug(f"  - {step}")
+            # Log calculation components for debugging (skip the loop entirely above DEBUG)
+            if logging.getLogger().isEnabledFor(logging.DEBUG):
+                logging.debug("Calculation components for %s (monthly avg):", category)
+                for name, value in components.items(): logging.debug("  - %s: %.3f", name, value)
 
             # Final result: round and ensure non-negative
             final_co2e = round(max(0, total_co2e), 3)
-            logging.info(f"Calculated footprint for {category}: {final_co2e:.3f} kg CO2e")
+            logging.info("Calculated footprint for %s: %.3f kg CO2e", category, final_co2e)
             return final_co2e
 
         # IVO+GPT
         except KeyError as e:
-             logging.error(f"Missing factor key during calculation for {category}: {e}")
+             logging.error("Missing factor key during calculation for %s: %s", category, e)
              messagebox.showerror("Calculation Error", f"Missing emission factor: '{e}'. Calculation failed.", parent=self)
              return None # Indicate failure
         except Exception as e:
-            logging.exception(f"Unexpected error calculating footprint for {category}: {e}")
+            logging.exception("Unexpected error calculating footprint for %s: %s", category, e)
             messagebox.showerror("Calculation Error", f"Calculation error for {category}:\n{e}", parent=self)
             return None # Indicate failure
 
 
+    # IVO+GPT
+    # --- Live Footprint Preview ---
+    def _schedule_preview_update(self, category):
+        """Variable trace callback; notes the edited category and debounces its preview recalculation through after()."""
+        if category is not None: self._preview_pending.add(category)
+        if self._preview_after_id:
+            try: self.after_cancel(self._preview_after_id)
+            except tk.TclError: pass
+        self._preview_after_id = self.after(PREVIEW_DEBOUNCE_MS, self._update_previews, self._preview_pending)
+
+    # IVO+GPT
+    def _update_previews(self, categories=None):
+        """Refreshes the running monthly estimate of the given categories' tabs (all tabs if None)."""
+        self._preview_after_id = None
+        if categories is None: categories = self.preview_labels
+        for cat_key in list(categories):
+            label = self.preview_labels.get(cat_key)
+            if label and label.winfo_exists():
+                label.configure(text=self._get_preview_text(cat_key))
+        self._preview_pending.clear()
+
+    # IVO-ONLY
+    def _get_preview_text(self, category):
+        """Builds the preview string (total + component breakdown) from the current inputs."""
+        raw_details = {key: var.get() for key, var in self.activity_vars[category].items()}
+        try:
+            # Skips validation on purpose: partial input is expected while typing
+            total_co2e, components = calculate_footprint_components(category, self._clean_details_for_calculation(raw_details), self.factors, self.php_per_usd, self.grid)
+        except Exception:
+            return "Estimated: -"
+        parts = [f"{name} {value:,.2f}" for name, value in components.items() if abs(value) >= 0.005]
+        text = f"Estimated: {format_carbon_emission(round(max(0, total_co2e), 3))} / month"
+        return f"{text}   ({' | '.join(parts)})" if parts else text
+
     # --- Submission Logic ---
+    @perf_monitor.instrument("submit_activity")
     def submit_activity(self):
         """Gathers inputs, validates, calculates, saves, logs, and closes."""
         try:
@@ -3287,7 +6688,7 @@ class AddCarbonFootprintActivityDialog(tk.Toplevel):
                  except tk.TclError: pass
             if not activity_category: raise ValueError("Could not map tab to category.")
 
-            logging.info(f"Submitting activity for category: {activity_category}")
+            logging.info("Submitting activity for category: %s", activity_category)
             activity_vars = self.activity_vars[activity_category]
             activity_details = {key: var.get() for key, var in activity_vars.items()} # Raw inputs
 
@@ -3305,19 +6706,18 @@ class AddCarbonFootprintActivityDialog(tk.Toplevel):
 
             # IVO-ONLY
             # 4. Calculate Footprint
-            logging.debug(f"Calculating footprint for {activity_category} with cleaned details: {cleaned_details}")
+            logging.debug("Calculating footprint for %s with cleaned details: %s", activity_category, cleaned_details)
             calculated_footprint = self._calculate_carbon_footprint(activity_category, cleaned_details)
             if calculated_footprint is None: return # Error already shown
 
             # IVO+GPT
             # 5. Create Record (Store RAW details for display, calculated FP)
             timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            new_activity_record = {
-                "timestamp": timestamp,
-                "category": activity_category,
-                "activity_details": activity_details, # Store raw user inputs
-                "carbon_footprint": calculated_footprint
-            }
+            new_activity_record = ActivityRecord(timestamp, activity_category,
+                                                 activity_details, # Store raw user inputs
+                                                 calculated_footprint,
+                                                 factor_set=self.factor_set_version,
+                                                 **self.input_stamps.get(activity_category, {}))
 
             # IVO+GPT
             # 6. Update App State and Save
@@ -3340,114 +6740,20 @@ class AddCarbonFootprintActivityDialog(tk.Toplevel):
         # IVO+GPT
         except ValueError as e: # Catch validation or internal logic errors
             messagebox.showerror("Input Error", str(e), parent=self)
-            logging.error(f"Submission validation error: {e}", exc_info=True)
+            logging.error("Submission validation error: %s", e, exc_info=True)
         except Exception as e:
             logging.exception("Unexpected error during activity submission")
             messagebox.showerror("Submission Error", f"An unexpected error occurred:\n{e}", parent=self)
 
     # IVO-ONLY
     def _validate_inputs(self, category, details):
-        """Performs validation based on category and returns list of error messages."""
-        errors = []
-        def check_num(key, name, allow_zero=True, is_int=False):
-            val_str = str(details.get(key, "")).strip()
-            is_valid = False
-            if val_str:
-                try:
-                    val = float(val_str)
-                    if (allow_zero and val >= 0) or (not allow_zero and val > 0):
-                         if is_int and val != int(val): # Check if float represents int if needed
-                              is_valid = False
-                         else:
-                              is_valid = True
-                except ValueError: pass
-            elif allow_zero: is_valid = True # Empty allowed if zero allowed
-            if not is_valid:
-                 req = f"{'positive' if not allow_zero else 'non-negative'}{' whole' if is_int else ''}"
-                 errors.append(f"'{name}' must be a {req} number or empty.")
-
-        # IVO-ONLY
-        def check_req(key, name):
-            val = details.get(key)
-            if val is None or str(val).strip() == "" or str(val) == "None":
-                 errors.append(f"'{name}' is required.")
-
-        # IVO+GPT (REPEATING RULES)
-        # --- Category-Specific Rules ---
-        if category == "residential":
-            check_req("elec_kwh", "Electricity Used"); check_num("elec_kwh", "Electricity Used", allow_zero=False)
-            check_req("elec_period", "Electricity Billing Period")
-            heat_fuel = details.get("heat_fuel_type"); heat_amt = self._get_float_or_zero(details.get("heat_fuel_amount"))
-            if heat_fuel != "None": check_num("heat_fuel_amount", f"{heat_fuel} Amount"); # Allow 0
-            water_type = details.get("water_heater_type"); water_amt = self._get_float_or_zero(details.get("water_usage_amount"))
-            if water_type != "None": check_num("water_usage_amount", f"{water_type} Usage"); # Allow 0
-            renew_type = details.get("renew_type"); renew_amt = self._get_float_or_zero(details.get("renew_kwh_gen"))
-            if renew_type != "None": check_num("renew_kwh_gen", "kWh Generated"); # Allow 0
-
-        elif category == "travel":
-            check_req("mode", "Mode"); check_req("distance", "Distance"); check_num("distance", "Distance", allow_zero=False)
-            check_req("period", "Period/Frequency")
-            mode = details.get("mode")
-            if mode == "Car": check_req("car_fuel_type", "Car Fuel")
-            if mode == "Rideshare": check_req("rideshare_fuel_type", "Rideshare Fuel"); check_req("rideshare_passengers", "Passengers"); check_num("rideshare_passengers", "Passengers", allow_zero=False, is_int=True)
-            if mode == "Air Travel": check_req("flight_type", "Flight Type"); check_req("flight_cabin", "Cabin")
-
-        elif category == "food":
-            check_req("consumption_period", "Consumption Period"); check_req("region", "Region")
-            has_amount = any(self._get_float_or_zero(details.get(k)) > 0 for k in self._food_inputs_map)
-            if not has_amount: errors.append("Enter amount for at least one food category.")
-            else: # Only check positivity if amounts entered
-                 for k, label in self._food_inputs_labels.items(): check_num(k, label)
-
-        elif category == "shopping": # Goods & Waste
-            has_spend = any(self._get_float_or_zero(details.get(k)) > 0 for k in self._spending_cats_map)
-            has_waste = self._get_float_or_zero(details.get("waste_kg")) > 0
-            if not has_spend and not has_waste: errors.append("Enter Spending or Waste details.")
-            if has_spend or has_waste: check_req("area_type_retail", "Area Type")
-            if has_spend: check_req("spending_period", "Spending Period"); # Check amounts are positive
-            for k, label in self._spending_cats_labels.items(): check_num(k, label)
-            if has_waste: check_req("waste_kg", "Waste Amount"); check_num("waste_kg", "Waste Amount", allow_zero=False); check_req("waste_period", "Waste Period"); check_req("waste_disposal", "Disposal Method")
-
-        elif category == "services":
-             has_dc = self._get_float_or_zero(details.get("dry_cleaning_kg")) > 0
-             has_ls = self._get_float_or_zero(details.get("landscaping_m2")) > 0
-             if not has_dc and not has_ls: errors.append("Enter details for Dry Cleaning or Landscaping.")
-             if has_dc or has_ls: check_req("area_type_services", "Area Type")
-             if has_dc: check_req("dry_cleaning_kg", "Dry Cleaning Amount"); check_num("dry_cleaning_kg", "Dry Cleaning Amount", allow_zero=False); check_req("dry_cleaning_period", "DC Period")
-             if has_ls: check_req("landscaping_m2", "Landscaping Area"); check_num("landscaping_m2", "Landscaping Area", allow_zero=False); check_req("landscaping_period", "LS Period")
-
-        elif category == "digital":
-             usage_keys = ["laptop_hours", "mobile_hours", "tablet_hours", "streaming_hours", "gaming_hours", "data_usage_gb"]
-             has_usage = any(self._get_float_or_zero(details.get(k)) > 0 for k in usage_keys)
-             if not has_usage: errors.append("Enter usage for at least one digital activity.")
-             else: # Check numbers are valid if entered
-                 for k in usage_keys: check_num(k, k.replace("_", " ").title())
-             if self._get_float_or_zero(details.get("data_usage_gb")) > 0: check_req("data_period", "Data Period")
-             check_req("region_grid", "Region (Grid)")
-
-        return errors
+        """Performs validation based on category and returns list of error messages (see validate_activity_inputs)."""
+        return validate_activity_inputs(category, details)
 
     # IVO-ONLY
     def _clean_details_for_calculation(self, raw_details):
-         """Converts numeric strings to numbers, keeps others as is."""
-         cleaned = {}
-         for key, value in raw_details.items():
-              if isinstance(value, (bool, int, float)):
-                   cleaned[key] = value
-              elif value is None:
-                   cleaned[key] = None
-              else: # Should be string or string-like from tkVar.get()
-                   val_str = str(value).strip()
-                   if val_str == "" or val_str == "None":
-                        cleaned[key] = None
-                   else:
-                        try: # Attempt numeric conversion
-                             num_val = float(val_str)
-                             # Store as int if it's effectively whole
-                             cleaned[key] = int(num_val) if num_val.is_integer() else num_val
-                        except ValueError:
-                             cleaned[key] = val_str # Keep as string if not numeric
-         return cleaned
+         """Converts numeric strings to numbers, keeps others as is (see clean_activity_details)."""
+         return clean_activity_details(raw_details)
 
     # EXPENSEWISE
     def destroy(self):
@@ -3463,11 +6769,17 @@ class AddCarbonFootprintActivityDialog(tk.Toplevel):
             try: self.unbind("<Escape>")
             except tk.TclError: pass
 
+            # Cancel a pending live preview update
+            if getattr(self, '_preview_after_id', None):
+                try: self.after_cancel(self._preview_after_id)
+                except tk.TclError: pass
+                self._preview_after_id = None
+
             # Unbind mousewheel events
             self._unbind_all_mousewheel()
 
         except Exception as e:
-             logging.error(f"Error during AddCarbonFootprintActivityDialog cleanup: {e}", exc_info=True)
+             logging.error("Error during AddCarbonFootprintActivityDialog cleanup: %s", e, exc_info=True)
         finally:
             super().destroy() # Call original destroy
 
@@ -3479,7 +6791,7 @@ class SimpleEntryDialog(tk.Toplevel):
     # EXPENSEWISE
     def __init__(self, parent, title, fields_config):
         super().__init__(parent)
-        self.transient(parent)
+        self.transient(parent.winfo_toplevel())
         self.parent = parent
         self.title(title)
         self.fields_config = fields_config # Expects {"field_name": {"label": "...", "required": True/False}}
@@ -3515,8 +6827,7 @@ class SimpleEntryDialog(tk.Toplevel):
         main_frame.grid_columnconfigure(1, weight=1)
 
         # Dialog Styles (scoped to this instance)
-        dialog_style = ttk.Style(self)
-        dialog_style.theme_use('clam')
+        dialog_style = ttk.Style(self) # Parent window already set a clam-based theme
         dialog_style.configure('SimpleDialog.TLabel', background=dlg_bg, foreground=dlg_fg, font=FONT_NORMAL)
         dialog_style.configure('SimpleDialogBold.TLabel', background=dlg_bg, foreground=dlg_fg, font=FONT_BOLD)
         dialog_style.configure('SimpleDialog.TEntry', fieldbackground=card_bg, foreground=dlg_fg, insertcolor=dlg_fg, borderwidth=1, relief=tk.SOLID, bordercolor=disabled_bg, padding=5)
@@ -3583,7 +6894,7 @@ class SimpleEntryDialog(tk.Toplevel):
             screen_w, screen_h = self.winfo_screenwidth(), self.winfo_screenheight(); margin=10
             x = max(margin, min(x, screen_w - dialog_w - margin)); y = max(margin, min(y, screen_h - dialog_h - margin))
             self.geometry(f"+{x}+{y}")
-        except Exception as e: logging.error(f"Error centering SimpleEntryDialog: {e}")
+        except Exception as e: logging.error("Error centering SimpleEntryDialog: %s", e)
 
     # EXPENSEWISE
     def validate_required(self):
@@ -3604,7 +6915,7 @@ class SimpleEntryDialog(tk.Toplevel):
              messagebox.showerror("Missing Information", "\n".join(errors), parent=self)
              return
         self.result = {name: var.get() for name, var in self.vars.items()}
-        logging.debug(f"SimpleDialog OK. Result: {self.result}")
+        logging.debug("SimpleDialog OK. Result: %s", self.result)
         self.destroy()
 
     # EXPENSEWISE
@@ -3616,64 +6927,16 @@ class SimpleEntryDialog(tk.Toplevel):
 
 # IVO-ONLY (EXPENSEWISE ARCHITECTURE)
 # --- Main Execution Logic ---
-def launch_main_app(user_id):
-    """Initializes and runs the main ECOHUBApp."""
-    logging.info(f"Launching Main App for user: {user_id}...")
-    app = None
-    should_return_to_accounts = True # Default behavior
-
-    try:
-        app = ECOHUBApp(user_id)
-        app.mainloop() # Blocks until window is closed
-
-        # After mainloop ends, check if full exit was requested
-        full_exit_req = getattr(app, '_full_exit_requested', False) if app else False
-        if full_exit_req:
-            logging.info("Full exit requested. Terminating.")
-            should_return_to_accounts = False
-        else:
-             logging.info("Main app closed. Returning to accounts.")
-             should_return_to_accounts = True
-
-    except Exception as e:
-        logging.exception(f"CRITICAL ERROR during main application execution for {user_id}")
-        messagebox.showerror("Application Error", f"A critical error occurred:\n{e}\n\nReturning to profile selection.", parent=None)
-        should_return_to_accounts = True # Attempt recovery
-
-    return should_return_to_accounts
-
 # IVO-ONLY (EXPENSEWISE ARCHITECTURE)
-if __name__ == "__main__":
-    # Perform initial setup outside the loop
-    ensure_data_dir()
-    # load_emission_factors() # Load factors once at startup? No, load per user session in load_user_data.
+if __name__ == "__main__": # `python ECOHUB.py calc|serve` exit at the headless entry point above instead
+    configure_logging()
     logging.info("--- ECOHUB Application Starting ---")
+    try:
+        # One root and one mainloop for the whole run; profile switches swap views inside it
+        root = ECOHUBRoot()
+        root.mainloop() # Blocks until the application exits
+    except Exception as e:
+        logging.exception("FATAL ERROR during application startup or main loop")
+        messagebox.showerror("Fatal Error", f"A critical error occurred:\n{e}\n\nThe application will close.", parent=None)
 
-    continue_running = True
-    while continue_running:
-        logging.info("Showing Accounts Page...")
-        selected_user_id = None
-        accounts_page = None
-
-        try:
-            accounts_page = AccountsPage()
-            accounts_page.mainloop() # Blocks until AccountsPage closes
-
-            # Check the result after the window is destroyed
-            selected_user_id = getattr(accounts_page, 'selected_user_id', None)
-
-            if selected_user_id is None:
-                # User closed AccountsPage or clicked Exit
-                logging.info("No user selected or Exit clicked. Shutting down.")
-                continue_running = False
-            else:
-                # User selected, launch the main app
-                # launch_main_app returns True if we should loop back to accounts
-                continue_running = launch_main_app(selected_user_id)
-
-        except Exception as e:
-            logging.exception("FATAL ERROR during application startup or main loop")
-            messagebox.showerror("Fatal Error", f"A critical error occurred:\n{e}\n\nThe application will close.", parent=None)
-            continue_running = False # Stop on critical errors
-
-    logging.info("--- ECOHUB Application Finished ---")
\ No newline at end of file
+    logging.info("--- ECOHUB Application Finished ---")
@@ -0,0 +1,387 @@
+""" ECOHUB Benchmarks - times the data and calculation hot paths on synthetic histories """
+
+"""
+Runs headless (no Tk window is created) against a throwaway data directory.
+
+Usage:
+    python benchmark.py                                  # 1k, 10k, 100k and 1M records
+    python benchmark.py --sizes 1k,10k --repeat 5
+    python benchmark.py --output results.json --save-baseline bench_baseline.json
+    python benchmark.py --baseline bench_baseline.json   # flags ops slower than the baseline
+    python benchmark.py --sizes 100k --memory            # also report bytes per record (tracemalloc)
+
+Results are written as JSON (stdout unless --output is given); the comparison table
+goes to stderr. The exit code is 1 when --baseline is given and any op regressed by
+more than --tolerance.
+"""
+
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import ECOHUB
+
+DEFAULT_SIZES = "1k,10k,100k,1m"
+BENCH_USER_ID = "user_bench"
+
+
+# --- Synthetic Data Generator ---
+def _amount(rng, low, high, blank_chance=0.2):
+    """A raw entry-field value: a numeric string, or "" (left blank) some of the time."""
+    if rng.random() < blank_chance:
+        return ""
+    return f"{rng.uniform(low, high):.2f}"
+
+def _residential_details(rng):
+    opts = ECOHUB.ACTIVITY_FORM_OPTIONS["residential"]
+    details = {
+        "elec_kwh": _amount(rng, 50, 900, blank_chance=0),
+        "elec_period": rng.choice(opts["elec_period"]),
+        "heat_fuel_type": rng.choice(opts["heat_fuel_type"]),
+        "heat_fuel_period": rng.choice(opts["heat_fuel_period"]),
+        "water_heater_type": rng.choice(opts["water_heater_type"]),
+        "water_usage_period": rng.choice(opts["water_usage_period"]),
+        "renew_type": rng.choice(opts["renew_type"]),
+        "renew_kwh_gen": _amount(rng, 0, 300, blank_chance=0.7),
+        "renew_period": rng.choice(opts["renew_period"]),
+    }
+    # Only the sub-form of the selected option contributes its fields (as in the dialog)
+    if details["heat_fuel_type"] != "None":
+        details["heat_fuel_amount"] = _amount(rng, 1, 120)
+        if details["heat_fuel_type"] == "Wood":
+            details["heat_wood_type"] = rng.choice(opts["heat_wood_type"])
+    if details["water_heater_type"] != "None":
+        details["water_usage_amount"] = _amount(rng, 10, 400)
+    return details
+
+def _travel_details(rng):
+    opts = ECOHUB.ACTIVITY_FORM_OPTIONS["travel"]
+    details = {
+        "mode": rng.choice(opts["mode"]),
+        "distance": _amount(rng, 1, 2500, blank_chance=0),
+        "period": rng.choice(opts["period"]),
+    }
+    if details["mode"] == "Car":
+        details["car_fuel_type"] = rng.choice(opts["car_fuel_type"])
+    elif details["mode"] == "Rideshare":
+        details["rideshare_fuel_type"] = rng.choice(opts["rideshare_fuel_type"])
+        details["rideshare_passengers"] = str(rng.randint(1, 4))
+    elif details["mode"] == "Air Travel":
+        details["flight_type"] = rng.choice(opts["flight_type"])
+        details["flight_cabin"] = rng.choice(opts["flight_cabin"])
+    return details
+
+def _food_details(rng):
+    opts = ECOHUB.ACTIVITY_FORM_OPTIONS["food"]
+    details = {key: _amount(rng, 0, 6) for key in ECOHUB.FOOD_INPUTS_MAP}
+    details.update({
+        "consumption_period": rng.choice(opts["consumption_period"]),
+        "local_sourcing": rng.choice(opts["local_sourcing"]),
+        "organic_preference": rng.random() < 0.3,
+        "packaging_level": rng.choice(opts["packaging_level"]),
+        "region": rng.choice(opts["region"]),
+    })
+    return details
+
+def _shopping_details(rng):
+    opts = ECOHUB.ACTIVITY_FORM_OPTIONS["shopping"]
+    details = {key: _amount(rng, 0, 15000, blank_chance=0.5) for key in ECOHUB.SPENDING_CATS_MAP}
+    details.update({
+        "spending_period": rng.choice(opts["spending_period"]),
+        "area_type_retail": rng.choice(opts["area_type_retail"]),
+        "waste_kg": _amount(rng, 0, 25),
+        "waste_period": rng.choice(opts["waste_period"]),
+        "waste_disposal": rng.choice(opts["waste_disposal"]),
+    })
+    return details
+
+def _services_details(rng):
+    opts = ECOHUB.ACTIVITY_FORM_OPTIONS["services"]
+    return {
+        "dry_cleaning_kg": _amount(rng, 0, 10, blank_chance=0.5),
+        "dry_cleaning_period": rng.choice(opts["dry_cleaning_period"]),
+        "landscaping_m2": _amount(rng, 0, 500, blank_chance=0.5),
+        "landscaping_period": rng.choice(opts["landscaping_period"]),
+        "area_type_services": rng.choice(opts["area_type_services"]),
+    }
+
+def _digital_details(rng):
+    opts = ECOHUB.ACTIVITY_FORM_OPTIONS["digital"]
+    return {
+        "laptop_hours": _amount(rng, 0, 10),
+        "mobile_hours": _amount(rng, 0, 8),
+        "tablet_hours": _amount(rng, 0, 4, blank_chance=0.6),
+        "streaming_quality": rng.choice(opts["streaming_quality"]),
+        "streaming_hours": _amount(rng, 0, 5),
+        "gaming_type": rng.choice(opts["gaming_type"]),
+        "gaming_hours": _amount(rng, 0, 4, blank_chance=0.5),
+        "data_usage_gb": _amount(rng, 1, 200),
+        "data_period": rng.choice(opts["data_period"]),
+        "region_grid": rng.choice(opts["region_grid"]),
+    }
+
+DETAIL_GENERATORS = {
+    "residential": _residential_details,
+    "travel": _travel_details,
+    "food": _food_details,
+    "shopping": _shopping_details,
+    "services": _services_details,
+    "digital": _digital_details,
+}
+
+def generate_activities(count, seed=42, factors=None):
+    """Builds count activity records shaped like the ones submit_activity stores.
+
+    Same seed and count always give the same records. Footprints are computed with the
+    real engine so stored totals are realistic.
+    """
+    assert set(DETAIL_GENERATORS) == set(ECOHUB.BASE_CATEGORIES), "Generator out of date with BASE_CATEGORIES"
+    rng = random.Random(seed)
+    factors = factors or ECOHUB.DEFAULT_EMISSION_FACTORS
+    categories = list(ECOHUB.BASE_CATEGORIES)
+    start = datetime.datetime(2023, 1, 1)
+    span_seconds = 2 * 365 * 24 * 3600 # Two years of history
+    offsets = sorted(rng.randrange(span_seconds) for _ in range(count))
+
+    activities = []
+    for offset in offsets:
+        category = rng.choice(categories)
+        details = DETAIL_GENERATORS[category](rng)
+        total, _ = ECOHUB.calculate_footprint_components(category, ECOHUB.clean_activity_details(details), factors)
+        activities.append({
+            "timestamp": (start + datetime.timedelta(seconds=offset)).strftime("%Y-%m-%d %H:%M:%S"),
+            "category": category,
+            "activity_details": details,
+            "carbon_footprint": round(max(0, total), 3),
+        })
+    return activities
+
+
+# --- Timed Operations ---
+# Each op takes the generated activities and returns a zero-argument callable to time.
+def _op_save_user_data(activities):
+    def run():
+        ECOHUB.app_state["current_user_id"] = BENCH_USER_ID
+        ECOHUB.app_state["settings"] = {"theme": "eco_dark", "conversion": "CO2e"}
+        ECOHUB.app_state["activities"] = activities
+        ECOHUB.app_state["activity_log"] = []
+        if not ECOHUB.save_user_data(BENCH_USER_ID):
+            raise RuntimeError("save_user_data failed")
+    return run
+
+def _op_load_user_data(activities):
+    def run():
+        ECOHUB.user_data_cache.clear() # Cold load: parse and validate the files
+        ECOHUB.load_user_data(BENCH_USER_ID)
+    return run
+
+def _op_load_user_data_cached(activities):
+    ECOHUB.load_user_data(BENCH_USER_ID) # Warm the cache once
+    return lambda: ECOHUB.load_user_data(BENCH_USER_ID)
+
+def _op_calculate_footprint(activities):
+    # Same work as AddCarbonFootprintActivityDialog._calculate_carbon_footprint per record
+    factors = ECOHUB.app_state.get("emission_factors") or ECOHUB.DEFAULT_EMISSION_FACTORS
+    def run():
+        for activity in activities:
+            cleaned = ECOHUB.clean_activity_details(activity["activity_details"])
+            total, _ = ECOHUB.calculate_footprint_components(activity["category"], cleaned, factors)
+            round(max(0, total), 3)
+    return run
+
+def _op_dashboard_aggregation(activities):
+    return lambda: ECOHUB.aggregate_category_totals(activities)
+
+def _op_format_activity_details(activities):
+    format_details = ECOHUB.BasePage.format_activity_details
+    def run():
+        for activity in activities:
+            format_details(activity["activity_details"])
+    return run
+
+# Ordered: save writes the files the load ops read
+OPERATIONS = {
+    "save_user_data": _op_save_user_data,
+    "load_user_data": _op_load_user_data,
+    "load_user_data_cached": _op_load_user_data_cached,
+    "calculate_footprint": _op_calculate_footprint,
+    "dashboard_aggregation": _op_dashboard_aggregation,
+    "format_activity_details": _op_format_activity_details,
+}
+
+
+# --- Runner ---
+def parse_sizes(text):
+    """'1k,10k,1m' -> [1000, 10000, 1000000]"""
+    multipliers = {"k": 1_000, "m": 1_000_000}
+    sizes = []
+    for part in text.split(","):
+        part = part.strip().lower()
+        if not part:
+            continue
+        if part[-1] in multipliers:
+            sizes.append(int(float(part[:-1]) * multipliers[part[-1]]))
+        else:
+            sizes.append(int(part))
+    return sizes
+
+def time_callable(func, repeat):
+    """Returns the wall-clock seconds of each of repeat calls."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def run_benchmarks(sizes, repeat, seed, op_names):
+    results = []
+    for size in sizes:
+        print(f"Generating {size:,} activities (seed {seed})...", file=sys.stderr)
+        activities = generate_activities(size, seed=seed)
+        for op_name in op_names:
+            func = OPERATIONS[op_name](activities)
+            timings = time_callable(func, repeat)
+            best = min(timings)
+            results.append({
+                "op": op_name,
+                "size": size,
+                "min_s": best,
+                "median_s": statistics.median(timings),
+                "per_record_us": best / size * 1e6 if size else 0.0,
+                "repeat": repeat,
+            })
+            print(f"  {op_name:<26} {size:>9,}  min {best * 1000:10.2f} ms", file=sys.stderr)
+    return results
+
+def measure_activity_memory(activities):
+    """Bytes per record (tracemalloc) of the history as parsed JSON dicts vs as ActivityRecords.
+
+    Both forms are built from the same JSON text, the way load_user_data sees it.
+    """
+    text = json.dumps(activities)
+    count = len(activities) or 1
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        parsed = json.loads(text)
+        dict_bytes = tracemalloc.get_traced_memory()[0] - base
+
+        records = [ECOHUB.ActivityRecord.from_dict(activity) for activity in parsed]
+        del parsed
+        record_bytes = tracemalloc.get_traced_memory()[0] - base
+    finally:
+        tracemalloc.stop()
+    assert [record.to_dict() for record in records[:1000]] == json.loads(text)[:1000], "ActivityRecord round trip is lossy"
+    return {
+        "size": len(activities),
+        "dict_bytes_per_record": dict_bytes / count,
+        "record_bytes_per_record": record_bytes / count,
+        "reduction": 1 - record_bytes / dict_bytes if dict_bytes else 0.0,
+    }
+
+def compare_to_baseline(results, baseline, tolerance, min_time):
+    """Prints current vs baseline per (op, size); returns the list of regressed entries.
+
+    Ops whose baseline took less than min_time seconds are reported but never flagged,
+    since timer noise dominates at that scale.
+    """
+    baseline_index = {(entry["op"], entry["size"]): entry for entry in baseline.get("results", [])}
+    regressions = []
+    print(f"\n{'op':<26} {'size':>9} {'baseline ms':>12} {'current ms':>12} {'ratio':>7}", file=sys.stderr)
+    for entry in results:
+        base = baseline_index.get((entry["op"], entry["size"]))
+        if not base or not base.get("min_s"):
+            print(f"{entry['op']:<26} {entry['size']:>9,} {'-':>12} {entry['min_s'] * 1000:12.2f} {'new':>7}", file=sys.stderr)
+            continue
+        ratio = entry["min_s"] / base["min_s"]
+        entry["baseline_min_s"] = base["min_s"]
+        entry["ratio"] = ratio
+        flag = ""
+        if ratio > 1 + tolerance and base["min_s"] >= min_time:
+            regressions.append(entry)
+            flag = "  REGRESSION"
+        print(f"{entry['op']:<26} {entry['size']:>9,} {base['min_s'] * 1000:12.2f} {entry['min_s'] * 1000:12.2f} {ratio:7.2f}{flag}", file=sys.stderr)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark ECOHUB hot paths on synthetic activity histories.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"Comma-separated record counts (default: {DEFAULT_SIZES})")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per op and size; the minimum is compared (default: 3)")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for the data generator (default: 42)")
+    parser.add_argument("--ops", default=",".join(OPERATIONS), help="Comma-separated subset of ops to run")
+    parser.add_argument("--output", help="Write results JSON here instead of stdout")
+    parser.add_argument("--baseline", help="Results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed slowdown vs baseline before flagging (default: 0.15 = 15%%)")
+    parser.add_argument("--min-time", type=float, default=0.005, help="Baseline timings below this many seconds are never flagged (default: 0.005)")
+    parser.add_argument("--save-baseline", help="Also write the results to this path as the new baseline")
+    parser.add_argument("--memory", action="store_true", help="Also report activity bytes per record, dicts vs ActivityRecord")
+    args = parser.parse_args(argv)
+
+    op_names = [name.strip() for name in args.ops.split(",") if name.strip()]
+    unknown = [name for name in op_names if name not in OPERATIONS]
+    if unknown:
+        parser.error(f"Unknown ops: {', '.join(unknown)} (choose from {', '.join(OPERATIONS)})")
+    if "save_user_data" not in op_names and any(name.startswith("load_user_data") for name in op_names):
+        op_names.insert(0, "save_user_data") # Load ops need the files the save writes
+
+    # Keep ECOHUB's per-call logging (INFO, and WARNING for e.g. unmapped periods) out of the timings
+    logging.disable(logging.WARNING)
+    original_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="ecohub_bench_") as work_dir:
+        os.chdir(work_dir) # ECOHUB keeps its data under a relative DATA_DIR
+        try:
+            results = run_benchmarks(parse_sizes(args.sizes), max(1, args.repeat), args.seed, op_names)
+            memory = []
+            if args.memory:
+                print(f"\n{'size':>9} {'dict B/rec':>11} {'record B/rec':>13} {'saved':>6}", file=sys.stderr)
+                for size in parse_sizes(args.sizes):
+                    entry = measure_activity_memory(generate_activities(size, seed=args.seed))
+                    memory.append(entry)
+                    print(f"{size:>9,} {entry['dict_bytes_per_record']:11.0f} {entry['record_bytes_per_record']:13.0f} {entry['reduction']:6.0%}", file=sys.stderr)
+        finally:
+            os.chdir(original_cwd)
+
+    report = {
+        "meta": {
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    if memory:
+        report["memory"] = memory
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare_to_baseline(results, json.load(f), args.tolerance, args.min_time)
+        report["meta"]["baseline"] = args.baseline
+        report["meta"]["regressions"] = len(regressions)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())